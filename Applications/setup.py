@@ -5,10 +5,10 @@ py2app build script for SEED2_0
 from setuptools import setup
  
 APP = ['SEED2_0.py']
-DATA_FILES = ["data"]
+DATA_FILES = ["data", "images"]
 OPTIONS = {'argv_emulation': True,
            'iconfile': 'icon.icns',
-           'packages': ['PIL','sklearn','pandas','pysindy']
+           'packages': ['PIL','sklearn','pandas','pysindy','seed']
     }
  
 setup(
@@ -1,32 +1,28 @@
 # Main SEED 2.0 Code
 # Initially created by Michael Vause, 12/06/2020
 
-# Import all required modules
+# Import the modules needed to show the GUI. The heavy modules (PySINDy, matplotlib, pandas, numpy) are imported on a background thread
+# while the window is being built, see load_modules()
 try:
-    import pkg_resources.py2_warn
+    from seed.timing import Timeline, Profile # Used to measure how long SEED 2.0 takes to start up, and the stages of each computation
+    startup = Timeline("SEED 2.0 startup") # Started as early as possible so that the import times are included
     import sys
     from sys import platform # Used to detect the operating system used by the user to change the dimensions of the GUI
     import tkinter as tk # tkinter is the GUI module used for this project
     from tkinter import ttk
     from tkinter import messagebox
     from tkinter import filedialog as fd
-    import numpy as np
+    from tkinter import simpledialog # Used to ask for the initial conditions when loading a model
     import os
-    import io
+    import queue # Used to receive progress from the background computations
+    import multiprocessing # Used to start the processes that read the trajectories of a multi-trajectory fit
+    import threading # Used to import the heavy modules in the background
     from PIL import Image, ImageTk # Used for the addition of the Durham University logo to the GUI
-    from urllib.request import urlopen # Used for the addition of the Durham University logo to the GUI
-    import ssl # Needed for the Durham University logo to open properly
-    import pysindy as ps
-    import ast # ast is used to find the class name to use when instantiating the optimization and differentiation variable
-    from scipy.signal import savgol_filter # Although unused in the code, this is needed for the smoothed finite difference differentiation option to work
-    from scipy.integrate import odeint # used when generating the lorenz data for the "Generate Lorenz System" option
-    import csv
+    from seed.jobs import JobQueue # Runs the computations on a background thread so the GUI stays responsive
+    from seed.stages import STAGES # The names of the pipeline stages, for the progress bar
+    from seed import registry # The available PySINDy options and their parameters, loaded in the background (see load_modules) and saved after the first run so PySINDy isn't needed to list them
     import webbrowser # Used for opening the GitHub page when the "Tutorial" button is pressed so the user can read the readme file
     from math import ceil
-    import matplotlib
-    import matplotlib.pyplot as plt
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-    import pandas as pd # Used when saving the output coefficient matrix to a .csv file
 except ImportError as mod: # If the user didn't install the required modules beore trying to run SEED 2.0
     print("Install the required modules before starting:\n" + str(mod))
     messagebox.showerror(title="Module Import Error", message="Install the required modules before starting:\n" + str(mod))
@@ -34,12 +30,81 @@ except ImportError as mod: # If the user didn't install the required modules beo
 except Exception as err: # Any other exception that should occur (nothing else should happen, hence generalising all other exceptions)
     print("Error while importing:\n" + str(err))
     sys.exit()
+startup.mark("light modules imported")
+
+# The heavy modules, set by load_modules()
+engine = None # The GUI-free read/fit/score/simulate pipeline, shared with the command line interface
+format_equations = None
+plots = None # Builds the model plots figure
+artifact = None # Saves and loads model files
+trajectories = None # Fits one model to several data files
+pareto = None # Fits the model for a sequence of sparsity thresholds
+precision = None # Describes the accuracy lost by a reduced precision fit
+sampling = None # Describes the samples fitted and held out by a subsampled fit
+np = None
+FigureCanvasTkAgg = None
+NavigationToolbar2Tk = None
+load_error = None # The error raised while importing the heavy modules, if any
+
+# Import the heavy modules and load the option registry (built from PySINDy on the first run) - runs on a background thread started
+# with the GUI, so the window can be shown while they load
+def load_modules():
+    global engine, format_equations, plots, artifact, trajectories, pareto, precision, sampling, np, FigureCanvasTkAgg, NavigationToolbar2Tk, load_error
+    try:
+        import numpy
+        from matplotlib.backends import backend_tkagg
+        from seed import engine as seed_engine
+        from seed.model import format_equations as seed_format_equations
+        from seed import plots as seed_plots
+        from seed import artifact as seed_artifact
+        from seed import trajectories as seed_trajectories
+        from seed import pareto as seed_pareto
+        from seed import precision as seed_precision
+        from seed import sampling as seed_sampling
+        from seed import ensemble
+        registry.load()
+    except Exception as err:
+        load_error = err
+        return
+    ensemble.start_method = "spawn" # The ensemble's worker processes are started without copying the GUI
+    np = numpy
+    FigureCanvasTkAgg, NavigationToolbar2Tk = backend_tkagg.FigureCanvasTkAgg, backend_tkagg.NavigationToolbar2Tk
+    format_equations = seed_format_equations
+    plots = seed_plots
+    artifact = seed_artifact
+    trajectories = seed_trajectories
+    pareto = seed_pareto
+    precision = seed_precision
+    sampling = seed_sampling
+    engine = seed_engine # Set last, so the other modules are all available once engine is set
+
+loader = None # The thread running load_modules(), started with the GUI (not on import, e.g. in the ensemble's worker processes)
+waiting_action = None # A button's action waiting for the heavy modules to finish importing, see when_imported()
+
+# Run action once the heavy modules have finished importing - used by the buttons that need them. While they're still importing the window
+# isn't blocked: the action waits (a later click replaces it), the status line shows it and check_imports() runs it once they're loaded
+def when_imported(action):
+    global waiting_action
+    if loader.is_alive():
+        waiting_action = action
+        update_status()
+        return
+    wait_for_imports()
+    action()
+
+# Wait for the heavy modules to finish importing - only called once they have (see when_imported), so it doesn't block the window
+def wait_for_imports():
+    loader.join()
+    if load_error is not None: # The same message as when the light modules fail to import
+        print("Install the required modules before starting:\n" + str(load_error))
+        messagebox.showerror(title="Module Import Error", message="Install the required modules before starting:\n" + str(load_error))
+        sys.exit()
 
 # Any global variables used throughout Seed 2.0
 
-pysindypath = os.path.dirname(ps.__file__) # Find file path for pysindy module within the python files
 hidden = False # Is the own data file browser button shown
-to_open = " " # Variable storing the filepath for the own data file
+to_open = " " # Variable storing the filepath for the own data file (or folder)
+own_files = [] # The own data files selected, more than one are fitted together as separate trajectories of the same system
 adv = False # Is the advanced options panel shown
 opt_widgets = [] # Storing information for the advanced optimization option widgets, structure of each item in list (the difference in structure for different types is important!): 
                         #if the variable is a boolean : [label widget with name of variable,option menu with True/False,type of variable (bool in this case),the input value of the widget on the GUI]
@@ -50,12 +115,18 @@ diff_widgets = [] # Storing information for the advanced differentiation option
                         #for other variables: [label widget with name of variable,type of variable,entry box widget with input value from GUI]
 
                         #When the item is "type of variable", that means the type of the inbuilt variable in the actual optimization/differentiation class
+job_queue = None # The queue of background computations, created with the GUI
+stage_names = [stage[0] for stage in STAGES] # The pipeline stages in order, used for the progress bar
+stage_text = dict(STAGES) # The text shown on the GUI for each pipeline stage
+sim_solvers = ["LSODA", "RK45", "RK23", "DOP853", "Radau", "BDF"] # The simulation solvers, the same as seed.simulation.solvers (listed here so that scipy isn't imported before the window is shown)
 
 # Any functions used throughout SEED 2.0
 
 # Function to run on pressing the exit button when closing SEED 2.0
 def on_closing():    
     if messagebox.askokcancel("Quit", "Are you sure you want to quit?"): # tkinter message box, returning True when "ok" is pressed
+        for job in job_queue.running(): # Stop any computation still running
+            job_queue.cancel(job.id)
         window.destroy() # Destroy the window mainloop
 
 # Take a file path and return all of the non hidden files in that path
@@ -63,34 +134,76 @@ def non_hidden(path):
     files = [file for file in os.listdir(path) if not file.startswith(".")]
     return files
 
+# The options of the Example/Own Data dropdown: the data files in ./data (without the results "python -m seed watch" writes next to them)
+def data_options():
+    options = sorted(file for file in non_hidden("./data") if file != "__pycache__" and ".seed_" not in file)
+    return options + ["Generate Lorenz System", "Own Data"]
+
+# Update the Example/Own Data dropdown with the files in ./data, so files added while SEED 2.0 is open (e.g. by an acquisition rig) can
+# be selected without restarting. Runs every 2 s
+def refresh_data():
+    global sel_options
+    try:
+        options = data_options()
+    except OSError: # The folder is being changed, try again next time
+        options = sel_options
+    if options != sel_options:
+        sel_options = options
+        menu = select_menu["menu"]
+        menu.delete(0, "end")
+        for option in options:
+            menu.add_command(label=option, command=tk._setit(sel_var, option, toggle_browser))
+    window.after(2000, refresh_data)
+
 # Show/hide the file browser button depending on whether or not own data is selected
 def toggle_browser(command):
     global hidden
-    global to_open
-    filename = to_open.split('/')[-1] # Show filename portion of filepath
     sel_op = sel_var.get() # The option selected in the Example/Own Data dropdown
 
     if sel_op == "Own Data":
         if hidden: # Show browser widgets
-            file_button.grid()
-            file_label.configure(text="File Selected: " + filename)
+            browse_fram.grid()
+            file_label.configure(text=files_text())
             hidden = False
         else: # Keep the widgets shown
             pass
     else:# If own data not selected, hide everything
         if not hidden: # Hide browser widgets
-            file_button.grid_remove()
+            browse_fram.grid_remove()
             file_label.configure(text=" ")
             hidden = True
         else: # Keep the widgets hidden
             pass
 
-# Show file browser - called when "Select File" button pressed
+# Show file browser - called when "Select File" button pressed. Selecting several files fits them together as separate trajectories
 def browse():
-    global to_open
-    to_open = fd.askopenfilename(initialdir = "/", filetypes = (("CSV files", "*.csv"), ("all files", "*.*"))) # tkinter file browser window, returning filepath of selected file
-    filename = to_open.split('/')[-1] # Name of selected file
-    file_label.configure(text="File Selected: " + filename) # Update label to show selected file, saved globally so that the programme remembers the selected file
+    global to_open, own_files
+    files = fd.askopenfilenames(initialdir = "/", filetypes = (("CSV files", "*.csv"), ("all files", "*.*"))) # tkinter file browser window, returning the filepaths of the selected files
+    if not files: # The user cancelled
+        return
+    own_files = list(files)
+    to_open = own_files[0]
+    file_label.configure(text=files_text()) # Update label to show selected file, saved globally so that the programme remembers the selected file
+
+# Show folder browser - called when "Select Folder" button pressed. Every .csv file in the folder is fitted as a separate trajectory
+def browse_folder():
+    global to_open, own_files
+    folder = fd.askdirectory(initialdir = "/")
+    if not folder: # The user cancelled
+        return
+    files = sorted(os.path.join(folder, file) for file in os.listdir(folder) if file.endswith(".csv") and not file.startswith("."))
+    if not files: # Keep the earlier selection
+        messagebox.showerror(title="No Data Files", message="There are no .csv data files in " + folder)
+        return
+    own_files = files
+    to_open = own_files[0] if len(own_files) == 1 else folder # A folder with one file is the same as selecting the file
+    file_label.configure(text=files_text())
+
+# The text describing the selected own data files
+def files_text():
+    if len(own_files) > 1:
+        return "Trajectories Selected: " + str(len(own_files)) + " files (" + to_open.split('/')[-1] + ")"
+    return "File Selected: " + to_open.split('/')[-1] # Show filename portion of filepath
 
 # Hide and show optimization/differentiation option variable selection
 def advanced():
@@ -107,26 +220,11 @@ def advanced():
     
     window.geometry(size) # Set GUI window's size
 
-# Get optimizer or differentiator selection class name
-def get_od_class(selection):
-    if(selection == "opt"):
-        opt = str(opt_var.get()) # Get the optimization option selected
-        fil = open(pysindypath+"/optimizers/"+opt+".py") # Open the optimization option file
-    elif(selection == "diff"):
-        diff = str(diff_var.get()) # Get the differentiation option selected
-        fil = open(pysindypath+"/differentiation/"+diff+".py") # Open the differentiation option file selected
-
-    # Read the file, return all of the names of the lasses in the file and return the class name for the option
-    contents = fil.read()
-    par = ast.parse(contents)
-    classes = [node.name for node in ast.walk(par) if isinstance(node, ast.ClassDef)]
-    return classes[0]
-
 # Get optimization option variables and update on advanced option panel
 def get_opt(command):
-    class_name = get_od_class("opt")
-    opt_inst = eval("ps."+class_name+"()") # Instantiate the optimization option
-    opt_params = opt_inst.get_params() # Get the inbuilt parameters and values from the instance (inbuilt function to the optimizer class - *Not the same for the differentiation options*)
+    if loader.is_alive(): # The panel is filled once the registry has loaded, see fill_options()
+        return
+    opt_params = registry.params("opt", str(opt_var.get())) # Get the inbuilt parameters and default values of the optimizer from the option registry
 
     disp_opt_select(opt_params)
 
@@ -142,42 +240,36 @@ def disp_opt_select(opt_params):
     ofram_label = tk.Label(opt_fram,text="Optimization Option Variables",font=("Times",18,"bold"),pady=10,bg=bgc)
     ofram_label.grid(row=0,column=0,sticky="W")
 
-    var_list = list(opt_params)
-    for x in range(len(var_list)): # Create a widget for all inbuilt parameters 
-        var_label = tk.Label(opt_fram,text=var_list[x],font=("Times",15,"bold"),pady=10,bg=bgc) # Label widget for all inbuilt parameters containing the parameter name
+    for x in range(len(opt_params)): # Create a widget for all inbuilt parameters
+        param = opt_params[x] # The registry entry for the parameter: {"name", "text", "type", "required"}
+        var_label = tk.Label(opt_fram,text=param["name"],font=("Times",15,"bold"),pady=10,bg=bgc) # Label widget for all inbuilt parameters containing the parameter name
         var_label.grid(row=x+1,column=0,sticky="E")
 
-        if str(opt_params[var_list[x]]) == "True" or str(opt_params[var_list[x]]) == "False": # Create dropdown with True/False option for boolean variables
+        if param["text"] == "True" or param["text"] == "False": # Create dropdown with True/False option for boolean variables
             ovar_x = tk.StringVar(opt_fram) # The value of the inbuilt parameter
             ovar_options = ["True", "False"] # The dropdown has the options True or False
-            ovar_x.set(str(opt_params[var_list[x]])) # Set the dropdown selection to the default value of the parameter
+            ovar_x.set(param["text"]) # Set the dropdown selection to the default value of the parameter
 
-            opt_widgets.append([var_label,tk.OptionMenu(opt_fram,ovar_x,*ovar_options),type(opt_params[var_list[x]]),ovar_x])
+            opt_widgets.append([var_label,tk.OptionMenu(opt_fram,ovar_x,*ovar_options),registry.param_type(param),ovar_x])
             opt_widgets[x][1].config(width=drop_w,font=("Times",15),bg=bgc) # Format the dropdown widget
         else: # For any other variable input type, create an entry box and enter default value
-            opt_widgets.append([var_label,type(opt_params[var_list[x]]),tk.Entry(opt_fram,font=("Times",15),highlightbackground=bgc,width=drop_w)])
-            opt_widgets[x][2].insert(0, str(opt_params[var_list[x]])) # Instert the default parameter value to the entry widget
+            opt_widgets.append([var_label,registry.param_type(param),tk.Entry(opt_fram,font=("Times",15),highlightbackground=bgc,width=drop_w)])
+            opt_widgets[x][2].insert(0, param["text"]) # Instert the default parameter value to the entry widget
 
         opt_widgets[x][5-len(opt_widgets[x])].grid(row=x+1,column=1) # Put the newly created widget on the frame
 
-    opt_fram.grid(row=4,column=4,rowspan=len(var_list),padx=5,sticky="W") # Display the optimization option frame on the GUI
+    opt_fram.grid(row=4,column=4,rowspan=len(opt_params),padx=5,sticky="W") # Display the optimization option frame on the GUI
 
 # Get differentiation option variables and update on advanced option panel
 def get_diff(command):
-    diff_param_def = []
-    class_name = get_od_class("diff")
-
-    diff_params = list(eval("ps."+class_name+".__init__.__code__.co_varnames")) # Instantiate the differentiation option class and get inbuilt parameter names
-    if "self" in diff_params:
-        diff_params.remove("self") # Remove self from the list of parameters
+    if loader.is_alive():
+        return
+    diff_params = registry.params("diff", str(diff_var.get())) # Get the inbuilt parameters and default values of the differentiator from the option registry
 
-    temp_params = eval("ps."+class_name+".__init__.__defaults__") # Get differentiation option inbuilt parameter default values
-    diff_param_def[:] = [(("func "+thing.__name__) if(callable(thing)) else thing) for thing in temp_params] # If the input type for a deafult value is a function, enter func at the start
-
-    disp_diff_select(diff_params, diff_param_def)
+    disp_diff_select(diff_params)
 
 # Display the differentiation option variables on GUI
-def disp_diff_select(diff_params, diff_param_def):
+def disp_diff_select(diff_params):
     global diff_fram
     global diff_widgets
     diff_widgets = []
@@ -189,21 +281,22 @@ def disp_diff_select(diff_params, diff_param_def):
     dfram_label.grid(row=0,column=0,sticky="W")
 
     for x in range(len(diff_params)): # Create a widget for all inbuilt parameters
-        var_label = tk.Label(diff_fram,text=diff_params[x],font=("Times",15,"bold"),pady=10,bg=bgc) # Label widget for all inbuilt parameters containing the parameter name
+        param = diff_params[x] # The registry entry for the parameter: {"name", "text", "type", "required"}
+        var_label = tk.Label(diff_fram,text=param["name"],font=("Times",15,"bold"),pady=10,bg=bgc) # Label widget for all inbuilt parameters containing the parameter name
         var_label.grid(row=x+1,column=0,sticky="E")
 
-        if(x+1>len(diff_param_def)): # If there's an empty variable, create an empty entry box
+        if(param["required"]): # If there's an empty variable, create an empty entry box
             diff_widgets.append([var_label,type(""),tk.Entry(diff_fram,font=("Times",15),highlightbackground=bgc,width=drop_w)])
-        elif str(diff_param_def[x]) == "True" or str(diff_param_def[x]) == "False": # Create dropdown for boolean variables
+        elif param["text"] == "True" or param["text"] == "False": # Create dropdown for boolean variables
             dvar_x = tk.StringVar(diff_fram) # The value of the inbuilt parameter
             dvar_options = ["True", "False"] # The dropdown has the options True or False
-            dvar_x.set(str(diff_param_def[x])) # Set the dropdown selection to the default value of the parameter
+            dvar_x.set(param["text"]) # Set the dropdown selection to the default value of the parameter
 
-            diff_widgets.append([var_label,tk.OptionMenu(diff_fram,dvar_x,*dvar_options),type(diff_param_def[x]),dvar_x])
+            diff_widgets.append([var_label,tk.OptionMenu(diff_fram,dvar_x,*dvar_options),registry.param_type(param),dvar_x])
             diff_widgets[x][1].config(width=drop_w,font=("Times",15),bg=bgc) # Format the dropdown widget
         else: # Create an entry box for any other variables and enter deafualt value
-            diff_widgets.append([var_label,type(diff_param_def[x]),tk.Entry(diff_fram,font=("Times",15),highlightbackground=bgc,width=drop_w)])
-            diff_widgets[x][2].insert(0, diff_param_def[x]) # Instert the default parameter value to the entry widget
+            diff_widgets.append([var_label,registry.param_type(param),tk.Entry(diff_fram,font=("Times",15),highlightbackground=bgc,width=drop_w)])
+            diff_widgets[x][2].insert(0, param["text"]) # Instert the default parameter value to the entry widget
 
         diff_widgets[x][5-len(diff_widgets[x])].grid(row=x+1,column=1) # Put the newly created widget on the frame
 
@@ -213,91 +306,70 @@ def disp_diff_select(diff_params, diff_param_def):
     
     diff_fram.grid(row=0,column=4,rowspan=4,padx=5,sticky="W") # Display the differentiation option frame on the GUI
 
-# Instantiate the differentiator or optimizer
-def od_inst(widget_list, selection):
-    class_name = get_od_class(selection)
-
-    instance = "ps."+class_name+"(" # Text string to instantiate after looping through populating with parameter values
-    count = 0
+# Read the optimizer or differentiator parameter values from the advanced option widgets
+def widget_params(widget_list):
+    params = {}
 
-    for widget in widget_list: # Form executable line in a string
+    for widget in widget_list:
         value = None # Input value from GUI
         try: # For option menu widgets
             value = widget[3].get()
         except Exception: # For entry widgets
             value = widget[2].get()
 
-        if(str(widget[-2]) == "<class 'str'>" and not value.startswith("func")): # For inbuilt parameters that are functions, func must be added before the name (savgol_filter)
-            value = "\"" + value + "\""
-        elif(str(widget[-2]) == "<class 'str'>" and value.startswith("func")):
-            value = value.split(' ', 1)[1]
+        if(widget[-2] == str and value == ""): # Entry widgets for parameters with no inbuilt value are left out
+            continue
 
         var_name = widget[0].cget("text") # Name of the inbuilt parameter, stored in the label widgets on the GUI
+        params[var_name] = engine.parse_param(value, widget[-2]) # Convert the text to the parameter value, e.g. "0.1" -> 0.1, "func savgol_filter" -> savgol_filter
 
-        if(not value == "\"\""): # Entry widgets for parameters with no inbuilt value store the value as ""
-            instance = instance + var_name + "=" + value
-            if(count+1<len(widget_list)):
-                instance = instance + ","
-        
-        count += 1
-
-    instance = instance + ")"
-
-    inst = eval(instance) # Instantiate the line
-    return inst
-
-# Get feature library selection class name
-def get_feat_class():
-    feat = str(feat_var.get()) # Get the selected feature library option
-    fil = open(pysindypath+"/feature_library/"+feat+".py") # Open the selected option's code file
-
-    # Read the code file and return the name of the feature library class (Not the same as the name of the file)
-    contents = fil.read()
-    par = ast.parse(contents)
-    classes = [node.name for node in ast.walk(par) if isinstance(node, ast.ClassDef)]
-    return classes[0]
-
-# Instantiate the feature library
-def feat_inst():
-    class_name = get_feat_class() # Get the class name of the selected feature library
-    instance = "ps."+class_name+"()" # Instantiate the selected feature library
-    inst = eval(instance)
-    return inst # Return the instance
+    return params
 
 # Reset opt and diff advanced options to default values
 def reset():
     get_opt("<command>")
     get_diff("<command>")
 
-# Read selected file (from "Example/Own Data" dropdown) and return an array containing its data
-def read_file():
+# Return the path of the selected file (from "Example/Own Data" dropdown)
+def data_path():
     if(sel_var.get() == "Own Data"):
-        to_read = to_open      
+        return to_open
     else:
-        to_read = "./data/" + sel_var.get()
-
-    with open(to_read, newline='') as csvfile:
-        data = list(csv.reader(csvfile))  
-
-    return(data)
+        return "./data/" + sel_var.get()
 
 # Create output window - containing coefficient value table, ouput equations and model score
-def show_output(table_size, coefs, feats, variable_names, window_name, score):
+def show_output(table_size, coefs, sparse, feats, variable_names, window_name, score, profile=None, inclusion=None, report=None, sample_report=None):
     out_window = tk.Tk() # The new window
     out_window.title("Model Output: " + str(window_name))
     out_window.config(bg=bgc)
 
     # Create all output widgets
-    tv = create_table(out_window, table_size, variable_names) # Create the empty coefficient table
-    create_eq_box(out_window, coefs, feats, variable_names) # Create and populate the equation box
-    pop_table(tv, coefs, feats)    # Populate the coefficient table
-
-    score_label = tk.Label(out_window,text="Model Score: "+str(score),font=("Times",15),bg=bgc) # Create and display the ouput model score
-    score_label.grid(row=7,column=0,sticky="W")
+    table = create_table(out_window, table_size, variable_names) # Create the empty coefficient table
+    create_eq_box(out_window, sparse, feats, variable_names) # Create and populate the equation box
+    pop_table(table, coefs, sparse, feats, inclusion)    # Populate the coefficient table
+
+    # Create and display the ouput model score, and the time and memory the computation took
+    score_fram = tk.Frame(out_window,bg=bgc)
+    score_fram.grid(row=7,column=0,columnspan=3,sticky="W")
+    score_label = tk.Label(score_fram,text="Model Score: "+str(score),font=("Times",15),bg=bgc)
+    score_label.grid(row=0,column=0,sticky="W")
+    if profile is not None:
+        profile_label = tk.Label(score_fram,text="Time: "+profile.summary(),font=("Times",15),bg=bgc)
+        profile_label.grid(row=0,column=1,padx=10,sticky="W")
+        profile_button = tk.Button(score_fram,text="Save Profile",font=("Times",15),highlightbackground=bgc,command=lambda: save_profile(profile))
+        profile_button.grid(row=0,column=2,sticky="W")
+        out_window.after_idle(lambda: profile_label.configure(text="Time: "+profile.summary())) # Once the window is shown, so the time taken to create it is included
+    if report is not None: # The accuracy lost by a reduced precision fit
+        precision_label = tk.Label(score_fram,text="Precision: "+precision.summary(report),font=("Times",15),bg=bgc,wraplength=fig_w,justify="left")
+        precision_label.grid(row=1,column=0,columnspan=3,sticky="W")
+    if sample_report is not None: # The samples a subsampled fit was fitted and scored on
+        sample_label = tk.Label(score_fram,text="Samples: "+sampling.summary(sample_report),font=("Times",15),bg=bgc,wraplength=fig_w,justify="left")
+        sample_label.grid(row=2,column=0,columnspan=3,sticky="W")
 
     return out_window
 
 # Create output table
+# Only the rows in view exist in the table: scrolling changes which features they show, so the window opens quickly however large the feature library is
 def create_table(out_window, table_size, variable_names):
     # Create frame for output values title & treeview table
     fig1_fram = tk.Frame(out_window,bd=2,bg=bgc,width=5)
@@ -311,15 +383,29 @@ def create_table(out_window, table_size, variable_names):
     x_scroll = tk.Scrollbar(fig1_fram,orient=tk.HORIZONTAL)
     x_scroll.grid(row=2,column=0,columnspan=1,sticky="nsew")
 
-    tv = ttk.Treeview(fig1_fram, xscrollcommand = x_scroll.set, yscrollcommand = y_scroll.set) # The table to contain the output coefficients
-    tv = resize_table(table_size, tv, fig1_fram, x_scroll, y_scroll, variable_names) # Make table the correct size (in terms of number of columns) for the output model
+    tv = resize_table(table_size, fig1_fram, x_scroll, variable_names) # Make table the correct size (in terms of number of columns) for the output model
+
+    # The state of the table: which features are shown (rows) and which of them is at the top of the table (first)
+    table = {"tv": tv, "y_scroll": y_scroll, "coefs": None, "sparse": None, "feats": None, "rows": [], "first": 0, "height": int(tv.cget("height"))}
+
+    # Toggle between all of the features and only the ones with a nonzero coefficient
+    nonzero_var = tk.BooleanVar(out_window, value=False)
+    table["nonzero_var"] = nonzero_var
+    nonzero_check = tk.Checkbutton(fig1_fram,text="Nonzero terms only",variable=nonzero_var,font=("Times",15),bg=bgc,command=lambda: filter_table(table))
+    nonzero_check.grid(row=3,column=0,sticky="W")
+
+    # Add scrolling functionality to the scrollbar and the mouse wheel
+    y_scroll.config(command=lambda *args: scroll_table(table, *args))
+    tv.bind("<MouseWheel>", lambda event: scroll_table(table, "scroll", -1 if event.delta > 0 else 1, "units")) # Windows and MacOS
+    tv.bind("<Button-4>", lambda event: scroll_table(table, "scroll", -1, "units")) # Linux
+    tv.bind("<Button-5>", lambda event: scroll_table(table, "scroll", 1, "units"))
 
     fig1_fram.grid(row=0,column=0,rowspan=3,columnspan=3,padx=5,sticky="NW") # Add the empty table to the output window
 
-    return tv # Return the table object so that it can be populated with the output coefficients
+    return table # Return the table so that it can be populated with the output coefficients
 
 # Create scrollable box for output equations
-def create_eq_box(out_window, coefs, feats, variable_names):
+def create_eq_box(out_window, sparse, feats, variable_names):
     # Create frame for a scrollable box for the output equations
     fig3_fram = tk.Frame(out_window,bd=2,bg=bgc)
 
@@ -335,29 +421,8 @@ def create_eq_box(out_window, coefs, feats, variable_names):
     eq_text = tk.Text(fig3_fram,wrap="none",xscrollcommand=x_scroll.set,yscrollcommand=y_scroll.set,font=("Times",15),height=10,pady=10,bg=bgc)
     eq_text.grid(row=1,column=0)
 
-    eqn_num = len(coefs) # Number of equations to display in the text box
-
-    for num in range(eqn_num): # Form each of the equations to print to the text box
-        eqn = coefs[num] # Coefficient values for the output equation
-        eqn = [round(float(item),3) for item in eqn] # Round each coefficient value to 3.d.p.
-        out = "d" + str(variable_names[num]) + "/dt = " # String used to built the output equation
-        for val in range(len(feats)):
-            coef = eqn[val]
-            desc = feats[val]
-            if(coef != 0):
-                if(float(coef) < 0): # If the next coefficient value is negative, don't add a "+" before it (e.g. x + -5y -> x -5y )
-                    out = out.rstrip("+ ") # Remove the previous "+" sign
-                    out = out + " "
-
-                out = out + str(coef) + " " # Add the next coefficient and descriptor to equation
-                if(desc == "1"): # Don't add the descriptor if it is equal to 1 (e.g. 0.364 1 + 7x -> 0.364 + 7x )
-                    out = out + "+ "
-                else: # Add the descriptor if it is not equal to 1
-                    out = out + str(desc) + " + "
-
-        out = out.rstrip("+ ") # Remove the trailing "+" sign after generating the equation
-        out = out + "    \n \n" # Add a blank line after each equaiton for readability
-        eq_text.insert("end", out) # Insert the newly generated equation to the end of the output equation text box
+    for out in format_equations(sparse, feats, variable_names): # Form each of the equations to print to the text box, from the nonzero terms only
+        eq_text.insert("end", out + "    \n \n") # Insert the equation with a blank line after it for readability
 
     eq_text.config(state="disabled") # Disable the ability for the user to edit the output equations
     x_scroll.config(command=eq_text.xview) # Add scrolling functionality to the scrollbars (link the x&y scrolling functions to each scrollbar respectively)
@@ -365,16 +430,32 @@ def create_eq_box(out_window, coefs, feats, variable_names):
 
     fig3_fram.grid(row=3,column=0,rowspan=4,columnspan=3,padx=5,sticky="NW") # Display the output equation text box
 
+# Create the box listing the score of each trajectory of a multi-trajectory fit
+def create_traj_box(out_window, trajs):
+    traj_fram = tk.Frame(out_window,bd=2,bg=bgc)
+
+    traj_label = tk.Label(traj_fram,text="Trajectory Scores",font=("Times",18,"bold"),pady=10,bg=bgc)
+    traj_label.grid(row=0,column=0,sticky="NW")
+
+    y_scroll = tk.Scrollbar(traj_fram)
+    y_scroll.grid(row=1,column=1,sticky="nsew")
+
+    traj_text = tk.Text(traj_fram,wrap="none",yscrollcommand=y_scroll.set,font=("Times",15),height=5,pady=5,bg=bgc)
+    traj_text.grid(row=1,column=0)
+    for traj in trajs:
+        traj_text.insert("end", traj["name"] + ": " + str(traj["score"]) + "\n")
+
+    traj_text.config(state="disabled") # Disable the ability for the user to edit the scores
+    y_scroll.config(command=traj_text.yview)
+
+    traj_fram.grid(row=8,column=0,columnspan=3,padx=5,sticky="NW")
+
 # Resize the output table
-def resize_table(cols, tv, fig1_fram, x_scroll, y_scroll, variable_names):
-    tv = ttk.Treeview(fig1_fram, xscrollcommand = x_scroll.set, yscrollcommand = y_scroll.set) # Create the treeview table
+def resize_table(cols, fig1_fram, x_scroll, variable_names):
+    tv = ttk.Treeview(fig1_fram, xscrollcommand = x_scroll.set) # Create the treeview table, scrolled vertically by scroll_table()
 
     # Create the correct number of columns (not including the descrptor column) to populate in the table depending on the number of variables in the system (cols contains this number)
-    tv['columns'] = ('col1',) # The first system variable
-    if(cols > 1): # More system variables if the number is greater than 1
-        for x in range(2, cols+1):
-            name = 'col' + str(x)
-            tv['columns'] = tv['columns']+(name,)
+    tv['columns'] = tuple('col' + str(x+1) for x in range(cols))
 
     tv.heading("#0", text='Descriptor', anchor='w') # This is the heading for the descriptor column
 
@@ -392,30 +473,64 @@ def resize_table(cols, tv, fig1_fram, x_scroll, y_scroll, variable_names):
 
     tv.grid(row=1,column=0,columnspan=1) # Add the table to the frame
 
-    # Add scrolling functionality to the scrollbars (link the x&y scrolling functions to each scrollbar respectively)
-    y_scroll.config(command = tv.yview)
-    x_scroll.config(command = tv.xview)
+    x_scroll.config(command = tv.xview) # Add scrolling functionality to the horizontal scrollbar
 
     fig1_fram.grid() # Display the frame on the GUI
     return tv # Return the new table to pass to further functions
 
 # Populate the output table with coefficients
-def pop_table(tv, coefs, feats):
-    for item in range(len(coefs[0])): # "coefs" is a list of lists, each list containing the coefficient values for each output equation
-        new_val = [] # The values for each ROW of the output table
-        for col in range(len(coefs)):
-            new_val.append(str(coefs[col,item])) # Adding values to the ROW, one at a time
-        tv.insert('', 'end', text=str(feats[item]), values=new_val) # Add the row of values to the output table
-
-# Lorenz system for generation - This is taken from the PySINDy feature overview file
-def lorenz(z, t):
-    return [
-        10 * (z[1] - z[0]),
-        z[0] * (28 - z[2]) - z[1],
-        z[0] * z[1] - (8 / 3) * z[2]
-    ]
-
-# Pop up window for Lorenz generation
+def pop_table(table, coefs, sparse, feats, inclusion=None):
+    table["coefs"] = coefs # "coefs" has one row for each output equation, the table has one row for each feature
+    table["inclusion"] = inclusion # For an ensemble fit, the probability of each term being included, shown after its (median) coefficient
+    table["sparse"] = sparse # The nonzero terms of coefs
+    table["feats"] = feats
+    filter_table(table)
+
+# Choose the features to show in the table, all of them or only those with a nonzero coefficient, and show the first of them
+def filter_table(table):
+    if table["nonzero_var"].get():
+        table["rows"] = list(table["sparse"].active())
+    else:
+        table["rows"] = list(range(len(table["feats"])))
+    table["first"] = 0
+
+    # One table row for each row in view
+    tv = table["tv"]
+    tv.delete(*tv.get_children())
+    for num in range(min(table["height"], len(table["rows"]))):
+        tv.insert('', 'end', iid=str(num))
+    draw_table(table)
+
+# Fill in the table rows in view, formatting the coefficients only for the features shown
+def draw_table(table):
+    coefs = table["coefs"]
+    rows = table["rows"]
+    first = table["first"]
+    for num in range(min(table["height"], len(rows))):
+        item = rows[first + num]
+        new_val = [str(coefs[col,item]) for col in range(len(coefs))] # The values for this ROW of the output table
+        if table["inclusion"] is not None:
+            new_val = [val + "  (" + format(table["inclusion"][col,item], ".0%") + ")" for col, val in enumerate(new_val)]
+        table["tv"].item(str(num), text=str(table["feats"][item]), values=new_val)
+
+    # Set the size and position of the scrollbar slider
+    total = max(len(rows), 1)
+    table["y_scroll"].set(first/total, min(first+table["height"], total)/total)
+
+# Scroll the table - called by the scrollbar ("moveto", fraction) or ("scroll", number, "units"/"pages"), and the mouse wheel
+def scroll_table(table, action, amount, unit=None):
+    if action == "moveto":
+        first = int(round(float(amount) * len(table["rows"])))
+    elif unit == "pages":
+        first = table["first"] + int(amount) * table["height"]
+    else:
+        first = table["first"] + int(amount)
+    first = max(0, min(first, len(table["rows"]) - table["height"])) # Keep the table full of rows
+    if first != table["first"]:
+        table["first"] = first
+        draw_table(table)
+
+# Pop up window for Lorenz generation, returning the conditions to generate the system with
 def lorenz_gen():
     dt,t_min,t_max,conds = show_lorenz() # Shows the Lorenz system generation popup window, returning the input values. By default the values are the same as the data generated in the PySINDy feature overview file
     
@@ -423,12 +538,12 @@ def lorenz_gen():
     dt = float(dt) # The time step of the data readings
     t_min = float(t_min) # The start time of the data readings
     t_max = float(t_max) # The end time of the data readings
-    conds = list(conds.split(",")) # The initial conditions of the data - a.k.a the first data point
+    conds = [float(val) for val in conds.split(",")] # The initial conditions of the data - a.k.a the first data point
+    if(len(conds) != 3 or dt <= 0 or t_max <= t_min): # The Lorenz system has 3 variables, and the time series can't be empty
+        raise ValueError("Invalid Lorenz condition")
 
-    time_series = np.arange(t_min, t_max, dt) # Using the start and end times, and the time step, the time series can be created
-    contents = odeint(lorenz, conds, time_series) # Generate the data for the user defined Lorenz system
-    points_no = ceil((t_max-t_min)/dt) # Find the number of generated data points
-    return contents, dt, points_no, time_series
+    points_no = ceil((t_max-t_min)/dt) # Find the number of data points to generate
+    return dt, t_min, t_max, conds, points_no
 
 # Create Lorenz generation window
 def show_lorenz():
@@ -496,7 +611,7 @@ def update_number(event, dt_entry, time_entry1, time_entry2, points_label):
         print("Error!\n" + str(e))
 
 # Display the figure with the original data vs obtained model
-def show_plots(contents, sim_data, coefs, feats, time_series, variable_names, window_name):
+def show_plots(contents, sim_time, sim_data, sparse, feats, time_series, variable_names, window_name, result):
     # Create plot window
     plot_window = tk.Tk()
     plot_window.title("Model Plots: " + str(window_name))
@@ -512,54 +627,7 @@ def show_plots(contents, sim_data, coefs, feats, time_series, variable_names, wi
     canvas_frame.rowconfigure(1, weight=1)
     canvas_frame.columnconfigure(1, weight=1)
 
-    # Create a figure with the correct number of subplots
-    fig, axs = plt.subplots(contents.shape[1], 2, sharex=False, sharey=False, figsize=(11, 2*len(variable_names)))
-
-    # Plot the data on the subplots
-    for i in range(contents.shape[1]): # For every row of subplots
-        if(len(variable_names) == 1): # This is needed to enable the plotting of one dimensional systems
-            dim = (1)
-        else:
-            dim = (i, 1)
-
-        # Plot the input data and the forward simulated data obtained after creating the model
-        axs[dim].plot(time_series, contents[:, i], 'k', label='input data')
-        axs[dim].plot(time_series, sim_data[:, i], 'r--', label='model simulation')
-        if(i == 0):
-            axs[dim].legend()
-        axs[dim].set(xlabel='t', ylabel=variable_names[i].format(i))
-
-        # Loop through the coefficient matrix to extract the non zero values
-        coef_plt = [] # List of non zero coefficients (coefficient values)
-        desc_plt = [] # List of descriptors for the non zero variables
-        row = coefs[i]
-        for item in range(len(coefs[0])):
-            val = row[item]
-            des = feats[item]
-            if val != 0:
-                coef_plt.append(val)
-                desc_plt.append(des)
-
-        if(len(variable_names) == 1): # This is needed to enable the plotting of one dimensional systems
-            dim = (0)
-        else:
-            dim = (i, 0)
-
-        # Plot the non zero coefficient values as a bar plot
-        axs[dim].bar(desc_plt,coef_plt)
-        axs[dim].axhline(y=0, color='k')
-        axs[dim].set_title("d" + str(variable_names[i]) + "/dt",size=10)
-
-        # If the number of output coefficients is greater than 6, change the font size to 8
-        if len(coef_plt) > 6:
-            size = 8
-        else:
-            size = 10
-        plot_label = axs[dim].get_xticklabels() # Get all of the font label objects for the subplot
-        [each_label.set_fontsize(size) for each_label in plot_label] # Set the font size of the specific subplot
-
-    fig.subplots_adjust(hspace=0.3) # Add vertical space in between each row of subplots so they don't overlap
-    fig.tight_layout() # Remove excess whitespace from the top and bottom of the figure
+    fig = plots.model_figure(contents, sim_time, sim_data, sparse, feats, time_series, variable_names, result.get("inclusion")) # The data, simulation and coefficient bar plots
 
     # set up a canvas with scrollbars
     canvas = tk.Canvas(canvas_frame)
@@ -582,19 +650,32 @@ def show_plots(contents, sim_data, coefs, feats, time_series, variable_names, wi
     mplCanvas = figAgg.get_tk_widget()
 
     # Connect figure with scrolling region
-    cwid = canvas.create_window(0, 0, window=mplCanvas, anchor=tk.constants.NW)
+    canvas.create_window(0, 0, window=mplCanvas, anchor=tk.constants.NW)
     canvas.config(scrollregion=canvas.bbox(tk.constants.ALL),width=fig_w,height=fig_h)
 
     # Add in the toolbar to the output window
     toolbar_frame = tk.Frame(plot_window)
     toolbar = NavigationToolbar2Tk(figAgg, toolbar_frame)
-    toolbar.children['!button5'].config(command=lambda: save_output(fig, coefs, feats, variable_names))
+    toolbar.children['!button5'].config(command=lambda: save_output(fig, result))
     toolbar_frame.grid(row=0, column=1)
 
+    # For a multi-trajectory fit, choose the trajectory shown on the data and simulation plots
+    if result.get("trajectories"):
+        names = [traj["name"] for traj in result["trajectories"]]
+        traj_var = tk.StringVar(plot_window, value=names[0])
+        traj_menu = ttk.Combobox(plot_window, textvariable=traj_var, values=names, state="readonly")
+        traj_menu.grid(row=0, column=0, padx=5, sticky="W")
+
+        def select_trajectory(event):
+            plots.show_trajectory(fig, result["trajectories"][names.index(traj_var.get())], variable_names)
+            figAgg.draw_idle()
+        traj_menu.bind("<<ComboboxSelected>>", select_trajectory)
+        plots.show_trajectory(fig, result["trajectories"][0], variable_names) # Adds the trajectory name and score to the plots
+
     return plot_window
 
 # Save the output figure & coefficient matrix to file
-def save_output(fig, coefs, feats, variable_names):
+def save_output(fig, result):
     save_filepath = fd.asksaveasfilename() # The file browser popup that return the filepath the user would like to save to
 
     # Exit the saving code if the user cancels the save or doesn't give the file a name
@@ -603,84 +684,362 @@ def save_output(fig, coefs, feats, variable_names):
 
     fig.savefig(save_filepath) # Save the figure as a .png
 
-    total = np.append([feats], coefs, axis=0) # Adds the descriptors to the output coefficient matrix
-    total = np.transpose(total) # Obtain the transpose of the total matrix to output as expected
+    engine.write_coefficients(save_filepath + ".csv", result["sparse"], result["feats"], result["variable_names"]) # Save the coefficient matrix to a .csv file with the same filepath as above, the same file as the command line interface writes
+    artifact.save_model(save_filepath + ".npz", result) # Save the model, which can be opened again with the "Load Model" button without refitting
+
+# Save the stage times of a computation as json, and as a Chrome trace (_trace.json) that can be opened in chrome://tracing or https://ui.perfetto.dev
+def save_profile(profile):
+    save_filepath = fd.asksaveasfilename(defaultextension=".json", filetypes=[("Profile", "*.json")])
+    if(save_filepath == ""): # The user cancelled
+        return None
+    profile.write(save_filepath)
+    profile.write_trace(os.path.splitext(save_filepath)[0] + "_trace.json")
+
+# Read the simulation solver, tolerance and number of points, returning them as configuration options (or None and show an error if they are invalid)
+def sim_settings():
+    try:
+        sim_tol = float(tol_entry.get())
+        sim_points = int(points_entry.get()) if points_entry.get().strip() else None # Blank simulates at every time in the data
+        if sim_tol <= 0 or (sim_points is not None and sim_points < 2):
+            raise ValueError
+    except ValueError:
+        messagebox.showerror(title="Invalid Option", message="The simulation tolerance needs to be a positive number, and the number of points a whole number of at least 2 (or blank to simulate every point).\n\nExiting the computation.")
+        return None
+    return {"sim_method": sim_var.get(), "sim_rtol": sim_tol, "sim_atol": sim_tol, "sim_points": sim_points}
+
+# Read the ensemble options, returning them as configuration options (or None and show an error if they are invalid)
+def ensemble_settings():
+    try:
+        fits = int(ens_entry.get()) if ens_entry.get().strip() else 0 # Blank is a single fit
+        if fits < 0:
+            raise ValueError
+    except ValueError:
+        messagebox.showerror(title="Invalid Option", message="The number of ensemble fits needs to be a whole number (or blank for a single fit).\n\nExiting the computation.")
+        return None
+    return {"ensemble": fits, "ensemble_method": ens_var.get(), "precision": prec_var.get()}
+
+# Read the fit samples options, returning them as configuration options (or None and show an error if they are invalid)
+# The entry is the stride for "stride", the number of samples for "random" and the start and end times (e.g. "0 10") for "window"
+def sample_settings():
+    method = sample_var.get()
+    if method == "all":
+        return {"sample": None}
+    try:
+        values = [float(val) for val in sample_entry.get().replace(",", " ").split()]
+        if method == "window":
+            if len(values) != 2 or values[0] > values[1]:
+                raise ValueError
+            return {"sample": method, "sample_window": tuple(values)}
+        if len(values) != 1 or values[0] < 1 or values[0] != int(values[0]):
+            raise ValueError
+    except ValueError:
+        messagebox.showerror(title="Invalid Option", message="For fitting on a subset of the samples, enter the stride (every how many samples one is fitted), the number of random samples, or the start and end times of the window (e.g. 0 10).\n\nExiting the computation.")
+        return None
+    if method == "stride":
+        return {"sample": method, "sample_stride": int(values[0])}
+    return {"sample": method, "sample_size": int(values[0])}
+
+# Open a saved model (.npz) and show its output windows, simulated from the saved or new initial conditions - called when "Load Model" button pressed
+def load_model():
+    model_path = fd.askopenfilename(filetypes=[("SEED 2.0 model", "*.npz")]) # The file browser popup to select the model file
+    if(model_path == ""): # The user cancelled
+        return None
 
-    head = [("d "+variable_names[i]+"/dt") for i in range(len(variable_names))] # The derivative of each system variable
-    head.insert(0,'') # Add a blank value to the start so that the columns of the coefficent matrix line up with the correct derivative
+    sim_config = sim_settings()
+    if sim_config is None:
+        return None
 
-    pd.DataFrame(total).to_csv(save_filepath + ".csv", header=head, index=None) # Use pandas to save the matrix to a .csv file with the same filepath as above
+    # Blank uses the initial conditions of the data the model was fitted to
+    conds_text = simpledialog.askstring("Initial Conditions", "Initial conditions, separated by commas.\nLeave blank to use the first point of the data the model was fitted to.", parent=window)
+    if conds_text is None: # The user cancelled
+        return None
+    try:
+        conds = [float(val) for val in conds_text.split(",")] if conds_text.strip() else None
+    except ValueError:
+        messagebox.showerror(title="Invalid Condition", message="The initial conditions need to be numbers separated by commas.\n\nExiting the simulation.")
+        return None
 
-# Run the main computation
-def comp():
+    window_name = os.path.basename(model_path)
+    job_queue.submit(window_name, lambda progress, cancel: compute_loaded(model_path, sim_config, conds, progress, cancel))
+    update_status()
+
+# Load a saved model and simulate it - runs on the background thread, so it must not touch any widgets
+def compute_loaded(model_path, sim_config, conds, progress, cancel):
+    profile = Profile(os.path.basename(model_path)) # Wall time, CPU time and peak memory of each stage
+    progress = profile.track(progress)
+    engine.stage("read", progress, cancel)
+    result = artifact.load_model(model_path)
+    result["config"] = engine.make_config(result["config"], **sim_config) # Simulate with the options selected on the GUI
+    if result["time_series"] is not None and (conds is not None or result["x0"] is not None):
+        engine.simulate(result, conds, progress=progress, cancel=cancel)
+    profile.end()
+    result["profile"] = profile
+    return result
+
+# Read the parameter and values of a regularization path from a popup, returning (parameter, values), values None for the default
+# threshold path (or None if the user cancelled or the text is invalid)
+def path_settings():
+    path_text = simpledialog.askstring("Threshold Path", "Optimization variable to vary, then the first value, the last value and the number of values, e.g.\nthreshold 0.001 10 20\n\nLeave blank for a path of the threshold over the range of the model's coefficients.", parent=window)
+    if path_text is None: # The user cancelled
+        return None
+    if not path_text.strip():
+        return "threshold", None
+    try:
+        param, start, stop, num = path_text.replace(",", " ").split()
+        start, stop, num = float(start), float(stop), int(num)
+        if start <= 0 or stop <= 0 or num < 1:
+            raise ValueError
+    except ValueError:
+        messagebox.showerror(title="Invalid Path", message="The path needs to be given as the variable name, then the first and last values (positive numbers) and the number of values, e.g. threshold 0.001 10 20.\n\nExiting the computation.")
+        return None
+    return param, list(np.geomspace(start, stop, num))
+
+# Fit the model for a sequence of sparsity thresholds and show the Pareto plot of the models - called when "Threshold Path" button pressed
+def path_comp():
+    comp(path=True)
+
+# Run the main computation. With path=True the model is fitted for a sequence of values of an optimization variable instead (see path_settings())
+def comp(path=False):
     window_name = sel_var.get() # Obtain the name of the data file to use as the output window name
 
     # Stop the computation if "Own Data" is selected and no file has been selected
-    if((to_open.split('/')[-1] == "" or to_open.split('/')[-1] == " ") and sel_var.get() == "Own Data"):
+    if(not own_files and sel_var.get() == "Own Data"):
         messagebox.showerror(title="Select File", message="You need to select a file to compute!")
         return None
 
     # Try to instantiate the optimizer with the advanced variables. Stop the computation if an invalid variable is input (will throw an error when instantiating)
     try:
-        opt = od_inst(opt_widgets,"opt")
+        opt_params = widget_params(opt_widgets)
+        engine.make_component("opt", str(opt_var.get()), opt_params)
     except Exception:
         messagebox.showerror(title="Invalid Option", message="You have input an invalid optimization variable, check the PySINDy documentation for valid options.\n\nExiting the computation.")
         return None
 
     # Try to instantiate the differentiator with the advanced variables. Stop the computation if an invalid variable is input (will throw an error when instantiating)
     try:
-        diff = od_inst(diff_widgets,"diff")
+        diff_params = widget_params(diff_widgets)
+        engine.make_component("diff", str(diff_var.get()), diff_params)
     except Exception:
         messagebox.showerror(title="Invalid Option", message="You have input an invalid differentation variable, check the PySINDy documentation for valid options.\n\nExiting the computation.")
         return None
 
-    # Instatiate the feature library
-    feat = feat_inst()
+    # Read the simulation options. Stop the computation if they are invalid
+    sim_config = sim_settings()
+    if sim_config is None:
+        return None
+    ens_config = ensemble_settings()
+    if ens_config is None:
+        return None
+    sample_config = sample_settings()
+    if sample_config is None:
+        return None
+
+    # The selections on the GUI, in the same form as the configuration used by the command line interface
+    config = engine.make_config(sim_config, **ens_config, **sample_config, opt=str(opt_var.get()), opt_params=opt_params, diff=str(diff_var.get()), diff_params=diff_params, feat=str(feat_var.get()))
 
     # If "Generate Lorenz System" is selected, show the Lorenz popup window and generate with the input conditions. Stop the computation if an invalid condition is input
     if(window_name == "Generate Lorenz System"):
         try:
-            contents, dt, points_no, time_series = lorenz_gen()
+            dt, t_min, t_max, conds, points_no = lorenz_gen()
             window_name = window_name + ", Number of points: " + str(points_no)
         except Exception:
             messagebox.showerror(title="Invalid Condition", message="You have input an invalid condition. \n\nExiting the data generation.")
             return None
 
-        variable_names = ["x","y","z"] # Default system variable names if "Generate Lorenz System" is selected
+        load = lambda: engine.generate_lorenz(dt, t_min, t_max, conds)[:2] + (["x","y","z"],) # Default system variable names if "Generate Lorenz System" is selected
+    elif(window_name == "Own Data" and len(own_files) > 1): # Several files (or a folder) fitted together as separate trajectories
+        if path:
+            messagebox.showerror(title="Select File", message="A threshold path can only be computed for one data file.\n\nExiting the computation.")
+            return None
+        if not all(file.endswith(".csv") for file in own_files):
+            messagebox.showerror(title="Invalid File Type", message="The selected files need to be .csv files in the correct format. Read to tutorial for more information.\n\nExiting the computation.")
+            return None
+        files = list(own_files)
+        window_name = to_open.split('/')[-1] + ", " + str(len(files)) + " trajectories"
+        job_queue.submit(window_name, lambda progress, cancel: compute_trajectories(files, config, window_name, progress, cancel))
+        update_status()
+        return None
     elif(window_name.endswith(".csv") or ((window_name == "Own Data") and to_open.endswith(".csv"))):
-        data = read_file() # Obtain the data in the selected .csv file. This is a list of lists
-        contents = data
-    
-        # Separate the input file into data points, time series and variable names
-        variable_names = contents[0][1:] # Obtain the system variable names from the data
-        del contents[0] # Remove the system variable names from the data matrix
-        time_series = [val[0] for val in contents] # From the first column of the data file, obtain the time series data for the data
-        dt = float(time_series[1])-float(time_series[0]) # From the time series data, obtain dt
-
-        contents = [val[1:] for val in contents] # Remove the time series data from the data matrix
-        contents = np.array([[float(val) for val in item] for item in contents]) # Turn the list of lists into a numpy array as this is what the PySINDy model expects as an input
+        to_read = data_path()
+        load = lambda: engine.read_file(to_read) # Obtain the time series, data points and variable names in the selected .csv file
     else: # If the selected file isn't a .csv file, stop the computation
         messagebox.showerror(title="Invalid File Type", message="The selected file needs to be a .csv file in the correct format. Read to tutorial for more information.\n\nExiting the computation.")
         return None
 
-    model = ps.SINDy(optimizer=opt,differentiation_method=diff,feature_library=feat,feature_names=variable_names) # Instantiate the model with the previously obtained instances and variable names
-    model.fit(contents, t=dt) # Fit the input data to the model
-    coefs = model.coefficients() # Obtain the coefficient matrix from the obtained model
-    feats = model.get_feature_names() # Get the feature names from the obtained model
-
-    time_series = np.array([float(val) for val in time_series]) # Create a numpy array with the time series data stored as floats
-    
-    score = model.score(contents, t=time_series) # Obtain the model score for the system
-
-    conds = np.array([float(val) for val in contents[0]]) # Convert the system's initial conditions into a numpy array of float values as this is what is expected by the model.simulate() function
-    sim_data = model.simulate(conds,time_series) # Create the forward simulated data. This uses the original initial conditions evolved with the model output equations to obtain new data
-    plot_window = show_plots(contents, sim_data, coefs, feats, time_series, variable_names, window_name) # Show the output plots
+    if path:
+        settings = path_settings()
+        if settings is None:
+            return None
+        param, values = settings
+        window_name = window_name + ", " + param + " path"
+        job_queue.submit(window_name, lambda progress, cancel: compute_path(load, config, param, values, progress, cancel))
+        update_status()
+        return None
 
-    table_size = len(contents[0]) # Obtain the number of system variables, used to define the number of columns in the output table
-    out_window = show_output(table_size, coefs, feats, variable_names, window_name, score) # Show the output coefficient and equation window
+    # Queue the computation to run in the background. The output windows are shown by poll_jobs() when it finishes
+    job_queue.submit(window_name, lambda progress, cancel: compute(load, config, window_name, progress, cancel))
+    update_status()
+
+# Load the data and run the pipeline - runs on the background thread, so it must not touch any widgets
+def compute(load, config, window_name, progress, cancel):
+    profile = Profile(window_name) # Wall time, CPU time and peak memory of each stage, shown next to the model score
+    progress = profile.track(progress)
+    engine.stage("read", progress, cancel)
+    time_series, contents, variable_names = load()
+    result = engine.run(contents, time_series, variable_names, config, progress, cancel) # Fit, score and simulate the model
+    profile.end()
+    result["profile"] = profile
+    return result
+
+# Fit one model to several data files - runs on the background thread, so it must not touch any widgets
+# The trajectories are read and differentiated on separate processes, started with "spawn" so they don't copy the GUI
+def compute_trajectories(files, config, window_name, progress, cancel):
+    profile = Profile(window_name)
+    result = trajectories.run_files(files, config, profile.track(progress), cancel, mp_context=multiprocessing.get_context("spawn"))
+    profile.end()
+    result["profile"] = profile
+    return result
+
+# Load the data and fit the regularization path - runs on the background thread, so it must not touch any widgets
+def compute_path(load, config, param, values, progress, cancel):
+    engine.stage("read", progress, cancel)
+    time_series, contents, variable_names = load()
+    return pareto.run_path(contents, time_series, variable_names, config, param, values, progress, cancel)
+
+# Build and simulate the result of one model of a regularization path - runs on the background thread, so it must not touch any widgets
+def compute_selected(path_result, index, window_name, progress, cancel):
+    profile = Profile(window_name)
+    progress = profile.track(progress)
+    result = pareto.select(path_result, index, progress, cancel)
+    profile.end()
+    result["profile"] = profile
+    return result
+
+# Show the Pareto plot of a regularization path. Clicking a model opens its output windows, the same as a computation with its value
+def show_path(window_name, path_result):
+    path_window = tk.Tk()
+    path_window.title("Threshold Path: " + str(window_name))
+
+    fig = plots.path_figure(path_result)
+    figAgg = FigureCanvasTkAgg(fig, path_window)
+    figAgg.get_tk_widget().grid(row=1, column=0, sticky=tk.constants.NSEW)
+    toolbar_frame = tk.Frame(path_window)
+    NavigationToolbar2Tk(figAgg, toolbar_frame)
+    toolbar_frame.grid(row=0, column=0)
+    figAgg.draw()
+
+    def pick_model(event):
+        index = int(event.ind[0]) # The nearest of the points under the mouse
+        point = path_result["path"][index]
+        name = window_name.rsplit(", ", 1)[0] + ", " + path_result["param"] + " = " + format(point["value"], ".4g")
+        job_queue.submit(name, lambda progress, cancel: compute_selected(path_result, index, name, progress, cancel))
+        update_status()
+    figAgg.mpl_connect("pick_event", pick_model)
+    return path_window
+
+# Show the output windows for a finished computation
+def show_result(window_name, result):
+    if "path" in result: # A regularization path, the user picks the model to show from its plot
+        show_path(window_name, result)
+        return None
+    if result.get("stored"): # Loaded from the result store instead of refitting
+        window_name = window_name + " (stored result)"
+    coefs = result["coefs"] # The coefficient matrix from the obtained model
+    feats = result["feats"] # The feature names from the obtained model
+    variable_names = result["variable_names"]
+
+    profile = result["profile"] # The output windows are timed as stages of the computation too
+
+    with profile.stage("show_plots"):
+        show_plots(result["contents"], result["sim_time"], result["sim_data"], result["sparse"], feats, result["time_series"], variable_names, window_name, result) # Show the output plots
+
+    table_size = len(variable_names) # Obtain the number of system variables, used to define the number of columns in the output table
+    with profile.stage("show_output"):
+        out_window = show_output(table_size, coefs, result["sparse"], feats, variable_names, window_name, result["score"], profile, result.get("inclusion"), result.get("precision"), result.get("sampling")) # Show the output coefficient and equation window
+        if result.get("trajectories"): # The score of each trajectory of a multi-trajectory fit
+            create_traj_box(out_window, result["trajectories"])
+
+# Check the background computations, showing the output of finished ones and updating the progress display. Runs every 100 ms
+def poll_jobs():
+    while True:
+        try:
+            event, job = job_queue.events.get_nowait()
+        except queue.Empty:
+            break
+
+        if event == "done":
+            show_result(job.name, job.result)
+        elif event == "failed":
+            print(job.traceback)
+            messagebox.showerror(title="Computation Failed", message="The computation for " + job.name + " failed:\n\n" + job.error)
+
+    update_status()
+    window.after(100, poll_jobs)
+
+# Update the progress bar, status text and cancel button for the running computation
+def update_status():
+    running = job_queue.running()
+    waiting = len(job_queue.queued())
+    queued_text = (" (" + str(waiting) + " queued)") if waiting else ""
+
+    if running:
+        job = running[0]
+        done = stage_names.index(job.stage) if job.stage in stage_names else 0 # Number of stages finished
+        progress_bar["value"] = done
+        status_label.configure(text=job.name + ": " + stage_text.get(job.stage, "Starting") + "..." + queued_text)
+        cancel_button.configure(state="normal")
+    else:
+        progress_bar["value"] = 0
+        if waiting_action is not None:
+            status_label.configure(text="Loading modules...")
+        else:
+            status_label.configure(text=("Waiting" + queued_text) if waiting else " ")
+        cancel_button.configure(state="disabled")
+
+# Cancel the running computation - called when "Cancel" button pressed
+def cancel_comp():
+    for job in job_queue.running():
+        job_queue.cancel(job.id)
+    update_status()
+
+# Check every 20 ms whether the heavy modules have finished importing in the background, then fill the options, report the start up times
+# and run the action of a button pressed while they were importing
+def check_imports():
+    global waiting_action
+    if loader.is_alive():
+        window.after(20, check_imports)
+        return
+    startup.mark("modules imported")
+    if load_error is None:
+        fill_options()
+    report_startup()
+    if waiting_action is not None: # A button pressed while the modules were importing
+        action, waiting_action = waiting_action, None
+        update_status()
+        wait_for_imports()
+        action()
+
+# Fill the option dropdowns and the advanced option panels from the option registry, once it has been loaded in the background
+def fill_options():
+    for menu, var, kind, command in ((opt_menu, opt_var, "opt", get_opt), (diff_menu, diff_var, "diff", get_diff), (feat_menu, feat_var, "feat", None)):
+        entries = menu["menu"]
+        entries.delete(0, "end")
+        for option in registry.options(kind):
+            entries.add_command(label=option, command=tk._setit(var, option, command))
+    get_opt("<command>")
+    get_diff("<command>")
 
-    out_window.mainloop()
-    plot_window.mainloop()
+# Print (and optionally save) the start up times if the SEED_STARTUP_TIMING environment variable is set
+# SEED_STARTUP_TIMING=1 prints the times, any other value is used as the path of a .json file to save them to as well
+# SEED_STARTUP_EXIT=1 closes SEED 2.0 straight after, so that the start up time can be measured from a script
+def report_startup():
+    setting = os.environ.get("SEED_STARTUP_TIMING", "")
+    if setting:
+        print(startup.summary())
+        if setting != "1":
+            startup.write(setting)
+    if os.environ.get("SEED_STARTUP_EXIT", "") == "1":
+        window.destroy()
 
 # GUI design
 
@@ -691,209 +1050,242 @@ if platform == "darwin": # MacOS
     print("MacOS detected")
     min_w = 520 # Minimum main window width
     max_w = 1200 # Maximum main window width
-    min_h = 590 # Minimum main window height
-    max_h = 680 # Maximum main window height
+    min_h = 845 # Minimum main window height
+    max_h = 935 # Maximum main window height
     drop_w = 30 # Width of the dropdown widgets on the main window
     fram_w = 62 # Width of the frames on the main window (for the button frame)
     line_w = 61 # Width of the blank lines on the button frame
     col_width = 160 # Width of the columns in the output table
     fig_w = 1115 # Width of the output figure
     fig_h = 645 # height of the output figure
-    adv_size = "1050x610" # Size of the window when the advanced options are shown
+    adv_size = "1050x865" # Size of the window when the advanced options are shown
 else:
     print(platform + " detected")
     min_w = 690
     max_w = 1500
-    min_h = 650
-    max_h =800
+    min_h = 905
+    max_h =1055
     drop_w = 30
     fram_w = 55
     line_w = 60
     col_width = 200
     fig_w = 1115
     fig_h = 645
-    adv_size = "1380x700"
+    adv_size = "1380x955"
+
+# Only build and run the GUI when SEED 2.0 is run directly, so that the functions above can be imported without a display
+if __name__ == "__main__":
+    # Start importing the heavy modules while the window is built
+    loader = threading.Thread(target=load_modules, daemon=True)
+    loader.start()
+
+    # Create the main GUI window
+    window = tk.Tk()
+    window.title("Extracting Equations from Data")
+    window.minsize(min_w,min_h)
+    window.maxsize(max_w,max_h)
+    window.config(bg=bgc)
+
+    # Add Durham University logo to GUI, from the copy in the images folder
+    try:
+        pic_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images", "DurhamUniversityMasterLogo_RGB.png")
+        pil_img = Image.open(pic_path)
+        newsize = (167, 69) # The size of the logo on the GUI
+        pil_img = pil_img.resize(newsize)
+
+        tk_img = ImageTk.PhotoImage(pil_img)
+        label = tk.Label(window, image=tk_img, bg=bgc) # Add the image to a label widget to display on the GUI
+        label.grid(row=0,column=0,padx=5, pady=5,rowspan=2)
+    except Exception: # If anything goes wrong, don't display the logo, e.g. the images folder is missing
+        print("Durham University Logo Not Printing")
 
-# Create the main GUI window
-window = tk.Tk()
-window.title("Extracting Equations from Data")
-window.minsize(min_w,min_h)
-window.maxsize(max_w,max_h)
-window.config(bg=bgc)
+    # Add main title to the GUI
+    main_label1 = tk.Label(window,text="Extracting Equations",font=("Times",30,"bold","underline"),padx=5,pady=10,bg=bgc)
+    main_label1.grid(row=0,column=1,columnspan=3,sticky="S")
+
+    main_label2 = tk.Label(window,text="from Data",font=("Times",30,"bold","underline"),padx=5,pady=10,bg=bgc)
+    main_label2.grid(row=1,column=1,columnspan=3,sticky="N")
+
+    # Creating the label and dropdown for data selection
+    select_label = tk.Label(window,text="Example/Own Data:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    select_label.grid(row=2,column=0,sticky="E")
+
+    sel_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
+    sel_options = data_options() # The data files, then "Generate Lorenz System" and "Own Data"
+    sel_var.set("data_Lorenz3d.csv") # Set the deafualt selected value for the data dropdown
+
+        # Create, configure and display the data selection dropdown on the GUI
+    select_menu = tk.OptionMenu(window,sel_var,*sel_options,command=toggle_browser)
+    select_menu.config(width=drop_w,font=("Times",15),bg=bgc)
+    select_menu.grid(row=2,column=1,columnspan=3,sticky="nsew")
+
+    # All file browser widgets
+    browse_fram = tk.Frame(window,bg=bgc)
+    browse_fram.grid(row=3,column=0,sticky="E")
+    file_button = tk.Button(browse_fram,text="Select File",font=("Times",15),width=9,highlightbackground=bgc,command=browse) # Select one file, or several to fit them together
+    file_button.grid(row=0,column=0)
+    folder_button = tk.Button(browse_fram,text="Select Folder",font=("Times",15),width=9,highlightbackground=bgc,command=browse_folder) # Fit every file in a folder together
+    folder_button.grid(row=0,column=1)
+
+    file_label = tk.Label(window,text=" ",font=("Times",15),pady=10,bg=bgc)
+    file_label.grid(row=3,column=1,columnspan=3,sticky="W")
+
+    toggle_browser("<command>") # Called to initially hide the browser widgets as "data_Lorenz3d.csv" is selected by default
+
+    # All optimization option widgets
+    opt_label = tk.Label(window,text="Optimization Option:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    opt_label.grid(row=5,column=0,sticky="E")
+
+    opt_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
+    opt_var.set("stlsq") # Set the default value for the optimization option
+
+        # Create, configure and display the optimization option dropdown on the GUI, with the other options added by fill_options() once the registry has loaded
+    opt_menu = tk.OptionMenu(window,opt_var,opt_var.get(),command=get_opt)
+    opt_menu.config(width=drop_w,font=("Times",15),bg=bgc)
+    opt_menu.grid(row=5,column=1,columnspan=3,sticky="nsew")
+
+    # All differentiation option widgets
+    diff_label = tk.Label(window,text="Differentiation Option:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    diff_label.grid(row=4,column=0,sticky="E")
+
+    diff_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
+    diff_var.set("finite_difference") # Set the default value for the differentiation option
+
+        # Create, configure and display the differentiation option dropdown on the GUI
+    diff_menu = tk.OptionMenu(window,diff_var,diff_var.get(),command=get_diff)
+    diff_menu.config(width=drop_w,font=("Times",15),bg=bgc)
+    diff_menu.grid(row=4,column=1,columnspan=3,sticky="nsew")
+
+    # All feature library widgets
+    feat_label = tk.Label(window,text="Feature Library Option:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    feat_label.grid(row=6,column=0,sticky="E")
+
+    feat_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
+    feat_var.set("polynomial_library") # Set the default value for the differentiation option
+
+        # Create, configure and display the feature library option dropdown on the GUI
+    feat_menu = tk.OptionMenu(window,feat_var,feat_var.get())
+    feat_menu.config(width=drop_w,font=("Times",15),bg=bgc)
+    feat_menu.grid(row=6,column=1,columnspan=3,sticky="nsew")
+
+    # All simulation option widgets
+    sim_label = tk.Label(window,text="Simulation Solver:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    sim_label.grid(row=7,column=0,sticky="E")
+
+    sim_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
+    sim_var.set("LSODA") # Set the default value for the simulation solver, the same as the PySINDy default
 
-# Add Durham University logo to GUI
-if (not os.environ.get('PYTHONHTTPSVERIFY', '') and getattr(ssl, '_create_unverified_context', None)): # This is needed to validate the server identity for the pictuer URL
-    ssl._create_default_https_context = ssl._create_unverified_context
+        # Create, configure and display the simulation solver dropdown on the GUI
+    sim_menu = tk.OptionMenu(window,sim_var,*sim_solvers)
+    sim_menu.config(width=drop_w,font=("Times",15),bg=bgc)
+    sim_menu.grid(row=7,column=1,columnspan=3,sticky="nsew")
+
+        # Solver tolerance (used as both the relative and absolute tolerance) and number of simulated points, blank for every point in the data
+    tol_label = tk.Label(window,text="Tolerance, Points:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    tol_label.grid(row=8,column=0,sticky="E")
+
+    tol_entry = tk.Entry(window,font=("Times",15),highlightbackground=bgc,width=12)
+    tol_entry.insert(0, "1e-12")
+    tol_entry.grid(row=8,column=1,sticky="W")
+
+    points_entry = tk.Entry(window,font=("Times",15),highlightbackground=bgc,width=12)
+    points_entry.grid(row=8,column=2,columnspan=2,sticky="W")
+
+    # Ensemble fitting: the number of fits on resamples of the data (blank for a single fit) and how the resamples are drawn
+    ens_label = tk.Label(window,text="Ensemble Fits:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    ens_label.grid(row=9,column=0,sticky="E")
+
+    ens_entry = tk.Entry(window,font=("Times",15),highlightbackground=bgc,width=12)
+    ens_entry.grid(row=9,column=1,sticky="W")
+
+    ens_var = tk.StringVar(window)
+    ens_var.set("bootstrap")
+    ens_menu = tk.OptionMenu(window,ens_var,"bootstrap","subsample")
+    ens_menu.config(font=("Times",15),bg=bgc)
+    ens_menu.grid(row=9,column=2,columnspan=2,sticky="EW")
+
+    # Precision the data is differentiated, the library evaluated and the model fitted in. float32 halves the memory of the library matrix
+    prec_label = tk.Label(window,text="Precision:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    prec_label.grid(row=10,column=0,sticky="E")
+
+    prec_var = tk.StringVar(window)
+    prec_var.set("float64")
+    prec_menu = tk.OptionMenu(window,prec_var,"float64","float32")
+    prec_menu.config(width=drop_w,font=("Times",15),bg=bgc)
+    prec_menu.grid(row=10,column=1,columnspan=3,sticky="nsew")
+
+    # Fit samples: differentiate every sample but fit only every n-th one, a number chosen at random or those in a time window, for long recordings
+    sample_label = tk.Label(window,text="Fit Samples:",font=("Times",15,"bold"),pady=10,bg=bgc)
+    sample_label.grid(row=11,column=0,sticky="E")
+
+    sample_var = tk.StringVar(window)
+    sample_var.set("all")
+    sample_menu = tk.OptionMenu(window,sample_var,"all","stride","random","window")
+    sample_menu.config(font=("Times",15),bg=bgc)
+    sample_menu.grid(row=11,column=1,sticky="EW")
 
-try:
-    pic_url = "https://github.com/M-Vause/SEED2.0/blob/master/images/DurhamUniversityMasterLogo_RGB.png?raw=true" # URL for the Durham University logo
-    my_page = urlopen(pic_url)
-    my_picture = io.BytesIO(my_page.read())
-    pil_img = Image.open(my_picture)
-    newsize = (167, 69) # The size of the logo on the GUI
-    pil_img = pil_img.resize(newsize)
-
-    tk_img = ImageTk.PhotoImage(pil_img)
-    label = tk.Label(window, image=tk_img, bg=bgc) # Add the image to a label widget to display on the GUI
-    label.grid(row=0,column=0,padx=5, pady=5,rowspan=2)
-except Exception: # If anything goes wrong, don't display the logo, probably internet connection error
-    print("Durham University Logo Not Printing")
-
-# Add main title to the GUI
-main_label1 = tk.Label(window,text="Extracting Equations",font=("Times",30,"bold","underline"),padx=5,pady=10,bg=bgc)
-main_label1.grid(row=0,column=1,columnspan=3,sticky="S")
-
-main_label2 = tk.Label(window,text="from Data",font=("Times",30,"bold","underline"),padx=5,pady=10,bg=bgc)
-main_label2.grid(row=1,column=1,columnspan=3,sticky="N")
-
-# Creating the label and dropdown for data selection
-select_label = tk.Label(window,text="Example/Own Data:",font=("Times",15,"bold"),pady=10,bg=bgc)
-select_label.grid(row=2,column=0,sticky="E")
-
-sel_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
-sel_options = non_hidden("./data")
-if "__pycache__" in sel_options: # Remove "__pycache__" from the options to display in the dropdown
-    sel_options.remove("__pycache__")
-sel_options.sort()
-sel_options.append("Generate Lorenz System") # Add this option to the dropdown options
-sel_options.append("Own Data") # Add this option to the dropdown options
-sel_var.set("data_Lorenz3d.csv") # Set the deafualt selected value for the data dropdown
-
-    # Create, configure and display the data selection dropdown on the GUI
-select_menu = tk.OptionMenu(window,sel_var,*sel_options,command=toggle_browser)
-select_menu.config(width=drop_w,font=("Times",15),bg=bgc)
-select_menu.grid(row=2,column=1,columnspan=3,sticky="nsew")
-
-# All file browser widgets
-file_button = tk.Button(window,text="Select File",font=("Times",15),width=15,highlightbackground=bgc,command=browse)
-file_button.grid(row=3,column=0,sticky="E")
-
-file_label = tk.Label(window,text=" ",font=("Times",15),pady=10,bg=bgc)
-file_label.grid(row=3,column=1,columnspan=3,sticky="W")
-
-toggle_browser("<command>") # Called to initially hide the browser widgets as "data_Lorenz3d.csv" is selected by default
-
-# All optimization option widgets
-opt_label = tk.Label(window,text="Optimization Option:",font=("Times",15,"bold"),pady=10,bg=bgc)
-opt_label.grid(row=5,column=0,sticky="E")
-
-opt_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
-temp_options = non_hidden(pysindypath+"/optimizers") # Get a list of the optimizer file names from the PySINDy source files
-    # Remove the files that aren't optimizer options
-if "__pycache__" in temp_options:
-    temp_options.remove("__pycache__")
-if "__init__.py" in temp_options:
-    temp_options.remove("__init__.py")
-if "base.py" in temp_options:
-    temp_options.remove("base.py")
-if "sindy_optimizer.py" in temp_options:
-    temp_options.remove("sindy_optimizer.py")
-#temp_options.append("Lasso") # This would be where more options are added if required, e.g. the Lasso method
-ext = ".py"
-opt_options = [eg.split(ext, 1)[0] for eg in temp_options] # Remove the extension from all of the remaining options
-opt_options.sort()
-opt_var.set("stlsq") # Set the default value for the optimization option
-temp_options.clear()
-
-    # Create, configure and display the optimization option dropdown on the GUI
-opt_menu = tk.OptionMenu(window,opt_var,*opt_options,command=get_opt)
-opt_menu.config(width=drop_w,font=("Times",15),bg=bgc)
-opt_menu.grid(row=5,column=1,columnspan=3,sticky="nsew")
-
-# All differentiation option widgets
-diff_label = tk.Label(window,text="Differentiation Option:",font=("Times",15,"bold"),pady=10,bg=bgc)
-diff_label.grid(row=4,column=0,sticky="E")
-
-diff_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
-temp_options = non_hidden(pysindypath+"/differentiation") # Get a list of the differentiator file names from the PySINDy source files
-    # Remove the files that aren't differentiator options
-if "__pycache__" in temp_options:
-    temp_options.remove("__pycache__")
-if "__init__.py" in temp_options:
-    temp_options.remove("__init__.py")
-if "base.py" in temp_options:
-    temp_options.remove("base.py")
-if "sindy_derivative.py" in temp_options: # This came in a PySINDy update at the end of the project, support for this options needs to be added
-    temp_options.remove("sindy_derivative.py")
-ext = ".py"
-diff_options = [eg.split(ext, 1)[0] for eg in temp_options] # Remove the extension from all of the remaining options
-diff_options.sort()
-#diff_options.append("pre-computed") # This would be where more options are added if required, e.g. pre-computed derivatives
-diff_var.set("finite_difference") # Set the default value for the differentiation option
-temp_options.clear()
-
-    # Create, configure and display the differentiation option dropdown on the GUI
-diff_menu = tk.OptionMenu(window,diff_var,*diff_options,command=get_diff)
-diff_menu.config(width=drop_w,font=("Times",15),bg=bgc)
-diff_menu.grid(row=4,column=1,columnspan=3,sticky="nsew")
-
-# All feature library widgets
-feat_label = tk.Label(window,text="Feature Library Option:",font=("Times",15,"bold"),pady=10,bg=bgc)
-feat_label.grid(row=6,column=0,sticky="E")
-
-feat_var = tk.StringVar(window) # Variable storing the selected value in the dropdown
-temp_options = non_hidden(pysindypath+"/feature_library") # Get a list of the feature library file names from the PySINDy source files
-    # Remove the files that aren't feature library options
-if "__pycache__" in temp_options:
-    temp_options.remove("__pycache__")
-if "__init__.py" in temp_options:
-    temp_options.remove("__init__.py")
-if "custom_library.py" in temp_options:
-    temp_options.remove("custom_library.py")
-if "feature_library.py" in temp_options:
-    temp_options.remove("feature_library.py")
-ext = ".py"
-feat_options = [eg.split(ext, 1)[0] for eg in temp_options] # Remove the extension from all of the remaining options
-feat_options.sort()
-feat_var.set("polynomial_library") # Set the default value for the differentiation option
-temp_options.clear()
-
-    # Create, configure and display the feature library option dropdown on the GUI
-feat_menu = tk.OptionMenu(window,feat_var,*feat_options)
-feat_menu.config(width=drop_w,font=("Times",15),bg=bgc)
-feat_menu.grid(row=6,column=1,columnspan=3,sticky="nsew")
-
-# Add frame for all buttons on the GUI
-button_fram = tk.Frame(window,bg=bgc,bd=2,relief="sunken",pady=10,width=fram_w)
-
-    # Tutorial button
-tut_button = tk.Button(button_fram,text="Tutorial",font=("Times",15,"bold"),width=15,highlightbackground=bgc,command=lambda : webbrowser.open("https://github.com/M-Vause/SEED2.0"))
-tut_button.grid(row=0,column=0,columnspan=2,sticky="EW")
-
-    # Show advanced options button
-adv_button = tk.Button(button_fram,text="Show Advanced",font=("Times",15,"bold"),width=15,highlightbackground=bgc,command=advanced)
-adv_button.grid(row=0,column=2,columnspan=2,sticky="EW")
-
-    # Blank line in the frame
-blank_line1 = tk.Label(button_fram,text=" ",font=("Times",15),width=round(line_w/2),highlightbackground=bgc,bg=bgc)
-blank_line1.grid(row=1,column=0,columnspan=2)
-
-    # Reset advanced options button
-reset_button = tk.Button(button_fram,text="Reset to Defaults",font=("Times",15,"bold"),width=15,highlightbackground=bgc,command=reset)
-reset_button.grid(row=1,column=2,columnspan=2,sticky="EW")
-
-    # Blank line in the frame
-blank_line2 = tk.Label(button_fram,text=" ",font=("Times",15),width=line_w,highlightbackground=bgc,bg=bgc)
-blank_line2.grid(row=2,column=0,columnspan=4)
-
-    # Compute button
-comp_button = tk.Button(button_fram,text="Compute",font=("Times",15,"bold"),width=10,highlightbackground=bgc,command=comp)
-comp_button.grid(row=3,column=0,columnspan=4,sticky="EW")
-
-button_fram.grid(row=7,column=0,columnspan=4,padx=5,sticky="SEW") # Display the frame on the GUI - ,rowspan=4
-
-# Frame for optimization option variable selection (advanced options)
-opt_fram = tk.Frame(window,bd=2,bg=bgc,width=5)
-get_opt("<command>")
-
-# Frame for differentitation option variable selection (advanced options)
-diff_fram = tk.Frame(window,bd=2,bg=bgc,width=5)
-get_diff("<command>")
-
-# Resize the main GUI window
-size = str(min_w) + "x" + str(min_h)
-window.geometry(size)
-
-# Enter mainloop
-window.protocol("WM_DELETE_WINDOW", on_closing)
-window.mainloop()
+    sample_entry = tk.Entry(window,font=("Times",15),highlightbackground=bgc,width=12)
+    sample_entry.grid(row=11,column=2,columnspan=2,sticky="W")
+
+    # Add frame for all buttons on the GUI
+    button_fram = tk.Frame(window,bg=bgc,bd=2,relief="sunken",pady=10,width=fram_w)
+
+        # Tutorial button
+    tut_button = tk.Button(button_fram,text="Tutorial",font=("Times",15,"bold"),width=15,highlightbackground=bgc,command=lambda : webbrowser.open("https://github.com/M-Vause/SEED2.0"))
+    tut_button.grid(row=0,column=0,columnspan=2,sticky="EW")
+
+        # Show advanced options button
+    adv_button = tk.Button(button_fram,text="Show Advanced",font=("Times",15,"bold"),width=15,highlightbackground=bgc,command=advanced)
+    adv_button.grid(row=0,column=2,columnspan=2,sticky="EW")
+
+        # Cancel running computation button
+    cancel_button = tk.Button(button_fram,text="Cancel",font=("Times",15,"bold"),width=15,highlightbackground=bgc,command=cancel_comp,state="disabled")
+    cancel_button.grid(row=1,column=0,columnspan=2,sticky="EW")
+
+        # Reset advanced options button
+    reset_button = tk.Button(button_fram,text="Reset to Defaults",font=("Times",15,"bold"),width=15,highlightbackground=bgc,command=reset)
+    reset_button.grid(row=1,column=2,columnspan=2,sticky="EW")
+
+        # Status of the running computation
+    status_label = tk.Label(button_fram,text=" ",font=("Times",15),width=line_w,highlightbackground=bgc,bg=bgc)
+    status_label.grid(row=2,column=0,columnspan=4)
+
+        # Progress through the stages of the running computation
+    progress_bar = ttk.Progressbar(button_fram,orient="horizontal",mode="determinate",maximum=len(stage_names))
+    progress_bar.grid(row=3,column=0,columnspan=4,sticky="EW")
+
+        # Compute button - pressing it while a computation is running queues another one
+    comp_button = tk.Button(button_fram,text="Compute",font=("Times",15,"bold"),width=10,highlightbackground=bgc,command=lambda: when_imported(comp))
+    comp_button.grid(row=4,column=0,sticky="EW")
+
+        # Threshold path button - fits the model for a sequence of thresholds to choose from
+    path_button = tk.Button(button_fram,text="Threshold Path",font=("Times",15,"bold"),width=10,highlightbackground=bgc,command=lambda: when_imported(path_comp))
+    path_button.grid(row=4,column=1,sticky="EW")
+
+        # Load model button - opens a saved model without refitting
+    load_button = tk.Button(button_fram,text="Load Model",font=("Times",15,"bold"),width=10,highlightbackground=bgc,command=lambda: when_imported(load_model))
+    load_button.grid(row=4,column=2,columnspan=2,sticky="EW")
+
+    button_fram.grid(row=12,column=0,columnspan=4,padx=5,sticky="SEW") # Display the frame on the GUI - ,rowspan=4
+
+    # Frame for optimization option variable selection (advanced options), filled once the registry has loaded
+    opt_fram = tk.Frame(window,bd=2,bg=bgc,width=5)
+
+    # Frame for differentitation option variable selection (advanced options)
+    diff_fram = tk.Frame(window,bd=2,bg=bgc,width=5)
+
+    # Resize the main GUI window
+    size = str(min_w) + "x" + str(min_h)
+    window.geometry(size)
+    window.update_idletasks()
+    startup.mark("window shown")
+    window.after(20, check_imports)
+
+    # Start the background computation thread and check it for progress
+    job_queue = JobQueue()
+    window.after(100, poll_jobs)
+    window.after(2000, refresh_data)
+
+    # Enter mainloop
+    window.protocol("WM_DELETE_WINDOW", on_closing)
+    window.mainloop()
@@ -0,0 +1,17 @@
+# SEED 2.0 engine package
+# GUI-free access to the SEED 2.0 pipeline, used by both the GUI (SEED2_0.py) and the command line (python -m seed)
+# The engine is only imported when one of its names is first used, so that light modules (e.g. seed.jobs) can be imported quickly
+
+_engine_names = ["DEFAULT_CONFIG", "make_config", "load_config", "read_file", "run", "run_file", "write_results"]
+
+def __getattr__(name):
+    if name in _engine_names:
+        from . import engine
+        return getattr(engine, name)
+    if name == "Model":
+        from .model import Model
+        return Model
+    raise AttributeError("module 'seed' has no attribute " + repr(name))
+
+def __dir__():
+    return sorted(list(globals()) + _engine_names + ["Model"])
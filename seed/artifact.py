@@ -0,0 +1,127 @@
+# SEED 2.0 model files
+# A fitted model saved as an uncompressed .npz file: the coefficient matrix, feature and variable names, run configuration, data fingerprint,
+# model score and the initial conditions and time range of the data. Loading one gives back a result that can be shown or simulated straight away,
+# without the data or refitting. The coefficient matrix is memory-mapped from the file, so large models load in constant time
+
+import json
+import struct
+import zipfile
+
+import numpy as np
+
+from . import engine
+from .model import Model
+
+FORMAT = 1 # Increase when the contents of the file change
+
+# Save the model of a result (from engine.run, engine.run_file or streaming.stream_fit) to path (.npz)
+# With simulation=True the simulated data is saved as well, e.g. for the result store
+def save_model(path, result, simulation=False):
+    if result["time_series"] is not None:
+        t_range = (result["time_series"][0], result["time_series"][-1])
+    else:
+        t_range = result.get("t_range", (np.nan, np.nan))
+    x0 = result.get("x0")
+
+    arrays = {
+        "format": np.array(FORMAT),
+        "coefs": np.ascontiguousarray(result["coefs"], dtype=float),
+        "feats": np.array(result["feats"], dtype=str),
+        "variable_names": np.array(result["variable_names"], dtype=str),
+        "config": np.array(json.dumps(engine.config_json(result["config"]), default=repr)),
+        "fingerprint": np.array(result.get("fingerprint") or ""),
+        "score": np.array(float(result["score"])),
+        "n_samples": np.array(int(result["n_samples"] if result["time_series"] is None else len(result["time_series"]))), # Of the saved time range (the first trajectory of a multi-trajectory fit)
+        "x0": np.full(len(result["variable_names"]), np.nan) if x0 is None else np.asarray(x0, dtype=float),
+        "t_range": np.array(t_range, dtype=float),
+    }
+    if result.get("inclusion") is not None: # Inclusion probabilities of an ensemble fit
+        arrays["inclusion"] = np.asarray(result["inclusion"], dtype=float)
+    if result.get("precision"): # The accuracy report of a reduced precision fit
+        arrays["precision"] = np.array(json.dumps(result["precision"]))
+    if result.get("sampling"): # The samples fitted and held out by a subsampled fit
+        arrays["sampling"] = np.array(json.dumps(result["sampling"]))
+    if simulation and result["sim_data"] is not None:
+        arrays["sim_time"] = np.asarray(result["sim_time"], dtype=float)
+        arrays["sim_data"] = np.asarray(result["sim_data"], dtype=float)
+    with open(path, "wb") as fil: # Written to an open file so numpy doesn't add a second .npz extension
+        np.savez(fil, **arrays) # Not compressed, so that the arrays can be memory-mapped
+
+# Memory-map one array stored (not compressed) in a .npz file, or return None if it can't be
+def memmap_member(path, name):
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with open(path, "rb") as fil:
+        fil.seek(info.header_offset)
+        local_header = fil.read(30) # The zip local file header, followed by the file name and extra field
+        name_len, extra_len = struct.unpack("<HH", local_header[26:30])
+        fil.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(fil)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fil)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fil)
+        offset = fil.tell()
+
+    if dtype.hasobject or 0 in shape:
+        return None
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran_order else "C")
+
+# Load a model saved by save_model(), returning a result in the same form as engine.run() without the data (or simulation, unless it was saved)
+# The feature library is rebuilt from the saved configuration, so the model can be simulated and evaluated on new data
+def load_model(path, mmap=True):
+    with np.load(path, allow_pickle=False) as saved:
+        if int(saved["format"]) > FORMAT:
+            raise ValueError(str(path) + " was saved by a newer version of SEED 2.0")
+        coefs = memmap_member(path, "coefs") if mmap else None
+        if coefs is None:
+            coefs = saved["coefs"]
+        feats = [str(name) for name in saved["feats"]]
+        variable_names = [str(name) for name in saved["variable_names"]]
+        config = engine.config_from_json(json.loads(str(saved["config"])))
+        fingerprint = str(saved["fingerprint"]) or None
+        score = float(saved["score"])
+        n_samples = int(saved["n_samples"])
+        x0 = saved["x0"]
+        inclusion = saved["inclusion"] if "inclusion" in saved.files else None
+        report = json.loads(str(saved["precision"])) if "precision" in saved.files else None
+        sample_report = json.loads(str(saved["sampling"])) if "sampling" in saved.files else None
+        t_range = saved["t_range"]
+        sim = {}
+        for name in ("sim_time", "sim_data"): # Only in files saved with simulation=True
+            sim[name] = memmap_member(path, name) if (mmap and name in saved.files) else None
+            if sim[name] is None and name in saved.files:
+                sim[name] = saved[name]
+
+    # The library only needs the number of variables to be fitted, the features are checked against the saved names
+    library = engine.make_component("feat", config["feat"], config["feat_params"])
+    library.fit(np.zeros((2, len(variable_names))))
+    if list(library.get_feature_names(variable_names)) != feats:
+        raise ValueError("The " + config["feat"] + " library in the installed PySINDy doesn't give the features saved in " + str(path))
+
+    model = Model(coefs, feats, variable_names, library, inclusion, report, sample_report)
+    has_time = bool(np.all(np.isfinite(t_range))) and n_samples > 1
+    return {
+        "model": model,
+        "coefs": model.coefs,
+        "sparse": model.sparse,
+        "inclusion": model.inclusion,
+        "precision": model.precision,
+        "sampling": model.sampling,
+        "feats": model.feats,
+        "variable_names": variable_names,
+        "score": score,
+        "n_samples": n_samples,
+        "time_series": np.linspace(t_range[0], t_range[1], n_samples) if has_time else None, # Evenly spaced times over the range of the data
+        "contents": None,
+        "sim_time": sim["sim_time"],
+        "sim_data": sim["sim_data"],
+        "config": config,
+        "fingerprint": fingerprint,
+        "x0": None if np.any(np.isnan(x0)) else np.array(x0),
+        "data": None,
+        "model_file": path,
+    }
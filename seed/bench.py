@@ -0,0 +1,170 @@
+# SEED 2.0 benchmarks
+# Times every stage of the pipeline (ingest, differentiation, library evaluation, fit, score, simulation and building the output table and plots)
+# on Lorenz data of increasing size, generated the same way as "Generate Lorenz System", and on the example data sets, for a matrix of
+# optimizer, differentiation and feature library options. Every benchmark run is appended to a history file (one json record per line)
+# so that the stage times can be compared between releases and regressions found
+
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg # Draws the plots off screen
+
+from . import engine, ingest, plots, registry, sweep
+from .model import Model
+
+# The timed stages, in order
+bench_stages = ["ingest", "ingest_cached", "differentiate", "library", "fit", "score", "simulate", "table", "plot"]
+
+default_sizes = [1000, 10000, 100000] # Number of generated Lorenz samples
+data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data") # The example data sets next to SEED2_0.py
+default_datasets = [os.path.join(data_dir, "data_Lorenz3d.csv"), os.path.join(data_dir, "random_5d.csv")]
+table_height = 30 # Rows formatted when building the output table, about the number in view on the output window
+
+# Write Lorenz data with n_samples samples to a .csv file, from the defaults of the "Generate Lorenz System" window
+def lorenz_csv(path, n_samples, dt=0.002, conds=(-8, 8, 27)):
+    time_series, contents, points_no = engine.generate_lorenz(dt, 0, n_samples*dt, conds)
+    np.savetxt(path, np.column_stack((time_series, contents)), delimiter=",", header=",x,y,z", comments="")
+    return path
+
+# Seconds taken by func(), the lowest of repeat runs (the least disturbed by other processes), and the value it returned
+def timed(func, repeat=1):
+    best = None
+    for num in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, value
+
+# The work of filling in the output table: the features with a nonzero coefficient, the coefficients of the rows in view and the equations
+def build_table(model):
+    rows = list(model.sparse.active())
+    cells = [[str(model.coefs[col, item]) for col in range(len(model.coefs))] for item in rows[:table_height]]
+    return cells, model.equations()
+
+# Draw the model plots figure off screen
+def build_plot(contents, sim_time, sim_data, model, time_series, variable_names):
+    fig = plots.model_figure(contents, sim_time, sim_data, model.sparse, model.feats, time_series, variable_names)
+    FigureCanvasAgg(fig).draw()
+    return fig
+
+# Time every stage for one configuration on one data file, returning {stage: seconds} and the fitted model's score and size
+def bench_config(path, config, repeat=1, cache_folder=None):
+    times = {}
+    times["ingest"], (time_series, contents, variable_names) = timed(lambda: ingest.load_csv(path, cache=False), repeat)
+    ingest.load_csv(path, folder=cache_folder) # Write the sidecar, then time reading it
+    times["ingest_cached"] = timed(lambda: ingest.load_csv(path, folder=cache_folder), repeat)[0]
+
+    # The stages are run directly, not through engine.run, so the memo cache and result store are never used
+    opt, diff, feat = engine.build(config)
+    times["differentiate"], x_dot = timed(lambda: engine.differentiate(contents, time_series, diff), repeat)
+    times["library"], (feat, theta) = timed(lambda: engine.evaluate_library(contents, feat), repeat)
+    times["fit"], coefs = timed(lambda: engine.regress(theta, x_dot, opt), repeat)
+    model = Model(coefs, feat.get_feature_names(list(variable_names)), variable_names, feat)
+    times["score"], score = timed(lambda: engine.score(coefs, theta, x_dot), repeat)
+
+    result = {"model": model, "config": config, "variable_names": list(variable_names), "time_series": time_series,
+              "x0": np.array(contents[0], dtype=float), "sim_time": None, "sim_data": None}
+    if config["simulate"]:
+        times["simulate"], result = timed(lambda: engine.simulate(result), repeat)
+
+    times["table"] = timed(lambda: build_table(model), repeat)[0]
+    times["plot"] = timed(lambda: build_plot(contents, result["sim_time"], result["sim_data"], model, time_series, variable_names), repeat)[0]
+    return times, {"score": float(score), "n_terms": model.sparse.nnz(), "n_samples": len(time_series), "n_variables": len(variable_names)}
+
+# The source revision of SEED 2.0 being benchmarked (git commit, if it's a git checkout)
+def revision():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+# The machine and package versions a benchmark ran on, saved with every record as times are only comparable on the same machine
+def environment():
+    import scipy
+    import sklearn
+    return {"machine": platform.node(), "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count(),
+            "python": platform.python_version(), "numpy": np.__version__, "scipy": scipy.__version__, "sklearn": sklearn.__version__,
+            "pysindy": registry.pysindy_version()}
+
+# Run the benchmarks: Lorenz data of each size in sizes and the .csv data files in datasets, for every configuration of the grid
+# (the same form as a sweep grid, e.g. {"opt": ["stlsq", "sr3"], "diff": ["finite_difference", "smoothed_finite_difference"]})
+# Returns the list of records, one per data set and configuration. progress (optional) is called with each record as it's finished
+def run(sizes=None, datasets=None, grid=None, repeat=1, simulate=True, label=None, progress=None):
+    sizes = default_sizes if sizes is None else sizes
+    datasets = default_datasets if datasets is None else datasets
+    configs = [engine.make_config(config, simulate=simulate, memo=False, store=False) for config in sweep.expand_grid(grid or {})]
+    base = {"run": time.strftime("%Y%m%dT%H%M%S"), "label": label, "revision": revision(), "environment": environment(), "repeat": repeat}
+
+    records = []
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [("lorenz_" + str(size), lorenz_csv(os.path.join(tmp, "lorenz_" + str(size) + ".csv"), size)) for size in sizes]
+        files += [(os.path.splitext(os.path.basename(path))[0], path) for path in datasets]
+        for name, path in files:
+            for config in configs:
+                record = dict(base, dataset=name, config=engine.config_json(config), stages={}, total=None, error="")
+                try:
+                    times, info = bench_config(path, config, repeat, cache_folder=os.path.join(tmp, "ingest"))
+                except Exception as err: # An invalid combination is recorded rather than stopping the benchmarks
+                    record["error"] = type(err).__name__ + ": " + str(err)
+                else:
+                    record.update(info, stages=times, total=sum(times.values()))
+                records.append(record)
+                if progress is not None:
+                    progress(record)
+    return records
+
+# Append records to a history file (json lines)
+def append_history(records, path):
+    with open(path, "a") as fil:
+        for record in records:
+            fil.write(json.dumps(record, default=repr) + "\n")
+
+# Read every record in a history file
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as fil:
+        return [json.loads(line) for line in fil if line.strip()]
+
+# Records of one benchmark run, chosen by its "run" time stamp or label. None picks the latest run
+def select_run(history, run=None):
+    if run is None:
+        run = history[-1]["run"] if history else None
+    return [record for record in history if run in (record["run"], record["label"])]
+
+# The stages that got slower from the baseline records to the current ones: a stage counts as slower when it takes more than ratio times as long
+# and at least min_seconds longer (very short stages vary too much). Records are matched by data set and configuration
+def compare(baseline, current, ratio=1.25, min_seconds=0.005):
+    def record_key(record):
+        return record["dataset"], json.dumps(record["config"], sort_keys=True, default=repr)
+    before = {record_key(record): record for record in baseline}
+
+    slower = []
+    for record in current:
+        old = before.get(record_key(record))
+        if old is None:
+            continue
+        for name in bench_stages:
+            new_time, old_time = record["stages"].get(name), old["stages"].get(name)
+            if new_time is None or old_time is None:
+                continue
+            if new_time > ratio * old_time and new_time - old_time >= min_seconds:
+                slower.append({"dataset": record["dataset"], "config": record["config"], "stage": name, "before": old_time, "after": new_time})
+    return slower
+
+# One line of text for a record
+def record_summary(record):
+    config = record["config"]
+    name = record["dataset"] + " [" + config["opt"] + ", " + config["diff"] + ", " + config["feat"] + "]"
+    if record["error"]:
+        return name + ": failed - " + record["error"]
+    stages = ", ".join(stage_name + " " + format(record["stages"][stage_name], ".4f") for stage_name in bench_stages if stage_name in record["stages"])
+    return name + ": " + str(record["n_samples"]) + " samples, total " + format(record["total"], ".3f") + " s (" + stages + ")"
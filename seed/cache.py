@@ -0,0 +1,95 @@
+# SEED 2.0 in-memory memoization
+# Keeps the derivatives and feature library matrices of recent runs, keyed by a hash of the data and the options that produced them,
+# so that changing only the optimizer doesn't repeat the differentiation and library evaluation
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Hash the contents of an array (shape, type and values). Large arrays are hashed a block of rows at a time, so no full copy is made
+def array_digest(arr, block_rows=65536):
+    arr = np.asarray(arr)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update((str(arr.shape) + str(arr.dtype)).encode("utf-8"))
+    for start in range(0, max(len(arr), 1), block_rows):
+        digest.update(np.ascontiguousarray(arr[start:start+block_rows]).tobytes())
+    return digest.hexdigest()
+
+# Hash several arrays together, e.g. the time series and the data
+def data_key(*arrays):
+    return "-".join(array_digest(arr) for arr in arrays)
+
+# Key for the output of one option ("diff" or "feat") with its parameters on the data with the given key
+def option_key(data_fp, kind, option, params):
+    return (data_fp, kind, option, repr(sorted((params or {}).items())))
+
+# The total size in bytes of the arrays in a cached value
+def value_size(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(value_size(item) for item in value)
+    return 0
+
+# Least recently used cache with a limit on the total size of the arrays it holds
+class MemoCache:
+    def __init__(self, budget):
+        self.budget = budget # Maximum total size in bytes, 0 turns the cache off
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict() # key -> (value, size), least recently used first
+        self._lock = threading.Lock() # Runs on the GUI's background thread and the service's worker threads share the cache
+
+    # Return the cached value for key, or None
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    # Store a value, removing the least recently used values until the cache is back within its budget
+    # Arrays in the value are made read-only, since the same arrays are handed to every later run
+    def put(self, key, value):
+        size = value_size(value)
+        if size > self.budget:
+            return
+        for item in (value if isinstance(value, (tuple, list)) else (value,)):
+            if isinstance(item, np.ndarray):
+                item.flags.writeable = False
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.size += size
+            self._evict()
+
+    # Change the memory budget, evicting values if needed
+    def set_budget(self, budget):
+        with self._lock:
+            self.budget = budget
+            self._evict()
+
+    # Remove everything
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def _evict(self):
+        while self.size > self.budget and self._items:
+            self.size -= self._items.popitem(last=False)[1][1]
+
+# Default budget in megabytes, can be changed with the SEED_MEMO_MB environment variable
+def default_budget():
+    return int(float(os.environ.get("SEED_MEMO_MB", "1024")) * 1024 * 1024)
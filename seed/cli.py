@@ -0,0 +1,509 @@
+# SEED 2.0 command line interface
+# Run the same pipeline as the GUI without a display, e.g.
+#   python -m seed fit data/data_Lorenz3d.csv --opt stlsq --opt-param threshold=0.05 --out results
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from . import artifact, bench, cache, engine, ensemble, online, pareto, precision, registry, sampling, service, simulation, store, streaming, sweep, systems, timing, trajectories, watch
+
+# Parse "name=value" parameter arguments into a dictionary
+def parse_params(items):
+    params = {}
+    for item in items or []:
+        if "=" not in item:
+            raise argparse.ArgumentTypeError("Parameters must be given as name=value, not: " + item)
+        name, value = item.split("=", 1)
+        params[name.strip()] = engine.parse_param(value)
+    return params
+
+# Build the run configuration from the config file (if any) and the command line options, which take priority
+def config_from_args(args):
+    config = engine.load_config(args.config) if args.config else engine.make_config()
+    return engine.make_config(
+        config,
+        opt=args.opt,
+        opt_params=parse_params(args.opt_param),
+        diff=args.diff,
+        diff_params=parse_params(args.diff_param),
+        feat=args.feat,
+        feat_params=parse_params(args.feat_param),
+        ensemble=args.ensemble,
+        ensemble_method=args.ensemble_method,
+        ensemble_fraction=args.ensemble_fraction,
+        precision=args.precision,
+        sample=args.sample,
+        sample_stride=args.stride,
+        sample_size=args.sample_size,
+        sample_window=args.window,
+        holdout_size=args.holdout_size,
+        simulate=False if args.no_simulate else None,
+        sim_method=args.solver,
+        sim_rtol=args.rtol,
+        sim_atol=args.atol,
+        sim_points=args.sim_points,
+        ingest_cache=False if args.no_cache else None,
+        store=False if args.no_store else None,
+    )
+
+# The run configuration of a sub-command that fits a chunk at a time (what), from the options added by add_streamed_model_args()
+# Raises a ValueError if the config file sets options it doesn't apply (see streaming.streamed_config)
+def streamed_config_from_args(args, what):
+    config = engine.load_config(args.config) if args.config else None
+    config = engine.make_config(config, opt=args.opt, opt_params=parse_params(args.opt_param), diff=args.diff, diff_params=parse_params(args.diff_param),
+                                feat=args.feat, feat_params=parse_params(args.feat_param))
+    return streaming.streamed_config(config, what)
+
+# Add the options selecting the optimizer, differentiator and feature library to a sub-command, the only ones a fit a chunk at a time applies
+def add_streamed_model_args(parser):
+    parser.add_argument("--config", help="json file with the run configuration (opt, opt_params, diff, diff_params, feat, feat_params)")
+    add_component_args(parser)
+
+def add_component_args(parser):
+    parser.add_argument("--opt", help="optimization option, e.g. stlsq")
+    parser.add_argument("--opt-param", action="append", metavar="NAME=VALUE", help="optimization option variable (repeatable)")
+    parser.add_argument("--diff", help="differentiation option, e.g. finite_difference")
+    parser.add_argument("--diff-param", action="append", metavar="NAME=VALUE", help="differentiation option variable (repeatable)")
+    parser.add_argument("--feat", help="feature library option, e.g. polynomial_library")
+    parser.add_argument("--feat-param", action="append", metavar="NAME=VALUE", help="feature library option variable (repeatable)")
+
+# Add the options selecting the optimizer, differentiator and feature library, and the rest of the run configuration, to a sub-command
+def add_model_args(parser):
+    parser.add_argument("--config", help="json file with the run configuration (opt, opt_params, diff, diff_params, feat, feat_params, ensemble, ensemble_method, ensemble_fraction, precision, sample, sample_stride, sample_size, sample_window, holdout_size, simulate, sim_method, sim_rtol, sim_atol, sim_points)")
+    add_component_args(parser)
+    parser.add_argument("--ensemble", type=int, metavar="N", help="fit N models on resamples of the data in parallel and use their median coefficients, also writing how often each term was included (_inclusion.csv)")
+    parser.add_argument("--ensemble-method", choices=ensemble.methods, help="resample rows with replacement (bootstrap, the default) or take a fraction of them (subsample)")
+    parser.add_argument("--ensemble-fraction", type=float, help="fraction of the rows in each subsample fit (default: 0.5)")
+    parser.add_argument("--precision", choices=list(precision.precisions), help="floating point type the data is differentiated, the library evaluated and the model fitted in (default: float64). float32 halves the memory of the library matrix, the accuracy lost against float64 is reported")
+    parser.add_argument("--sample", choices=sampling.methods, help="differentiate every sample but fit only some of them: every --stride-th sample, --sample-size random samples or those in the time --window. The score is on the held-out samples")
+    parser.add_argument("--stride", type=int, help="with --sample stride, fit every N-th sample (default: 10)")
+    parser.add_argument("--sample-size", type=int, help="with --sample random, number of samples fitted (default: 10000)")
+    parser.add_argument("--window", type=float, nargs=2, metavar=("START", "END"), help="with --sample window, the start and end times of the samples fitted")
+    parser.add_argument("--holdout-size", type=int, help="largest number of held-out samples the model is scored on (default: 100000)")
+    parser.add_argument("--no-simulate", action="store_true", help="skip the forward simulation of the model")
+    parser.add_argument("--solver", choices=simulation.solvers, help="solver used for the forward simulation (default: LSODA)")
+    parser.add_argument("--rtol", type=float, help="relative tolerance of the simulation solver (default: 1e-12)")
+    parser.add_argument("--atol", type=float, help="absolute tolerance of the simulation solver (default: 1e-12)")
+    parser.add_argument("--sim-points", type=int, help="number of simulated points written, evenly spaced over the data (default: every time in the data)")
+    parser.add_argument("--no-cache", action="store_true", help="always parse the .csv files instead of using the binary sidecar cache")
+    parser.add_argument("--no-store", action="store_true", help="always fit the model instead of loading an identical earlier run from the result store")
+
+# "fit" sub-command: fit every data file given and write the results to the output folder
+def cmd_fit(args):
+    config = config_from_args(args)
+    if args.trajectories:
+        return fit_trajectories(args, config)
+    failed = 0
+    for path in args.data:
+        name = os.path.splitext(os.path.basename(path))[0]
+        profile = timing.Profile(name) if args.profile else None
+        try:
+            result = engine.run_file(path, config, progress=profile and profile.track())
+        except Exception as err: # Carry on with the rest of the batch, but report the failure
+            print(path + ": failed - " + str(err), file=sys.stderr)
+            failed += 1
+            continue
+        if profile:
+            profile.end()
+            result["profile"] = profile
+        base = engine.write_results(result, args.out, name)
+        print(path + ": score " + str(result["score"]) + (", " + profile.summary() if profile else "") + " -> " + base + "_*")
+        if result.get("precision"):
+            print("  " + precision.summary(result["precision"]))
+        if result.get("sampling"):
+            print("  " + sampling.summary(result["sampling"]))
+    return 1 if failed else 0
+
+# "fit --trajectories": fit one model to all the data files (and folders of them) given, as separate trajectories of the same system
+def fit_trajectories(args, config):
+    name = args.name or os.path.splitext(os.path.basename(os.path.normpath(args.data[0])))[0]
+    profile = timing.Profile(name) if args.profile else None
+    result = trajectories.run_files(args.data, config, progress=profile and profile.track(), max_workers=args.workers)
+    if profile:
+        profile.end()
+        result["profile"] = profile
+    base = engine.write_results(result, args.out, name)
+    for traj in result["trajectories"]:
+        print(traj["data"] + ": score " + str(traj["score"]))
+    print(str(len(result["trajectories"])) + " trajectories: score " + str(result["score"]) + (", " + profile.summary() if profile else "") + " -> " + base + "_*")
+    if result.get("precision"):
+        print("  " + precision.summary(result["precision"]))
+    return 0
+
+# "stream" sub-command: fit each data file chunk by chunk, for files larger than the available memory
+def cmd_stream(args):
+    try:
+        config = streamed_config_from_args(args, "stream")
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        return 1
+    for path in args.data:
+        name = os.path.splitext(os.path.basename(path))[0]
+        result = streaming.stream_fit(path, config, chunk_rows=args.chunk_rows, halo=args.halo)
+        base = engine.write_results(result, args.out, name)
+        print(path + ": score " + str(result["score"]) + " (" + str(result["n_samples"]) + " samples) -> " + base + "_*")
+    return 0
+
+# "online" sub-command: fit a data file a batch of rows at a time with an online model, printing the model's progress. With --follow,
+# rows appended to the file while it's being written are fitted as they arrive
+def cmd_online(args):
+    try:
+        config = streamed_config_from_args(args, "online")
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        return 1
+    def report(update):
+        if update["n_new"] and (update["batch"] % args.every == 0 or update["resparsified"]):
+            print("batch " + str(update["batch"]) + ": " + str(update["n_new"]) + " new samples"
+                  + ("" if update["batch_score"] is None else ", score on them " + format(update["batch_score"], ".6f"))
+                  + ", score " + format(update["score"], ".6f") + ", " + str(update["n_terms"]) + " terms" + (" (terms chosen again)" if update["resparsified"] else ""), flush=True)
+    model = online.OnlineModel(online.read_variable_names(args.data), config, args.resparsify, args.forget, args.halo)
+    try:
+        online.update_file(model, args.data, args.batch_rows, args.follow, args.interval, args.timeout, report)
+    except KeyboardInterrupt: # Stop following the file, and write the model fitted so far
+        print("Stopped", flush=True)
+    result = online.finish_file(model, args.data, report)
+    name = os.path.splitext(os.path.basename(args.data))[0]
+    base = engine.write_results(result, args.out, name)
+    print(args.data + ": score " + str(result["score"]) + " (" + str(result["n_samples"]) + " samples) -> " + base + "_*")
+    return 0
+
+# "sweep" sub-command: fit every combination of a grid of options on a process pool and write the ranked table
+def cmd_sweep(args):
+    with open(args.grid) as fil:
+        grid = json.load(fil)
+    rows = sweep.sweep_file(args.data, grid, max_workers=args.workers)
+    sweep.write_table(rows, args.out)
+
+    for row in rows[:args.top]: # Show the best configurations
+        if row["error"]:
+            print(str(row["rank"]) + ". failed: " + row["error"])
+        else:
+            print(str(row["rank"]) + ". score " + format(row["score"], ".6f") + ", " + str(row["n_terms"]) + " terms, " + format(row["fit_time"], ".3f") + " s - "
+                  + row["opt"] + " " + json.dumps(row["opt_params"], default=repr) + ", " + row["diff"] + " " + json.dumps(row["diff_params"], default=repr)
+                  + ", " + row["feat"] + " " + json.dumps(row["feat_params"], default=repr))
+    print(str(len(rows)) + " configurations -> " + args.out)
+    return 0
+
+# "path" sub-command: fit the model for a sequence of values of one optimizer parameter, write the table of the path and print the
+# Pareto optimal models. With --pick, the results of one of the models are written as by "fit"
+def cmd_path(args):
+    config = config_from_args(args)
+    values = None
+    if args.values:
+        values = args.values
+    elif args.range:
+        values = list(np.geomspace(args.range[0], args.range[1], int(args.range[2])))
+    result = pareto.run_path_file(args.data, config, param=args.param, values=values)
+    pareto.write_table(result, args.out)
+
+    for num, point in pareto.front(result):
+        print(str(num) + ". " + args.param + " " + format(point["value"], ".4g") + ": " + str(point["n_terms"]) + " terms, error "
+              + format(point["error"], ".4g") + ", score " + format(point["score"], ".6f"))
+    print(str(len(result["path"])) + " models" + (" (warm started)" if result["warm_start"] else "") + " -> " + args.out)
+
+    if args.pick is not None:
+        if not 0 <= args.pick < len(result["path"]):
+            print("--pick must be the number of a model on the path, from 0 to " + str(len(result["path"]) - 1))
+            return 2
+        name = os.path.splitext(os.path.basename(args.data))[0]
+        picked = pareto.select(result, args.pick)
+        base = engine.write_results(picked, args.results, name)
+        print(str(args.pick) + ": score " + str(picked["score"]) + " -> " + base + "_*")
+    return 0
+
+# "simulate" sub-command: load a saved model and simulate it, from the data's initial conditions or new ones, without the data or refitting
+def cmd_simulate(args):
+    result = artifact.load_model(args.model)
+    result["config"] = engine.make_config(result["config"], sim_method=args.solver, sim_rtol=args.rtol, sim_atol=args.atol, sim_points=args.sim_points)
+
+    x0 = [float(val) for val in args.x0.split(",")] if args.x0 else None
+    time_series = result["time_series"]
+    if args.t0 is not None or args.t1 is not None or args.points is not None:
+        if time_series is None and (args.t0 is None or args.t1 is None or args.points is None):
+            print("The model file has no time range, give all of --t0, --t1 and --points")
+            return 2
+        t0 = time_series[0] if args.t0 is None else args.t0
+        t1 = time_series[-1] if args.t1 is None else args.t1
+        time_series = np.linspace(t0, t1, len(time_series) if args.points is None else args.points)
+    if (x0 is None and result["x0"] is None) or time_series is None:
+        print("The model file has no initial conditions or time range, give them with --x0, --t0, --t1 and --points")
+        return 2
+
+    engine.simulate(result, x0, time_series)
+    print("\n".join(result["model"].equations()))
+    sim = np.column_stack((result["sim_time"], result["sim_data"]))
+    np.savetxt(args.out, sim, delimiter=",", header=",".join([""] + result["variable_names"]), comments="")
+    print(str(len(sim)) + " points -> " + args.out)
+    return 0
+
+# "store" sub-command: show the size of the result store, or remove results from it
+def cmd_store(args):
+    if args.clear:
+        print("Removed " + str(store.invalidate()) + " stored results")
+    for path in args.invalidate or []:
+        time_series, contents, variable_names = engine.read_file(path)
+        print(path + ": removed " + str(store.invalidate(data_fp=cache.data_key(time_series, contents))) + " stored results")
+
+    found = store.entries()
+    total = sum(size for path, size, used in found)
+    print(str(len(found)) + " stored results, " + format(total / 1024**2, ".1f") + " MB of " + format(store.default_budget() / 1024**2, ".0f") + " MB (" + store.store_dir() + ")")
+    return 0
+
+# "bench" sub-command: time every stage of the pipeline, append the times to the history file and compare them with an earlier run
+def cmd_bench(args):
+    grid = None
+    if args.grid:
+        with open(args.grid) as fil:
+            grid = json.load(fil)
+    history = bench.read_history(args.history)
+    records = bench.run(sizes=args.sizes, datasets=args.data, grid=grid, repeat=args.repeat, simulate=not args.no_simulate, label=args.label,
+                        progress=lambda record: print(bench.record_summary(record)))
+    bench.append_history(records, args.history)
+    print(str(len(records)) + " benchmarks -> " + args.history)
+
+    if args.compare is None or not history:
+        return 0
+    baseline = bench.select_run(history, None if args.compare == "last" else args.compare)
+    if not baseline:
+        print("No benchmark run " + args.compare + " in " + args.history)
+        return 2
+    slower = bench.compare(baseline, records, ratio=args.ratio)
+    print(str(len(slower)) + " stages slower than run " + baseline[0]["run"] + (" (" + baseline[0]["label"] + ")" if baseline[0]["label"] else ""))
+    for item in slower:
+        print("  " + item["dataset"] + " [" + item["config"]["opt"] + ", " + item["config"]["diff"] + ", " + item["config"]["feat"] + "] " + item["stage"]
+              + ": " + format(item["before"], ".4f") + " s -> " + format(item["after"], ".4f") + " s")
+    return 1 if slower else 0
+
+# "generate" sub-command: write data from one of the reference systems, for an ensemble of initial conditions
+def cmd_generate(args):
+    x0 = [float(val) for val in args.x0.split(",")] if args.x0 else None
+    files = systems.write(args.system, args.out, args.samples, args.dt, ensemble=args.ensemble, fmt=args.format, params=parse_params(args.param),
+                          x0=x0, spread=args.spread, seed=args.seed, dim=args.dim, t0=args.t0, substeps=args.substeps, chunk_rows=args.chunk_rows)
+    print(args.system + ": " + str(args.ensemble) + " trajectories of " + str(args.samples) + " samples -> " + (files[0] if len(files) == 1 else os.path.join(args.out, args.system + "_*." + args.format)))
+    return 0
+
+# "serve" sub-command: run the fitting service until interrupted
+def cmd_serve(args):
+    try:
+        service.serve(args.host, args.port, args.socket, args.workers, args.max_queued, args.keep, args.verbose, args.root, args.token, args.token_file)
+    except OSError as err: # e.g. a service is already running on the socket, or the port is in use
+        print(err, file=sys.stderr)
+        return 1
+    return 0
+
+# The token to send to a service at a port: --token, or the one the service wrote to its token file
+def client_token(args):
+    if args.token or not args.url:
+        return args.token
+    token_file = args.token_file or service.default_token_file()
+    return service.read_token(token_file) if os.path.exists(token_file) else None
+
+# "submit" sub-command: send fits of data files to a running service, with the model options given. With --wait, wait for each
+# result and print its score
+def cmd_submit(args):
+    config = engine.config_json(config_from_args(args))
+    token = client_token(args)
+    jobs = []
+    for path in args.data:
+        body = {"data": os.path.abspath(path), "config": config, "priority": args.priority}
+        if args.out:
+            body["out"] = os.path.abspath(args.out)
+        code, reply = service.call("POST", "/jobs", body, args.url, args.socket, token=token)
+        if code != 202:
+            print(path + ": refused - " + str(reply.get("error")), file=sys.stderr)
+            return 1
+        print(path + ": job " + str(reply["id"]))
+        jobs.append((path, reply["id"]))
+    failed = 0
+    for path, job_id in jobs if args.wait else []:
+        code, reply = 202, None
+        while code == 202: # Waited for in steps, so the connection isn't held open for a long fit
+            code, reply = service.call("GET", "/jobs/" + str(job_id) + "/result?wait=30", url=args.url, socket_path=args.socket, token=token)
+        if code == 200:
+            print(path + ": score " + str(reply["result"]["score"]) + (" -> " + reply["result"]["files"] if reply["result"]["files"] else ""))
+        else:
+            print(path + ": " + str(reply["status"]) + (" - " + reply["error"] if reply.get("error") else ""), file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
+
+# "watch" sub-command: fit every new or changed .csv file in a folder, writing the results next to each file, until interrupted
+def cmd_watch(args):
+    config = config_from_args(args)
+    watcher = watch.Watcher(args.folder, config, workers=args.workers, settle=args.settle, log=lambda line: print(line, flush=True))
+    if not args.once:
+        print("Watching " + args.folder + " with " + str(args.workers) + " workers (Ctrl+C to stop)", flush=True)
+    watcher.run(args.interval, once=args.once)
+    return 0
+
+# "options" sub-command: list the options in the installed PySINDy and their parameters, from the option registry
+def cmd_options(args):
+    for kind in args.kind:
+        if kind not in registry.option_dirs:
+            print("Unknown component: " + kind + " (choose from " + ", ".join(registry.option_dirs) + ")")
+            return 2
+    reg = registry.load(refresh=args.refresh)
+    print("PySINDy " + reg["pysindy_version"] + " (" + reg["pysindy_path"] + ")")
+    for kind in (args.kind or list(registry.option_dirs)):
+        print(registry.option_dirs[kind] + ":")
+        for option, entry in sorted(reg["options"][kind].items()):
+            if not entry["available"]:
+                print("  " + option + " (" + entry["class"] + ") - unavailable: " + entry["error"])
+                continue
+            params = ", ".join(param["name"] + ("" if param["required"] else "=" + param["text"]) for param in entry["params"])
+            print("  " + option + " (" + entry["class"] + "): " + params)
+    return 0
+
+# Create the argument parser with all sub-commands
+def make_parser():
+    parser = argparse.ArgumentParser(prog="seed", description="SEED 2.0: Software for the Extraction of Equations from Data")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    fit_parser = sub.add_parser("fit", help="fit a model to one or more .csv data files")
+    fit_parser.add_argument("data", nargs="+", help=".csv data files (first column time, first row variable names), or folders of them with --trajectories")
+    fit_parser.add_argument("--trajectories", action="store_true", help="fit one model to all the data files, as separate trajectories of the same system")
+    fit_parser.add_argument("--workers", type=int, help="with --trajectories, number of processes reading and differentiating the trajectories (default: one per core)")
+    fit_parser.add_argument("--name", help="with --trajectories, the name of the output files (default: the name of the first data file or folder)")
+    fit_parser.add_argument("--out", default="seed_output", help="folder to write the results to (default: seed_output)")
+    fit_parser.add_argument("--profile", action="store_true", help="record the wall time, CPU time and peak memory of each stage, written as _profile.json and a Chrome trace (_trace.json)")
+    add_model_args(fit_parser)
+    fit_parser.set_defaults(func=cmd_fit)
+
+    stream_parser = sub.add_parser("stream", help="fit a model to .csv data files too large to load, reading them in chunks")
+    stream_parser.add_argument("data", nargs="+", help=".csv data files (first column time, first row variable names)")
+    stream_parser.add_argument("--out", default="seed_output", help="folder to write the results to (default: seed_output)")
+    stream_parser.add_argument("--chunk-rows", type=int, default=100000, help="number of rows read at a time (default: 100000)")
+    stream_parser.add_argument("--halo", type=int, default=32, help="rows of overlap used when differentiating at chunk edges (default: 32)")
+    add_streamed_model_args(stream_parser)
+    stream_parser.set_defaults(func=cmd_stream)
+
+    online_parser = sub.add_parser("online", help="fit a model a batch of rows at a time, updating it without refitting the earlier rows, e.g. as a rig writes a data file")
+    online_parser.add_argument("data", help=".csv data file (first column time, first row variable names)")
+    online_parser.add_argument("--batch-rows", type=int, default=1000, help="number of rows in each update (default: 1000)")
+    online_parser.add_argument("--resparsify", type=int, default=10, help="run the sparse regression again every N batches, so terms can be added or dropped; in between only the coefficients of the chosen terms are updated (default: 10)")
+    online_parser.add_argument("--forget", type=float, default=1.0, help="weight kept by the earlier samples for each new sample, below 1 to follow a system that changes (default: 1, every sample counts the same)")
+    online_parser.add_argument("--halo", type=int, default=32, help="rows of overlap used when differentiating at batch edges (default: 32)")
+    online_parser.add_argument("--follow", action="store_true", help="keep fitting rows as they are appended to the file, until Ctrl+C or --timeout")
+    online_parser.add_argument("--interval", type=float, default=1.0, help="with --follow, seconds between checks for new rows (default: 1)")
+    online_parser.add_argument("--timeout", type=float, help="with --follow, stop once no rows have arrived for this many seconds (default: never)")
+    online_parser.add_argument("--every", type=int, default=10, help="print the model's progress every N batches (default: 10)")
+    online_parser.add_argument("--out", default="seed_output", help="folder to write the final model to (default: seed_output)")
+    add_streamed_model_args(online_parser)
+    online_parser.set_defaults(func=cmd_online)
+
+    sweep_parser = sub.add_parser("sweep", help="fit a grid of option combinations in parallel and rank them")
+    sweep_parser.add_argument("data", help=".csv data file")
+    sweep_parser.add_argument("--grid", required=True, help="json file with the grid, e.g. {\"opt_params\": {\"threshold\": [0.05, 0.1]}, \"diff\": [\"finite_difference\", \"smoothed_finite_difference\"]}")
+    sweep_parser.add_argument("--workers", type=int, help="number of worker processes (default: one per core)")
+    sweep_parser.add_argument("--out", default="sweep.csv", help="file to write the ranked table to (default: sweep.csv)")
+    sweep_parser.add_argument("--top", type=int, default=10, help="number of configurations to print (default: 10)")
+    sweep_parser.set_defaults(func=cmd_sweep)
+
+    path_parser = sub.add_parser("path", help="fit the model for a sequence of sparsity thresholds (or other optimizer parameter) and show the sparsest models for each error")
+    path_parser.add_argument("data", help=".csv data file")
+    path_parser.add_argument("--param", default="threshold", help="optimizer parameter varied along the path (default: threshold)")
+    values_group = path_parser.add_mutually_exclusive_group()
+    values_group.add_argument("--values", type=float, nargs="+", help="values of the parameter")
+    values_group.add_argument("--range", type=float, nargs=3, metavar=("START", "STOP", "NUM"), help="NUM values from START to STOP, evenly spaced on a log scale (default for the threshold: from the largest least squares coefficient down)")
+    path_parser.add_argument("--out", default="path.csv", help="file to write the table of the path to (default: path.csv)")
+    path_parser.add_argument("--pick", type=int, metavar="N", help="write the results of model N of the path (its number in the table, from 0) to the --results folder")
+    path_parser.add_argument("--results", default="seed_output", help="folder to write the results of the picked model to (default: seed_output)")
+    add_model_args(path_parser)
+    path_parser.set_defaults(func=cmd_path)
+
+    simulate_parser = sub.add_parser("simulate", help="simulate a saved model (_model.npz) without refitting")
+    simulate_parser.add_argument("model", help="model file saved by fit or the GUI (.npz)")
+    simulate_parser.add_argument("--x0", help="comma separated initial conditions (default: the first point of the data the model was fitted to)")
+    simulate_parser.add_argument("--t0", type=float, help="start time (default: the start of the data)")
+    simulate_parser.add_argument("--t1", type=float, help="end time (default: the end of the data)")
+    simulate_parser.add_argument("--points", type=int, help="number of evenly spaced times (default: the number of points in the data)")
+    simulate_parser.add_argument("--solver", choices=simulation.solvers, help="solver used for the simulation (default: the one saved with the model)")
+    simulate_parser.add_argument("--rtol", type=float, help="relative tolerance of the solver")
+    simulate_parser.add_argument("--atol", type=float, help="absolute tolerance of the solver")
+    simulate_parser.add_argument("--sim-points", type=int, help="number of simulated points written, evenly spaced over the times")
+    simulate_parser.add_argument("--out", default="simulation.csv", help="file to write the simulated data to (default: simulation.csv)")
+    simulate_parser.set_defaults(func=cmd_simulate)
+
+    store_parser = sub.add_parser("store", help="show or clear the store of earlier results")
+    store_parser.add_argument("--clear", action="store_true", help="remove every stored result")
+    store_parser.add_argument("--invalidate", nargs="+", metavar="DATA", help="remove the stored results for these .csv data files")
+    store_parser.set_defaults(func=cmd_store)
+
+    bench_parser = sub.add_parser("bench", help="time every stage of the pipeline on generated Lorenz data and the example data sets")
+    bench_parser.add_argument("--sizes", type=int, nargs="*", help="numbers of Lorenz samples to generate (default: 1000 10000 100000)")
+    bench_parser.add_argument("--data", nargs="*", help=".csv data files to benchmark (default: the two example data sets)")
+    bench_parser.add_argument("--grid", help="json file with the options to benchmark, in the same form as for sweep (default: the default options)")
+    bench_parser.add_argument("--repeat", type=int, default=3, help="times each stage is run, the fastest is recorded (default: 3)")
+    bench_parser.add_argument("--no-simulate", action="store_true", help="skip the forward simulation stage")
+    bench_parser.add_argument("--label", help="name saved with the results, e.g. a release number, that --compare can select")
+    bench_parser.add_argument("--history", default="seed_benchmarks.jsonl", help="file the results are appended to (default: seed_benchmarks.jsonl)")
+    bench_parser.add_argument("--compare", nargs="?", const="last", help="compare with an earlier run in the history (a label or run time stamp, default: the last run) and exit with status 1 if any stage is slower")
+    bench_parser.add_argument("--ratio", type=float, default=1.25, help="how many times longer a stage has to take to count as slower (default: 1.25)")
+    bench_parser.set_defaults(func=cmd_bench)
+
+    generate_parser = sub.add_parser("generate", help="generate data from a reference system (lorenz, rossler, lorenz96, lotka_volterra, van_der_pol) for an ensemble of initial conditions")
+    generate_parser.add_argument("system", choices=list(systems.systems), help="system to integrate")
+    generate_parser.add_argument("--samples", type=int, default=10000, help="number of samples in each trajectory (default: 10000)")
+    generate_parser.add_argument("--dt", type=float, default=0.002, help="time step between samples (default: 0.002)")
+    generate_parser.add_argument("--t0", type=float, default=0.0, help="time of the first sample (default: 0)")
+    generate_parser.add_argument("--ensemble", type=int, default=1, help="number of trajectories, integrated together (default: 1)")
+    generate_parser.add_argument("--x0", help="comma separated initial conditions of the first trajectory (default: the system's), the others are offset from it at random")
+    generate_parser.add_argument("--spread", type=float, help="standard deviation of the random offsets of the other trajectories' initial conditions (default: the system's)")
+    generate_parser.add_argument("--seed", type=int, default=0, help="seed of the random offsets (default: 0)")
+    generate_parser.add_argument("--dim", type=int, help="number of variables of lorenz96 (default: 10, or the number of --x0 values)")
+    generate_parser.add_argument("--param", action="append", metavar="NAME=VALUE", help="system parameter, e.g. rho=28 (repeatable)")
+    generate_parser.add_argument("--substeps", type=int, default=1, help="Runge-Kutta steps per sample, more for a more accurate integration (default: 1)")
+    generate_parser.add_argument("--format", choices=systems.formats, default="csv", help="one .csv data file per trajectory, or one .npy array of all of them (default: csv)")
+    generate_parser.add_argument("--chunk-rows", type=int, default=10000, help="samples integrated before they are written (default: 10000)")
+    generate_parser.add_argument("--out", default="generated", help="folder to write the data to (default: generated)")
+    generate_parser.set_defaults(func=cmd_generate)
+
+    serve_parser = sub.add_parser("serve", help="run a fitting service on this machine: fits are submitted as JSON over HTTP on a Unix socket (or a port) and run by a pool of workers")
+    serve_parser.add_argument("--socket", help="Unix socket file to listen on, only usable by this user (default: service.sock in the cache folder)")
+    serve_parser.add_argument("--port", type=int, help="listen on this port instead of the socket (e.g. " + str(service.default_port) + "), clients need the token")
+    serve_parser.add_argument("--host", default=service.default_host, help="address to listen on with --port (default: " + service.default_host + ", only this machine)")
+    serve_parser.add_argument("--token", help="token clients have to send (default with --port: a new one, written to the token file)")
+    serve_parser.add_argument("--token-file", help="file the new token is written to (default: service.token in the cache folder)")
+    serve_parser.add_argument("--root", action="append", help="folder the data files and results have to be in, can be given more than once (default: the current folder)")
+    serve_parser.add_argument("--workers", type=int, default=1, help="number of fits run at once (default: 1)")
+    serve_parser.add_argument("--max-queued", type=int, default=100, help="number of waiting jobs above which submissions are refused (default: 100)")
+    serve_parser.add_argument("--keep", type=int, default=1000, help="number of finished jobs kept for their results (default: 1000)")
+    serve_parser.add_argument("--verbose", action="store_true", help="log every request")
+    serve_parser.set_defaults(func=cmd_serve)
+
+    submit_parser = sub.add_parser("submit", help="send fits of .csv data files to a running fitting service")
+    submit_parser.add_argument("data", nargs="+", help=".csv data files")
+    submit_parser.add_argument("--socket", help="Unix socket file of the service (default: service.sock in the cache folder)")
+    submit_parser.add_argument("--url", help="address of a service listening on a port instead, e.g. http://" + service.default_host + ":" + str(service.default_port))
+    submit_parser.add_argument("--token", help="the service's token (default with --url: read from the token file)")
+    submit_parser.add_argument("--token-file", help="file the service wrote its token to (default: service.token in the cache folder)")
+    submit_parser.add_argument("--priority", type=int, default=0, help="jobs with a higher priority start first (default: 0)")
+    submit_parser.add_argument("--out", help="folder the service writes the results to, as by fit (default: not written)")
+    submit_parser.add_argument("--wait", action="store_true", help="wait for the results and print their scores")
+    add_model_args(submit_parser)
+    submit_parser.set_defaults(func=cmd_submit)
+
+    watch_parser = sub.add_parser("watch", help="fit every new or changed .csv data file in a folder as it appears, writing the coefficients and score next to it")
+    watch_parser.add_argument("folder", help="folder to watch")
+    watch_parser.add_argument("--workers", type=int, default=1, help="number of files fitted at once (default: 1)")
+    watch_parser.add_argument("--interval", type=float, default=2.0, help="seconds between looks at the folder (default: 2)")
+    watch_parser.add_argument("--settle", type=float, default=2.0, help="seconds a file has to stay unchanged before it's fitted, so files still being written are left alone (default: 2)")
+    watch_parser.add_argument("--once", action="store_true", help="fit the files in the folder that need it, then stop")
+    add_model_args(watch_parser)
+    watch_parser.set_defaults(func=cmd_watch)
+
+    options_parser = sub.add_parser("options", help="list the optimization, differentiation and feature library options and their parameters")
+    options_parser.add_argument("kind", nargs="*", help="components to list: opt, diff and/or feat (default: all)")
+    options_parser.add_argument("--refresh", action="store_true", help="rebuild the saved option list, e.g. after installing or updating PySINDy or one of its optional dependencies")
+    options_parser.set_defaults(func=cmd_options)
+
+    return parser
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,60 @@
+# SEED 2.0 plot decimation
+# Long time series are plotted through a min/max decimation: the visible part of the series is split into about one bin per pixel column
+# and only the lowest and highest point of each bin is drawn, which looks the same as drawing every point.
+# The decimated points are recomputed whenever the x limits change (zoom, pan, home on the toolbar), so drawing takes about the same time
+# however long the series is
+
+import numpy as np
+
+# The indices of the points to draw for y over the index range [start, stop): the min and max of each of n_bins bins, in order
+def minmax_indices(y, start, stop, n_bins):
+    count = stop - start
+    if count <= 2 * n_bins: # Few enough points to draw them all
+        return np.arange(start, stop)
+
+    size = int(np.ceil(count / n_bins)) # Points per bin
+    n_bins = int(np.ceil(count / size))
+    block = np.full(n_bins * size, np.nan)
+    block[:count] = y[start:stop]
+    block = block.reshape(n_bins, size)
+
+    missing = np.isnan(block) # NaN (e.g. the simulation after it failed) is never picked unless the whole bin is NaN
+    low = np.argmin(np.where(missing, np.inf, block), axis=1)
+    high = np.argmax(np.where(missing, -np.inf, block), axis=1)
+    rows = np.arange(n_bins) * size + start
+    index = np.sort(np.stack((rows + low, rows + high), axis=1), axis=1).ravel() # Keep the points in time order within each bin
+
+    # Always include the first and last point of the range, so the line reaches the edges of the view
+    return np.unique(np.concatenate(([start], index, [stop - 1])))
+
+# The index range [start, stop) of the sorted x values inside (lo, hi), with one extra point either side so the line continues off the view
+def visible_range(x, lo, hi):
+    start = max(int(np.searchsorted(x, lo, side="left")) - 1, 0)
+    stop = min(int(np.searchsorted(x, hi, side="right")) + 1, len(x))
+    return start, stop
+
+# A line on a matplotlib axes showing a decimated view of (x, y), with x sorted
+# Extra arguments are passed to axes.plot, e.g. DecimatedLine(ax, t, y, 'r--', label='model simulation')
+class DecimatedLine:
+    def __init__(self, axes, x, y, *args, bins=None, **kwargs):
+        self.axes = axes
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.bins = bins # Number of bins, None for one per pixel column of the axes
+        index = minmax_indices(self.y, 0, len(self.x), self.n_bins())
+        self.line, = axes.plot(self.x[index], self.y[index], *args, **kwargs)
+        axes.callbacks.connect("xlim_changed", lambda ax: self.update()) # A function (not a method) so the axes keeps this line alive
+
+    def n_bins(self):
+        if self.bins:
+            return self.bins
+        return max(int(self.axes.bbox.width), 100)
+
+    # Decimate the part of the series inside the current x limits
+    def update(self):
+        lo, hi = sorted(self.axes.get_xlim())
+        start, stop = visible_range(self.x, lo, hi)
+        if stop - start < 1:
+            return
+        index = minmax_indices(self.y, start, stop, self.n_bins())
+        self.line.set_data(self.x[index], self.y[index])
@@ -0,0 +1,391 @@
+# SEED 2.0 headless engine
+# The read/fit/score/simulate pipeline used by the GUI, without any dependency on tkinter so that it can run on display-less machines
+
+import ast # ast is used to convert parameter values typed as text
+import csv
+import json
+import os
+from math import ceil
+
+import numpy as np
+import pysindy as ps
+from scipy.signal import savgol_filter # Needed so that "func savgol_filter" can be resolved for the smoothed finite difference option
+from scipy.integrate import odeint # Used when generating the Lorenz data
+from sklearn.metrics import r2_score # The default PySINDy model score
+
+from . import artifact, cache, ensemble, ingest, precision, registry, sampling, simulation, store
+from .model import Model, SparseCoefs
+from .stages import stage, check_cancel
+
+pysindypath = os.path.dirname(ps.__file__) # File path for the pysindy module within the python files
+memo = cache.MemoCache(cache.default_budget()) # Derivatives and library matrices of recent runs, reused when only the optimizer changes
+
+option_dirs = registry.option_dirs # PySINDy source folder holding the options for each component
+
+# Default selections, the same as the defaults on the main GUI window
+DEFAULT_CONFIG = {
+    "opt": "stlsq",
+    "opt_params": {},
+    "diff": "finite_difference",
+    "diff_params": {},
+    "feat": "polynomial_library",
+    "feat_params": {},
+    "ensemble": 0, # Number of fits in an ensemble fit (ensemble.py), 0 for a single fit
+    "ensemble_method": "bootstrap", # How the rows of each fit are drawn, one of ensemble.methods
+    "ensemble_fraction": 0.5, # Fraction of the rows in each "subsample" fit
+    "precision": "float64", # Floating point type the data is differentiated, the library evaluated and the model fitted in, one of precision.precisions
+    "sample": None, # Fit on a subset of the samples and score on the others (sampling.py), one of sampling.methods. None fits every sample
+    "sample_stride": 10, # Every how many samples one is fitted, for "stride"
+    "sample_size": 10000, # Number of samples fitted, for "random"
+    "sample_window": None, # (start, end) times of the samples fitted, for "window"
+    "holdout_size": 100000, # Largest number of held-out samples the model is scored on
+    "simulate": True,
+    "sim_method": "LSODA", # solve_ivp solver used for the forward simulation, one of simulation.solvers
+    "sim_rtol": 1e-12, # Relative and absolute tolerances of the solver
+    "sim_atol": 1e-12,
+    "sim_points": None, # Number of output points of the simulation, e.g. for display. None simulates at every time in the data
+    "ingest_cache": True,
+    "memo": True,
+    "store": True, # Load the result of an identical earlier run from the result store (store.py) instead of refitting
+}
+
+# Functions that can be given as a parameter value in the form "func <name>"
+param_funcs = {"savgol_filter": savgol_filter}
+
+# Merge a (possibly partial) configuration with the defaults
+def make_config(config=None, **overrides):
+    full = {key: (dict(val) if isinstance(val, dict) else val) for key, val in DEFAULT_CONFIG.items()}
+    for source in (config or {}), overrides:
+        for key, val in source.items():
+            if val is None:
+                continue
+            if key not in full:
+                raise KeyError("Unknown configuration option: " + str(key))
+            if isinstance(full[key], dict):
+                full[key].update(val) # Parameter dictionaries are merged, not replaced
+            else:
+                full[key] = val
+    return full
+
+# Load a configuration file (json)
+def load_config(path):
+    with open(path) as fil:
+        return config_from_json(json.load(fil))
+
+# A copy of a configuration that can be saved as json: parameters that are functions are written as "func <name>"
+def config_json(config):
+    saved = {}
+    for key, val in config.items():
+        if isinstance(val, dict):
+            val = {name: ("func " + value.__name__ if callable(value) else value) for name, value in val.items()}
+        saved[key] = val
+    return saved
+
+# The configuration saved by config_json(), with "func <name>" parameters converted back into the functions
+def config_from_json(saved):
+    config = make_config(saved)
+    for key, val in config.items():
+        if isinstance(val, dict):
+            for name, value in val.items():
+                if isinstance(value, str) and value.startswith("func "):
+                    val[name] = parse_param(value)
+    return config
+
+# Take an option name (the PySINDy file name, e.g. "stlsq") and return the name of the class it defines
+def get_class_name(kind, option):
+    return registry.class_name(kind, option)
+
+# Get the class object of an option
+def get_class(kind, option):
+    return registry.get_class(kind, option)
+
+# Instantiate an optimizer ("opt"), differentiator ("diff") or feature library ("feat") with the given parameters
+def make_component(kind, option, params=None):
+    return get_class(kind, option)(**(params or {}))
+
+# Instantiate all three components for a configuration
+def build(config):
+    opt = make_component("opt", config["opt"], config["opt_params"])
+    diff = make_component("diff", config["diff"], config["diff_params"])
+    feat = make_component("feat", config["feat"], config["feat_params"])
+    return opt, diff, feat
+
+# Convert a parameter value typed as text (GUI entry box, command line) into the value passed to the class
+def parse_param(value, param_type=None):
+    value = str(value).strip()
+    if value.startswith("func "): # Parameters that are functions are written as "func <name>", e.g. "func savgol_filter"
+        return param_funcs[value.split(" ", 1)[1]]
+    if param_type is str:
+        return value
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        if param_type is None: # With no known type, anything that isn't a literal is a string
+            return value
+        raise ValueError("Invalid parameter value: " + value)
+
+# Read a .csv data file: first row is the variable names, first column the time series
+# With cache=True, repeat reads of an unchanged file are memory-mapped from a binary sidecar instead of parsed
+def read_file(path, cache=True):
+    return ingest.load_csv(path, cache=cache)
+
+# Lorenz system for generation - This is taken from the PySINDy feature overview file
+def lorenz(z, t):
+    return [
+        10 * (z[1] - z[0]),
+        z[0] * (28 - z[2]) - z[1],
+        z[0] * z[1] - (8 / 3) * z[2]
+    ]
+
+# Generate Lorenz data between t_min and t_max with time step dt from the initial conditions conds
+def generate_lorenz(dt, t_min, t_max, conds):
+    time_series = np.arange(t_min, t_max, dt)
+    contents = odeint(lorenz, [float(val) for val in conds], time_series)
+    points_no = ceil((t_max-t_min)/dt) # The number of generated data points
+    return time_series, contents, points_no
+
+# Remove the samples where the derivative isn't known (some differentiation options leave NaNs at the end points)
+def drop_nan_rows(x_dot, theta):
+    keep = ~np.isnan(x_dot).any(axis=1)
+    if keep.all():
+        return x_dot, theta
+    return x_dot[keep], theta[keep]
+
+# Differentiate the data
+def differentiate(contents, time_series, diff):
+    return np.asarray(diff(contents, time_series))
+
+# Evaluate the feature library on the data, returning the fitted library and the library matrix Theta
+def evaluate_library(contents, feat):
+    theta = np.asarray(feat.fit_transform(contents))
+    return feat, theta
+
+# Sparse regression of the derivatives onto the library matrix, returning the coefficient matrix
+def regress(theta, x_dot, opt):
+    x_dot, theta = drop_nan_rows(x_dot, theta)
+    optimizer = ps.optimizers.SINDyOptimizer(opt, unbias=getattr(opt, "unbias", True)) # The same wrapper (and unbiasing step) that PySINDy's SINDy.fit uses
+    optimizer.fit(theta, x_dot)
+    return np.array(optimizer.coef_)
+
+# Model score: R^2 of the predicted derivatives, the same as PySINDy's SINDy.score
+def score(coefs, theta, x_dot):
+    x_dot, theta = drop_nan_rows(x_dot, theta)
+    return r2_score(x_dot, theta @ coefs.T)
+
+# Differentiate the data and evaluate the feature library on it, returning the fitted library, the library matrix and the derivatives
+# progress is called with the name of each stage as it starts, and the run stops between stages once cancel is set
+# If the configuration that diff and feat were built from is given (with "memo" on), the derivatives and library matrix are
+# looked up in the memo cache by a hash of the data and their options, and only computed if they aren't there
+# data_fp (optional) is the cache.data_key() of the data, if already known
+# With a reduced "precision", the data is converted first and the library matrix and derivatives are in that precision
+# With rows (an index array, see sampling.split), the library matrix is only evaluated on those rows. The derivatives are still of every row
+def prepare(contents, time_series, diff, feat, progress=None, cancel=None, config=None, data_fp=None, rows=None):
+    if config is None or not config["memo"] or memo.budget <= 0:
+        data_fp = None
+    elif data_fp is None:
+        data_fp = cache.data_key(time_series, contents)
+    if config is not None and precision.reduced(config):
+        contents = np.asarray(contents, dtype=precision.data_type(config))
+        data_fp = data_fp and data_fp + "-" + config["precision"] # Memoized separately from the full precision matrices
+
+    stage("differentiate", progress, cancel)
+    diff_key = data_fp and cache.option_key(data_fp, "diff", config["diff"], config["diff_params"])
+    x_dot = memo.get(diff_key) if diff_key else None
+    if x_dot is None:
+        x_dot = differentiate(contents, time_series, diff)
+        if diff_key:
+            memo.put(diff_key, x_dot)
+
+    stage("library", progress, cancel)
+    if rows is not None: # Not memoized, a few rows of the library matrix are quick to evaluate again
+        feat, theta = evaluate_library(contents[rows], feat)
+        return feat, theta, x_dot
+    feat_key = data_fp and cache.option_key(data_fp, "feat", config["feat"], config["feat_params"])
+    cached = memo.get(feat_key) if feat_key else None
+    if cached is not None:
+        feat, theta = cached # The library fitted when the matrix was first computed
+    else:
+        feat, theta = evaluate_library(contents, feat)
+        if feat_key:
+            memo.put(feat_key, (feat, theta))
+    return feat, theta, x_dot
+
+# The float64 derivatives and library matrix of the data with key data_fp from the memo cache, left there by a float64 run with the same
+# differentiation and library options, or (None, None) if they aren't both there
+def memoized_float64(config, data_fp):
+    if not data_fp or not config["memo"]:
+        return None, None
+    x_dot = memo.get(cache.option_key(data_fp, "diff", config["diff"], config["diff_params"]))
+    cached = memo.get(cache.option_key(data_fp, "feat", config["feat"], config["feat_params"]))
+    if x_dot is None or cached is None:
+        return None, None
+    return x_dot, cached[1]
+
+# Fit a model to the data, returning the model and its score. The arguments are the same as for prepare()
+# With the "sample" options, the model is fitted on a subset of the samples and its score is the score on the others (see sampling.py)
+def fit(contents, time_series, variable_names, opt, diff, feat, progress=None, cancel=None, config=None, data_fp=None):
+    if data_fp is None and config is not None and config["memo"] and memo.budget > 0: # Also the key of the float64 matrices a reduced precision fit is checked with
+        data_fp = cache.data_key(time_series, contents)
+    rows = held_out = None
+    if config is not None and sampling.active(config):
+        rows, held_out = sampling.split(config, np.asarray(time_series, dtype=float))
+    feat, theta, x_dot = prepare(contents, time_series, diff, feat, progress, cancel, config, data_fp, rows)
+    all_x_dot = x_dot
+    if rows is not None:
+        x_dot = x_dot[rows] # The derivatives of the rows of the library matrix, the others are for the held-out score
+    stage("fit", progress, cancel)
+    inclusion = None
+    if config is not None and config["ensemble"]: # The median of many fits on resamples of the data, and how often each term was included
+        coefs, inclusion = ensemble.fit(theta, x_dot, config, cancel)[:2]
+    else:
+        coefs = regress(theta, x_dot, opt)
+    stage("score", progress, cancel)
+    report = None
+    if config is not None and precision.reduced(config): # Measure the accuracy lost against a float64 fit
+        x_dot_64, theta_64 = memoized_float64(config, data_fp)
+        segments = precision.reference_segments(len(time_series), len(time_series) if rows is None else len(rows), None if theta_64 is not None else precision.reference_rows)
+        stats = precision.float64_statistics(contents, time_series, diff, feat, rows, x_dot=x_dot_64, theta=theta_64, segments=segments)
+        full = (lambda: precision.float64_statistics(contents, time_series, diff, feat, rows, x_dot=x_dot_64)) if segments else None
+        coefs, report = precision.check(coefs, stats, opt, theta.dtype, ensemble=bool(config["ensemble"]), full_statistics=full)
+    model_score = report["score"] if report else score(coefs, theta, x_dot)
+    sample_report = None
+    if rows is not None:
+        sample_report = sampling.evaluate(config, coefs, feat, contents, all_x_dot, rows, held_out, model_score)
+        model_score = sample_report["score"]
+    model = Model(coefs, feat.get_feature_names(list(variable_names)), variable_names, feat, inclusion, report, sample_report)
+    return model, model_score
+
+# Run the whole pipeline on data already in memory, returning a dictionary of results
+def run(contents, time_series, variable_names, config=None, progress=None, cancel=None):
+    config = make_config(config)
+    opt, diff, feat = build(config)
+    time_series = np.asarray(time_series, dtype=float)
+    data_fp = cache.data_key(time_series, contents) # Fingerprint of the data, saved with the model
+
+    # The same data with the same options has been run before: load the result instead of fitting
+    key = store.result_key(data_fp, config, variable_names) if config["store"] else None
+    stored = store.get(key) if key else None
+    if stored is not None:
+        stored.update({"time_series": time_series, "contents": contents, "config": config, "stored": True})
+        if stored["sim_data"] is None and config["simulate"]: # Shouldn't happen, as the simulation settings are part of the key
+            simulate(stored, progress=progress, cancel=cancel)
+        return stored
+
+    model, model_score = fit(contents, time_series, variable_names, opt, diff, feat, progress, cancel, config, data_fp)
+    result = make_result(model, model_score, contents, time_series, config, data_fp)
+    if config["simulate"]:
+        simulate(result, progress=progress, cancel=cancel)
+
+    if key:
+        try:
+            store.put(key, result)
+        except OSError: # e.g. a full disk or read-only cache folder, the result is still returned
+            pass
+    return result
+
+# The result of a run: the model and its score, with the data it was fitted to and the run configuration
+def make_result(model, model_score, contents, time_series, config, data_fp=None):
+    return {
+        "model": model,
+        "coefs": model.coefs,
+        "sparse": model.sparse, # The nonzero terms of coefs, used to show and save the model
+        "inclusion": model.inclusion, # For an ensemble fit, the probability of each term being included
+        "precision": model.precision, # For a reduced precision fit, the accuracy lost against float64
+        "sampling": model.sampling, # For a subsampled fit, the samples fitted and held out and the scores on each
+        "feats": model.feats,
+        "variable_names": list(model.variable_names),
+        "score": model_score,
+        "n_samples": len(time_series),
+        "time_series": time_series,
+        "contents": contents,
+        "sim_time": None,
+        "sim_data": None,
+        "config": config,
+        "fingerprint": data_fp,
+        "x0": np.array(contents[0], dtype=float), # The data's initial conditions
+        "stored": False, # Was the result loaded from the result store?
+    }
+
+# Forward simulate the model of a result, setting its sim_time and sim_data. The simulation settings are taken from the result's configuration
+# By default the data's initial conditions are evolved over the data's time series, x0 and time_series simulate other initial conditions or times
+def simulate(result, x0=None, time_series=None, progress=None, cancel=None):
+    stage("simulate", progress, cancel)
+    config = result["config"]
+    x0 = result["x0"] if x0 is None else np.asarray(x0, dtype=float)
+    time_series = result["time_series"] if time_series is None else np.asarray(time_series, dtype=float)
+    if len(x0) != len(result["variable_names"]):
+        raise ValueError("The model has " + str(len(result["variable_names"])) + " variables, but " + str(len(x0)) + " initial conditions were given")
+
+    result["sim_time"] = simulation.output_times(time_series, config["sim_points"]) # The times to simulate at, every time in the data or fewer for display
+    result["sim_data"] = result["model"].simulate(x0, result["sim_time"], callback=lambda: check_cancel(cancel), # Evolve the initial conditions through the output equations
+                                                  method=config["sim_method"], rtol=config["sim_rtol"], atol=config["sim_atol"])
+    return result
+
+# Run the whole pipeline on a .csv data file
+def run_file(path, config=None, progress=None, cancel=None):
+    stage("read", progress, cancel)
+    time_series, contents, variable_names = read_file(path, cache=make_config(config)["ingest_cache"])
+    result = run(contents, time_series, variable_names, config, progress, cancel)
+    result["data"] = path
+    return result
+
+# Write the coefficient matrix to a .csv file: one row per feature, one column per output equation. The same layout is saved from the GUI plot window
+# Only the nonzero coefficients (from the model's SparseCoefs) are formatted, every other entry is written as 0.0
+def write_coefficients(path, sparse, feats, variable_names):
+    cells = np.full((len(feats), len(variable_names)), "0.0", dtype=object)
+    for num in range(len(variable_names)):
+        items, values = sparse.row(num)
+        cells[items, num] = [repr(float(val)) for val in values]
+
+    with open(path, "w", newline='') as fil:
+        writer = csv.writer(fil)
+        writer.writerow([""] + [("d "+name_+"/dt") for name_ in variable_names])
+        writer.writerows([feat] + row for feat, row in zip(feats, cells.tolist()))
+
+# Write the results to out_dir: coefficient matrix, equations, score summary, simulated data (of each trajectory, for a multi-trajectory fit)
+# and (if the run was profiled) the stage times
+def write_results(result, out_dir, name):
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, name)
+    variable_names = result["variable_names"]
+
+    write_coefficients(base + "_coefficients.csv", result["model"].sparse, result["feats"], variable_names)
+    if result.get("inclusion") is not None: # For an ensemble fit, the inclusion probabilities in the same layout as the coefficients
+        write_coefficients(base + "_inclusion.csv", SparseCoefs(result["inclusion"]), result["feats"], variable_names)
+
+    with open(base + "_equations.txt", "w") as fil:
+        fil.write("\n".join(result["model"].equations()) + "\n")
+
+    summary = {
+        "data": result.get("data"),
+        "score": float(result["score"]),
+        "variable_names": variable_names,
+        "n_samples": int(result["n_samples"]),
+        "config": config_json(result["config"]),
+        "fingerprint": result.get("fingerprint"),
+    }
+    if result.get("precision"): # The accuracy lost by a reduced precision fit
+        summary["precision"] = result["precision"]
+    if result.get("sampling"): # The samples fitted and held out by a subsampled fit
+        summary["sampling"] = result["sampling"]
+    if result.get("trajectories"): # A multi-trajectory fit (trajectories.py): the score of each trajectory
+        summary["trajectories"] = [{"data": traj["data"], "n_samples": int(traj["n_samples"]), "score": float(traj["score"])} for traj in result["trajectories"]]
+    with open(base + "_summary.json", "w") as fil:
+        json.dump(summary, fil, indent=2, default=repr) # Any other parameters that aren't json types are written as their repr
+
+    artifact.save_model(base + "_model.npz", result) # The model itself, which can be loaded again without refitting
+
+    if result.get("trajectories"): # The simulation of every trajectory, named after its data file
+        for traj in result["trajectories"]:
+            if traj["sim_data"] is not None:
+                sim = np.column_stack((traj["sim_time"], traj["sim_data"]))
+                np.savetxt(base + "_" + traj["name"] + "_simulation.csv", sim, delimiter=",", header=",".join([""] + variable_names), comments="")
+    elif result["sim_data"] is not None:
+        sim = np.column_stack((result["sim_time"], result["sim_data"]))
+        np.savetxt(base + "_simulation.csv", sim, delimiter=",", header=",".join([""] + variable_names), comments="")
+
+    if result.get("profile") is not None: # The stage times of the run (a timing.Profile), as json and a Chrome trace
+        result["profile"].write(base + "_profile.json")
+        result["profile"].write_trace(base + "_trace.json")
+
+    return base
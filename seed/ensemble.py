@@ -0,0 +1,72 @@
+# SEED 2.0 ensemble fitting
+# Fits the configured optimizer many times, each on a bootstrap resample (or a random subsample) of the rows of the library matrix, and
+# combines the fits into the median coefficients and the probability of each term being included (nonzero). The library matrix and
+# derivatives are saved once to a temporary .npy file that every worker process memory-maps, so the data isn't copied per worker
+
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import engine
+from .stages import run_all
+
+methods = ["bootstrap", "subsample"] # Rows drawn with replacement (as many as the data), or a fraction of them without replacement
+seed = 0 # Seed of the random resamples, fixed so that the same data and options always give the same model
+start_method = None # How the worker processes are started (a multiprocessing start method), None for the platform's default. The GUI uses "spawn"
+
+# Data shared with the worker processes, set by init_worker
+_shared = {}
+
+# Worker process start up: memory-map the shared library matrix and derivatives and limit each worker to one BLAS thread
+def init_worker(theta_path, x_dot_path):
+    _shared["theta"] = np.load(theta_path, mmap_mode="r")
+    _shared["x_dot"] = np.load(x_dot_path, mmap_mode="r")
+    try:
+        from threadpoolctl import threadpool_limits # Installed with scikit-learn
+        _shared["limits"] = threadpool_limits(1)
+    except ImportError:
+        pass
+
+# The row indices of one resample of n_rows rows
+def resample(rng, n_rows, method, fraction):
+    if method == "bootstrap":
+        return np.sort(rng.integers(0, n_rows, n_rows)) # Sorted, so the rows are read from the memory-mapped file in order
+    return np.sort(rng.choice(n_rows, max(int(round(fraction * n_rows)), 1), replace=False))
+
+# Fit the optimizer on one resample for each seed sequence, returning the coefficient matrices (runs in a worker process, or in this one)
+def fit_models(seeds, config, theta=None, x_dot=None):
+    theta = _shared["theta"] if theta is None else theta
+    x_dot = _shared["x_dot"] if x_dot is None else x_dot
+    coefs = []
+    for seq in seeds:
+        index = resample(np.random.default_rng(seq), len(theta), config["ensemble_method"], config["ensemble_fraction"])
+        opt = engine.make_component("opt", config["opt"], config["opt_params"]) # A new optimizer for every fit, so no state is shared
+        coefs.append(engine.regress(theta[index], x_dot[index], opt))
+    return np.array(coefs)
+
+# Fit config["ensemble"] models on resamples of the library matrix theta and derivatives x_dot, on max_workers processes (default: one per core)
+# Returns the median coefficients, the inclusion probability of each coefficient (the fraction of the models it's nonzero in) and every model's coefficients
+def fit(theta, x_dot, config, cancel=None, max_workers=None):
+    if config["ensemble_method"] not in methods:
+        raise ValueError("Unknown ensemble method: " + str(config["ensemble_method"]) + " (choose from " + ", ".join(methods) + ")")
+    x_dot, theta = engine.drop_nan_rows(x_dot, theta)
+    seeds = np.random.SeedSequence(seed).spawn(config["ensemble"])
+    workers = min(max_workers or os.cpu_count() or 1, len(seeds))
+
+    if workers <= 1:
+        all_coefs = run_all(None, fit_models, [([seq], config, theta, x_dot) for seq in seeds], cancel)
+    else:
+        chunks = [seeds[num::workers] for num in range(workers)] # One run of fits per worker, to start as few tasks as possible
+        with tempfile.TemporaryDirectory() as tmp:
+            theta_path, x_dot_path = os.path.join(tmp, "theta.npy"), os.path.join(tmp, "x_dot.npy")
+            np.save(theta_path, theta)
+            np.save(x_dot_path, x_dot)
+            context = None if start_method is None else multiprocessing.get_context(start_method)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(theta_path, x_dot_path)) as pool:
+                all_coefs = run_all(pool, fit_models, [(chunk, config) for chunk in chunks], cancel)
+
+    all_coefs = np.concatenate(all_coefs)
+    return np.median(all_coefs, axis=0), np.mean(all_coefs != 0, axis=0), all_coefs
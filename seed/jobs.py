@@ -0,0 +1,126 @@
+# SEED 2.0 background jobs
+# A queue of computations run on worker threads, so that the GUI stays responsive while a model is being fitted.
+# Jobs report which pipeline stage they are in and can be cancelled; progress is passed back through a thread-safe event queue
+
+import itertools
+import queue
+import threading
+import time
+import traceback
+
+from .stages import Cancelled
+
+# One queued computation: func(progress, cancel) is run on a worker thread and its return value kept as the result
+class Job:
+    def __init__(self, job_id, name, func, priority=0):
+        self.id = job_id
+        self.name = name # Shown to the user, e.g. the name of the data file
+        self.func = func
+        self.priority = priority # Queued jobs with a higher priority start first, those with the same priority in the order they were submitted
+        self.status = "queued" # queued -> running -> done / failed / cancelled
+        self.stage = None # The pipeline stage being run
+        self.result = None
+        self.error = None # Error message if the job failed
+        self.traceback = None
+        self.cancel_event = threading.Event()
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done_event = threading.Event() # Set once the job has finished
+
+    # Has the job finished (whether it succeeded or not)?
+    def finished_running(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    # Wait for the job to finish, for at most timeout seconds (None waits forever). Returns whether it has finished
+    def wait(self, timeout=None):
+        return self.done_event.wait(timeout)
+
+# Runs submitted jobs in order of priority, then submission, on a fixed number of worker threads
+# Every change of a job's state is put on the events queue as (event, job), with event one of
+# "queued", "started", "progress", "done", "failed" or "cancelled". With events=False (nothing reading the events, e.g. the
+# fitting service), events is None
+class JobQueue:
+    def __init__(self, workers=1, events=True):
+        self.jobs = {} # All jobs by id
+        self.events = queue.Queue() if events else None
+        self._pending = queue.PriorityQueue() # (-priority, id, job), so the highest priority and then the oldest job is taken first
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, daemon=True) for num in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    # Queue a job, returning the Job object
+    def submit(self, name, func, priority=0):
+        with self._lock:
+            job = Job(next(self._ids), name, func, priority)
+            self.jobs[job.id] = job
+        self._event(("queued", job))
+        self._pending.put((-priority, job.id, job))
+        return job
+
+    # Cancel a job: a queued job is finished as cancelled straight away (and skipped when a worker takes it from the queue), a running
+    # job stops at the next stage (or simulation step)
+    def cancel(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished_running():
+                return False
+            job.cancel_event.set()
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+        return True
+
+    # Remove a finished job (and its result) from the queue's list of jobs
+    def forget(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or not job.finished_running():
+                return False
+            del self.jobs[job_id]
+        return True
+
+    # The jobs still waiting to start
+    def queued(self):
+        return [job for job in list(self.jobs.values()) if job.status == "queued"]
+
+    # The jobs currently running
+    def running(self):
+        return [job for job in list(self.jobs.values()) if job.status == "running"]
+
+    # Worker thread: take jobs from the queue and run them
+    def _work(self):
+        while True:
+            job = self._pending.get()[2]
+            with self._lock:
+                if job.status != "queued": # Cancelled while waiting in the queue
+                    continue
+                job.status = "running"
+                job.started = time.time()
+            self._event(("started", job))
+
+            def progress(name, job=job):
+                job.stage = name
+                self._event(("progress", job))
+
+            try:
+                job.result = job.func(progress, job.cancel_event)
+            except Cancelled:
+                self._finish(job, "cancelled")
+            except Exception as err:
+                job.error = str(err) or type(err).__name__
+                job.traceback = traceback.format_exc()
+                self._finish(job, "failed")
+            else:
+                self._finish(job, "done")
+
+    def _event(self, item):
+        if self.events is not None:
+            self.events.put(item)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        job.done_event.set()
+        self._event((status, job))
@@ -0,0 +1,95 @@
+# SEED 2.0 fitted model
+# Holds the output of a fit (coefficients, feature names and the fitted feature library) independently of the GUI
+
+import numpy as np
+
+from . import simulation # Used to forward simulate the model from a set of initial conditions
+
+# The nonzero entries of a coefficient matrix in compressed sparse row form: the terms of equation num are
+# features indices[indptr[num]:indptr[num+1]] with coefficients data[indptr[num]:indptr[num+1]], in feature order
+class SparseCoefs:
+    def __init__(self, coefs):
+        coefs = np.asarray(coefs)
+        rows, cols = np.nonzero(coefs) # In row order, then column order
+        self.shape = coefs.shape
+        self.indptr = np.searchsorted(rows, np.arange(coefs.shape[0] + 1))
+        self.indices = cols
+        self.data = coefs[rows, cols]
+
+    # The (feature indices, coefficients) of the terms of one equation
+    def row(self, num):
+        part = slice(self.indptr[num], self.indptr[num+1])
+        return self.indices[part], self.data[part]
+
+    # The features used by at least one equation, in order
+    def active(self):
+        return np.unique(self.indices)
+
+    # Number of nonzero coefficients
+    def nnz(self):
+        return len(self.data)
+
+    # The full coefficient matrix
+    def dense(self):
+        coefs = np.zeros(self.shape, dtype=self.data.dtype)
+        for num in range(self.shape[0]):
+            cols, vals = self.row(num)
+            coefs[num, cols] = vals
+        return coefs
+
+# A fitted SINDy model: dx/dt = Theta(x) . coefs^T
+class Model:
+    def __init__(self, coefs, feats, variable_names, library, inclusion=None, precision=None, sampling=None):
+        self.coefs = np.asarray(coefs) # Coefficient matrix, one row per output equation and one column per feature
+        self.inclusion = None if inclusion is None else np.asarray(inclusion) # For an ensemble fit, the fraction of the fits each coefficient was nonzero in
+        self.precision = precision # For a reduced precision fit, the report of the accuracy lost (see precision.check)
+        self.sampling = sampling # For a subsampled fit, the report of the samples fitted and held out (see sampling.evaluate)
+        self.sparse = SparseCoefs(self.coefs) # The nonzero terms of the coefficient matrix, used by everything that shows the model
+        self.feats = list(feats) # Feature names, in the same order as the columns of coefs
+        self.variable_names = list(variable_names) # System variable names, in the same order as the rows of coefs
+        self.library = library # The fitted PySINDy feature library used to evaluate Theta(x)
+
+    # Evaluate the feature library on the data x (n_samples x n_variables)
+    def features(self, x):
+        return np.asarray(self.library.transform(np.atleast_2d(x)))
+
+    # Predict the time derivatives for the data x
+    def predict(self, x):
+        return self.features(x) @ self.coefs.T
+
+    # The right-hand side of the model equations, only evaluating the features with a nonzero coefficient
+    def rhs(self):
+        if getattr(self, "_rhs", None) is None:
+            self._rhs = simulation.RHS(self.coefs, self.library, len(self.variable_names))
+        return self._rhs
+
+    # Evolve the initial conditions x0 through the model equations, returning the state at every time in t
+    # method, rtol and atol select the solve_ivp solver and tolerances, the defaults are the same as the PySINDy SINDy.simulate() default
+    # callback (optional) is called at every step of the integrator, and can stop the simulation by raising an exception
+    def simulate(self, x0, t, callback=None, method="LSODA", rtol=1e-12, atol=1e-12):
+        return simulation.integrate(self.rhs(), x0, t, method, rtol, atol, callback)
+
+    # Form the output equations as strings, e.g. "dx/dt = -9.999 x + 9.999 y"
+    def equations(self, precision=3):
+        return format_equations(self.sparse, self.feats, self.variable_names, precision)
+
+# Form one output equation string per equation, from the coefficient matrix or its SparseCoefs. Only the nonzero terms are visited
+def format_equations(coefs, feats, variable_names, precision=3):
+    sparse = coefs if isinstance(coefs, SparseCoefs) else SparseCoefs(coefs)
+    eqns = []
+    for num in range(sparse.shape[0]):
+        out = "d" + str(variable_names[num]) + "/dt =" # The start of the output equation
+        first = True
+        for item, value in zip(*sparse.row(num)):
+            coef = round(float(value), precision) # Round each coefficient value
+            if(coef == 0): # Coefficients that round to 0 aren't shown
+                continue
+            desc = str(feats[item])
+            term = str(coef) if desc == "1" else str(coef) + " " + desc # Don't add the descriptor if it is equal to 1 (e.g. 0.364 1 + 7x -> 0.364 + 7x )
+            if(first or coef < 0): # If the next coefficient value is negative, don't add a "+" before it (e.g. x + -5y -> x -5y )
+                out = out + " " + term
+            else:
+                out = out + " + " + term
+            first = False
+        eqns.append(out)
+    return eqns
@@ -0,0 +1,188 @@
+# SEED 2.0 online fitting
+# Keeps a model up to date with data that keeps arriving, e.g. from a live rig, without refitting the whole history. Each batch of new samples
+# is differentiated (with a halo of samples from the batch before, see streaming.ChunkDifferentiator) and added to the running totals
+# Theta^T Theta and Theta^T dX/dt of the full feature library. Between re-sparsifications, the coefficients of the terms already chosen
+# are updated by least squares from the totals: recursive least squares in information form, which gives the same coefficients as the
+# usual covariance form without its loss of accuracy over long runs. Every few batches, the configured sparse regression is run again on
+# the totals (see streaming.Statistics.compressed), so terms can be added or dropped. The cost of an update depends on the batch size and
+# the number of library features, never on the number of samples seen before
+
+import csv
+import os
+import time
+
+import numpy as np
+
+from . import engine, streaming
+from .model import Model
+
+# An online model of a system with variables variable_names, fitted with the optimizer, differentiator and feature library of config (other
+# options raise a ValueError, see streaming.streamed_config). The sparse regression is rerun every
+# resparsify batches. With forget below 1, earlier samples count less: each sample's weight is multiplied by forget for every later
+# sample, so the model follows a system that changes slowly (the weights halve every log(0.5)/log(forget) samples). The weights depend only
+# on the number of samples since, not on how they were split into batches
+class OnlineModel:
+    def __init__(self, variable_names, config=None, resparsify=10, forget=1.0, halo=32):
+        self.config = streaming.streamed_config(config, "online")
+        self.opt, diff, self.feat = engine.build(self.config)
+        self.variable_names = list(variable_names)
+        self.feat.fit(np.zeros((2, len(self.variable_names)))) # The library only needs the number of variables
+        self.feats = list(self.feat.get_feature_names(self.variable_names))
+        self.stats = streaming.Statistics(len(self.feats), len(self.variable_names))
+        self.chunks = streaming.ChunkDifferentiator(diff, halo)
+        self.coefs = np.zeros((len(self.variable_names), len(self.feats)))
+        self.resparsify = resparsify
+        self.forget = forget
+        self.batches = 0 # Number of batches added
+        self.since = None # Batches fitted since the sparse regression was last run, None before it first runs
+        self.x0 = None # The first data point
+        self.t_range = None # The first and last time
+
+    # Add a batch of new samples (times, and one row of data per time) and update the model, returning a report of the update:
+    # the number of samples fitted (the last halo samples wait for the next batch), the model's score on them before the update
+    # (how well the model predicted the new data), its score on every sample so far after the update, its number of terms and
+    # whether the sparse regression was rerun
+    def update(self, time_chunk, data_chunk):
+        time_chunk = np.asarray(time_chunk, dtype=float)
+        data_chunk = np.asarray(data_chunk, dtype=float)
+        if data_chunk.ndim != 2 or data_chunk.shape != (len(time_chunk), len(self.variable_names)):
+            raise ValueError("The batch needs one row per time, with a column for each of " + ", ".join(self.variable_names))
+        if len(time_chunk) == 0:
+            return self.report(0, None, False)
+        if self.x0 is None:
+            self.x0 = data_chunk[0].copy()
+            self.t_range = (time_chunk[0], time_chunk[-1])
+        self.t_range = (self.t_range[0], time_chunk[-1])
+        self.batches += 1
+        return self.fit(self.chunks.add(time_chunk, data_chunk))
+
+    # Fit the samples still waiting for the next batch (differentiated without the samples after them), e.g. at the end of a recording
+    def flush(self):
+        return self.fit(self.chunks.finish())
+
+    # Add the ready (data, derivatives) rows to the totals and update the coefficients
+    def fit(self, ready):
+        if ready is None:
+            return self.report(0, None, False)
+        theta = np.asarray(self.feat.transform(ready[0]))
+        x_dot, theta = engine.drop_nan_rows(ready[1], theta)
+        if len(x_dot) == 0:
+            return self.report(0, None, False)
+        batch_score = float(engine.score(self.coefs, theta, x_dot)) if self.since is not None else None # Before the model has seen these samples
+
+        if self.forget < 1: # The samples before the batch lose a factor of forget per new sample, and each new one per new sample after it
+            self.stats.scale(self.forget ** len(x_dot))
+            self.stats.add(theta, x_dot, self.forget ** np.arange(len(x_dot) - 1, -1, -1))
+        else:
+            self.stats.add(theta, x_dot)
+        resparsified = self.since is None or self.since + 1 >= self.resparsify
+        if resparsified:
+            theta_c, x_dot_c = self.stats.compressed()
+            self.coefs = engine.regress(theta_c, x_dot_c, self.opt) # The configured sparse regression, on every sample so far
+            self.since = 0
+        else:
+            self.coefs = self.stats.refit(self.coefs) # Least squares on the terms already chosen
+            self.since += 1
+        return self.report(len(x_dot), batch_score, resparsified)
+
+    def report(self, n_new, batch_score, resparsified):
+        return {
+            "batch": self.batches,
+            "n_new": n_new,
+            "n_samples": self.stats.n_samples, # The total weight of the samples with forget below 1
+            "batch_score": batch_score,
+            "score": self.score(),
+            "n_terms": int(np.count_nonzero(self.coefs)),
+            "resparsified": resparsified,
+        }
+
+    # R^2 of the predicted derivatives over every sample so far (weighted, with forget below 1), None before any have been fitted
+    def score(self):
+        return self.stats.score(self.coefs) if self.stats.n_samples else None
+
+    # The current model
+    def model(self):
+        return Model(self.coefs.copy(), self.feats, self.variable_names, self.feat)
+
+    # The current model as a result in the same form as streaming.stream_fit(), e.g. to write with engine.write_results()
+    def result(self):
+        model = self.model()
+        score = self.score()
+        return {
+            "model": model,
+            "coefs": model.coefs,
+            "sparse": model.sparse,
+            "inclusion": None,
+            "precision": None,
+            "sampling": None,
+            "feats": model.feats,
+            "variable_names": list(self.variable_names),
+            "score": np.nan if score is None else score,
+            "n_samples": int(round(self.stats.n_samples)),
+            "x0": self.x0,
+            "t_range": self.t_range,
+            "fingerprint": None, # The data isn't kept to be hashed
+            "time_series": None,
+            "contents": None,
+            "sim_time": None,
+            "sim_data": None,
+            "config": self.config,
+        }
+
+# Yield (time series, data) batches of the rows appended to a .csv data file as it's written, e.g. by an acquisition rig, waiting interval
+# seconds whenever there are no new complete rows. A batch is yielded once it has batch_rows rows, or when no more have arrived for an
+# interval. Stops once no rows have arrived for timeout seconds (None never stops, e.g. until interrupted). The first row is the variable names
+def follow_chunks(path, batch_rows=1000, interval=1.0, timeout=None):
+    with open(path, newline='') as fil:
+        while not fil.readline().endswith("\n"): # The variable names, which may still be being written
+            time.sleep(interval)
+        rest = "" # A row not finished being written
+        rows = []
+        last = time.time()
+        while True:
+            text = fil.read()
+            if text:
+                lines = (rest + text).split("\n")
+                rest = lines.pop() # Empty if the text ended with a complete row
+                rows += [[float(val) for val in line.split(",")] for line in lines if line.strip()]
+                last = time.time()
+            while len(rows) >= batch_rows or (rows and not text):
+                data = np.array(rows[:batch_rows])
+                rows = rows[batch_rows:]
+                yield data[:, 0], data[:, 1:]
+            if not text:
+                if timeout is not None and time.time() - last >= timeout:
+                    return
+                time.sleep(interval)
+
+# The variable names of a .csv data file, from its first row
+def read_variable_names(path):
+    with open(path, newline='') as csvfile:
+        return next(csv.reader(csvfile))[1:]
+
+# Add a .csv data file to an online model a batch of batch_rows rows at a time, calling report (if given) with the report of every update
+# With follow, rows appended to the file are fitted as they're written, until none have arrived for timeout seconds (None: until interrupted).
+# An interrupt (Ctrl+C) is raised as usual, online keeps the model fitted until then
+def update_file(online, path, batch_rows=1000, follow=False, interval=1.0, timeout=None, report=None):
+    chunks = follow_chunks(path, batch_rows, interval, timeout) if follow else streaming.iter_chunks(path, batch_rows)
+    for time_chunk, data_chunk in chunks:
+        update = online.update(time_chunk, data_chunk)
+        if report is not None:
+            report(update)
+
+# Fit the last rows of the data file path still waiting in online (see OnlineModel.flush) and return the model's result with the data file
+def finish_file(online, path, report=None):
+    update = online.flush()
+    if report is not None and update["n_new"]:
+        report(update)
+    result = online.result()
+    result["data"] = os.path.abspath(path)
+    return result
+
+# Fit an online model to a .csv data file a batch of batch_rows rows at a time, calling report (if given) with the report of every update
+# With follow, rows appended to the file are fitted as they're written, until none have arrived for timeout seconds (None: until interrupted)
+# Returns the model's result (see OnlineModel.result) with the data file
+def run_file(path, config=None, batch_rows=1000, resparsify=10, forget=1.0, halo=32, follow=False, interval=1.0, timeout=None, report=None):
+    online = OnlineModel(read_variable_names(path), config, resparsify, forget, halo)
+    update_file(online, path, batch_rows, follow, interval, timeout, report)
+    return finish_file(online, path, report)
@@ -0,0 +1,130 @@
+# SEED 2.0 regularization path
+# Fits the model for a whole sequence of values of one sparsity parameter of the optimizer (e.g. the STLSQ threshold) on the same library
+# matrix, which is differentiated and evaluated only once. Each fit is warm started from the coefficients of the one before when the
+# optimizer takes an initial guess, so it begins from the support already found. The models are compared by their number of terms
+# against their error, and the Pareto optimal ones (no other model is both as sparse and more accurate) are marked for the user to pick from
+
+import csv
+
+import numpy as np
+
+from . import cache, engine, registry, sampling
+from .model import Model
+from .stages import stage, check_cancel
+
+# Columns of the path table
+table_columns = ["value", "n_terms", "error", "score", "pareto", "equations"]
+
+default_points = 20 # Number of values in the default path
+
+# Can the optimizer be warm started, i.e. does it take the coefficients to start from as "initial_guess"?
+def warm_start(option):
+    return any(param["name"] == "initial_guess" for param in registry.params("opt", option))
+
+# The default values of the threshold: from the largest coefficient of the least squares fit (which removes every term) down to
+# a ten thousandth of it, evenly spaced on a log scale
+def default_values(theta, x_dot, num=default_points):
+    coefs = np.linalg.lstsq(theta, x_dot, rcond=None)[0]
+    top = np.max(np.abs(coefs)) or 1.0
+    return list(np.geomspace(top * 1e-4, top, num))
+
+# Mean squared error of the derivatives predicted by the coefficients
+def error(coefs, theta, x_dot):
+    return float(np.mean((theta @ coefs.T - x_dot)**2))
+
+# Mark the Pareto optimal points of the path: those with no other point that has at most as many terms and a lower error
+def mark_pareto(points):
+    for point in points:
+        point["pareto"] = not any(other["n_terms"] <= point["n_terms"] and other["error"] < point["error"] for other in points)
+    return points
+
+# Fit the path on data already in memory: the optimizer of config with its parameter param set to each of values in turn (default: a
+# threshold path from default_values()). The values are fitted from the smallest to the largest, i.e. from the densest model to the
+# sparsest. A hard thresholding optimizer like STLSQ can only remove terms from the support it starts from, so a warm start is only
+# valid in that direction. Returns the data and fitted library needed by select(), and the list of points, one per value
+def run_path(contents, time_series, variable_names, config=None, param="threshold", values=None, progress=None, cancel=None):
+    config = make_path_config(config)
+    opt, diff, feat = engine.build(config)
+    time_series = np.asarray(time_series, dtype=float)
+    data_fp = cache.data_key(time_series, contents)
+    rows = sampling.split(config, time_series)[0] if sampling.active(config) else None # Only the samples to fit, as in engine.fit
+    feat, theta, x_dot = engine.prepare(contents, time_series, diff, feat, progress, cancel, config, data_fp, rows)
+    if rows is not None:
+        x_dot = x_dot[rows]
+    x_dot, theta = engine.drop_nan_rows(x_dot, theta) # Once, rather than in every fit
+    if values is None:
+        if param != "threshold":
+            raise ValueError("Give the values of " + param + " for the path, only the threshold has default values")
+        values = default_values(theta, x_dot)
+    values = sorted(float(value) for value in values)
+    warm = warm_start(config["opt"])
+    feats = feat.get_feature_names(list(variable_names))
+
+    stage("fit", progress, cancel)
+    points = []
+    coefs = None
+    for value in values:
+        check_cancel(cancel)
+        params = dict(config["opt_params"], **{param: value})
+        if warm and coefs is not None and np.any(coefs): # An all zero guess would start from an empty support
+            params["initial_guess"] = coefs.copy()
+        coefs = engine.regress(theta, x_dot, engine.make_component("opt", config["opt"], params))
+        points.append({"value": value, "coefs": coefs, "n_terms": int(np.count_nonzero(coefs)), "error": error(coefs, theta, x_dot),
+                       "score": float(engine.score(coefs, theta, x_dot))})
+
+    stage("score", progress, cancel)
+    return {
+        "path": mark_pareto(points),
+        "param": param,
+        "warm_start": warm,
+        "feat": feat,
+        "feats": list(feats),
+        "variable_names": list(variable_names),
+        "time_series": time_series,
+        "contents": contents,
+        "config": config,
+        "fingerprint": data_fp,
+    }
+
+# Fit the path on a .csv data file
+def run_path_file(path, config=None, param="threshold", values=None, progress=None, cancel=None):
+    config = make_path_config(config)
+    stage("read", progress, cancel)
+    time_series, contents, variable_names = engine.read_file(path, cache=config["ingest_cache"])
+    result = run_path(contents, time_series, variable_names, config, param, values, progress, cancel)
+    result["data"] = path
+    return result
+
+# A path is always a single fit for each value, never an ensemble
+def make_path_config(config):
+    return engine.make_config(config, ensemble=0)
+
+# The result of the model at position index of the path, in the same form as engine.run() so it can be shown and saved like any other run
+# Its configuration has the path parameter set to the point's value. The model is simulated if the configuration asks for it
+def select(path_result, index, progress=None, cancel=None):
+    point = path_result["path"][index]
+    config = engine.make_config(path_result["config"], opt_params=dict(path_result["config"]["opt_params"], **{path_result["param"]: point["value"]}))
+    model = Model(point["coefs"], path_result["feats"], path_result["variable_names"], path_result["feat"])
+    result = engine.make_result(model, point["score"], path_result["contents"], path_result["time_series"], config, path_result["fingerprint"])
+    if config["simulate"]:
+        engine.simulate(result, progress=progress, cancel=cancel)
+    return result
+
+# The Pareto optimal points of the path, from the sparsest to the densest, with their positions in the path
+# Neighbouring values often give the same model, only the one with the smallest value is listed
+def front(path_result):
+    found = {}
+    for num, point in enumerate(path_result["path"]):
+        if point["pareto"] and point["n_terms"] not in found:
+            found[point["n_terms"]] = (num, point)
+    return [found[n_terms] for n_terms in sorted(found)]
+
+# Write the path to a .csv file, one row per value with the model's equations
+def write_table(path_result, path):
+    with open(path, "w", newline='') as fil:
+        writer = csv.DictWriter(fil, fieldnames=table_columns)
+        writer.writeheader()
+        for point in path_result["path"]:
+            model = Model(point["coefs"], path_result["feats"], path_result["variable_names"], path_result["feat"])
+            writer.writerow({"value": point["value"], "n_terms": point["n_terms"], "error": point["error"], "score": point["score"],
+                             "pareto": int(point["pareto"]), "equations": "; ".join(model.equations())})
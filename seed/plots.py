@@ -0,0 +1,85 @@
+# SEED 2.0 model plots
+# The figure shown in the "Model Plots" window: for each variable, a bar plot of the nonzero coefficients of its equation and the input data
+# against the model simulation. Built on a plain matplotlib Figure (not pyplot), so it can be drawn without a display, e.g. by the benchmarks
+
+from matplotlib.figure import Figure
+
+from .decimate import DecimatedLine
+
+# Build the model plots figure. contents (the input data) or sim_data can be None, e.g. for a loaded model or a run without a simulation
+# For an ensemble fit, inclusion (the probability of each term being included) is written above each bar
+def model_figure(contents, sim_time, sim_data, sparse, feats, time_series, variable_names, inclusion=None):
+    # Create a figure with the correct number of subplots
+    fig = Figure(figsize=(11, 2*len(variable_names)))
+    axs = fig.subplots(len(variable_names), 2, sharex=False, sharey=False, squeeze=False) # Always 2-D, so one dimensional systems are plotted the same way
+
+    # Plot the data on the subplots
+    plot_trajectory(axs[:, 1], contents, sim_time, sim_data, time_series, variable_names)
+    for i in range(len(variable_names)): # For every row of subplots
+        # The non zero coefficients of this equation, from the sparse coefficients
+        items, coef_plt = sparse.row(i) # Feature indices and non zero coefficient values
+        desc_plt = [feats[item] for item in items] # List of descriptors for the non zero variables
+
+        # Plot the non zero coefficient values as a bar plot
+        bars = axs[i, 0].bar(desc_plt,coef_plt)
+        if inclusion is not None:
+            axs[i, 0].bar_label(bars, labels=[format(inclusion[i, item], ".0%") for item in items], fontsize=8)
+        axs[i, 0].axhline(y=0, color='k')
+        axs[i, 0].set_title("d" + str(variable_names[i]) + "/dt",size=10)
+
+        # If the number of output coefficients is greater than 6, change the font size to 8
+        if len(coef_plt) > 6:
+            size = 8
+        else:
+            size = 10
+        plot_label = axs[i, 0].get_xticklabels() # Get all of the font label objects for the subplot
+        [each_label.set_fontsize(size) for each_label in plot_label] # Set the font size of the specific subplot
+
+    fig.subplots_adjust(hspace=0.3) # Add vertical space in between each row of subplots so they don't overlap
+    fig.tight_layout() # Remove excess whitespace from the top and bottom of the figure
+    return fig
+
+# Plot the input data and the forward simulated data obtained after creating the model, one variable on each of axs
+# Only about two points per pixel are drawn, recomputed when zooming or panning with the toolbar, so long data sets stay quick to display
+def plot_trajectory(axs, contents, sim_time, sim_data, time_series, variable_names):
+    for i in range(len(variable_names)):
+        if contents is not None: # A loaded model has no input data
+            DecimatedLine(axs[i], time_series, contents[:, i], 'k', label='input data')
+        if sim_data is not None:
+            DecimatedLine(axs[i], sim_time, sim_data[:, i], 'r--', label='model simulation') # The simulation can have fewer points than the data, see "Simulation Points"
+        if(i == 0):
+            axs[i].legend()
+        axs[i].set(xlabel='t', ylabel=variable_names[i].format(i))
+
+# Replace the data and simulation plots of a figure from model_figure() with those of another trajectory of a multi-trajectory fit
+def show_trajectory(fig, traj, variable_names):
+    axs = fig.axes[1::2] # The right hand column of subplots
+    for ax in axs:
+        ax.cla() # Also disconnects the decimated lines of the previous trajectory
+    plot_trajectory(axs, traj["contents"], traj["sim_time"], traj["sim_data"], traj["time_series"], variable_names)
+    for ax in axs:
+        ax.set_title(traj["name"] + ": score " + format(traj["score"], ".6f"), size=10)
+
+# Build the figure of a regularization path (see pareto.py): the error of every model on the path against its number of terms, with the
+# Pareto optimal models joined up and labelled with their parameter value. Every point can be picked (clicked), its index in the path
+# is the index of the picked point
+def path_figure(path_result):
+    points = path_result["path"]
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    ax.plot([point["n_terms"] for point in points], [point["error"] for point in points], 'o', color='0.6', picker=5, label='model on the path')
+    best = [point for point in points if point["pareto"]]
+    best.sort(key=lambda point: point["n_terms"])
+    ax.plot([point["n_terms"] for point in best], [point["error"] for point in best], 'r-o', drawstyle='steps-post', label='Pareto front')
+    labelled = set()
+    for point in best:
+        if point["n_terms"] not in labelled: # Neighbouring values often give the same model, label it once
+            labelled.add(point["n_terms"])
+            ax.annotate(format(point["value"], ".3g"), (point["n_terms"], point["error"]), textcoords="offset points", xytext=(4, 4), fontsize=8)
+    if all(point["error"] > 0 for point in points):
+        ax.set_yscale("log")
+    ax.set(xlabel='number of terms', ylabel='mean squared error of the derivatives')
+    ax.set_title(path_result["param"] + " path (click a model to open it)", size=10)
+    ax.legend()
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,130 @@
+# SEED 2.0 reduced precision
+# With the "precision" option set to "float32", the data is differentiated, the feature library evaluated and the sparse regression run
+# in single precision, which halves the size of the library matrix (the largest array of a run). The accuracy lost is measured against a
+# double precision fit without a double precision copy of the library matrix: Theta^T Theta and Theta^T dX/dt are accumulated in float64 a
+# block of rows at a time, from which the regression is run again in float64. The float64 derivatives and library matrix are reused from
+# the memo cache when an earlier float64 run left them there; otherwise the data is only differentiated and the library evaluated again on
+# random runs of consecutive samples (about reference_rows of them), so checking doesn't cost as much as the fit it checks
+
+import numpy as np
+
+from . import engine, streaming # Imported as modules, both import this module through the engine
+
+precisions = {"float64": np.float64, "float32": np.float32} # The "precision" option: the floating point type of the data and library matrix
+
+block_rows = 65536 # Rows of the float64 library matrix evaluated at a time
+
+reference_rows = 100000 # About the largest number of samples differentiated and evaluated again in float64 for the reference fit
+segment_rows = 8192 # The samples are taken in random runs of this many consecutive samples
+halo = 32 # Samples of overlap each run is differentiated with, as in streaming.ChunkDifferentiator
+
+seed = 0 # Seed of the random choice, so the same data is always checked on the same samples
+
+# Largest condition number of the library matrix (with its columns scaled to unit length) for which the regression is run in float32.
+# The relative error of a least squares solve is about the condition number times the machine precision, 6e-8 for float32, and the
+# thresholding steps of a sparse regression can choose different terms once that error is large
+max_condition = 1e5
+
+# The floating point type of a run configuration's "precision" option
+def data_type(config):
+    if config["precision"] not in precisions:
+        raise ValueError("Unknown precision: " + str(config["precision"]) + " (choose from " + ", ".join(precisions) + ")")
+    return precisions[config["precision"]]
+
+# Is the run configured for reduced precision?
+def reduced(config):
+    return data_type(config) != np.float64
+
+# The runs of samples, as (start, end) pairs, of data with n samples (n_fitted of them fitted) the reference fit is made on: random runs of
+# segment_rows samples with about max_rows fitted samples in total, or None for all of them (if there aren't more, or max_rows is None)
+def reference_segments(n, n_fitted, max_rows=reference_rows):
+    if max_rows is None or n_fitted <= max_rows:
+        return None
+    n_runs = int(np.ceil(n / segment_rows))
+    chosen = np.random.default_rng(seed).choice(n_runs, min(n_runs, int(np.ceil(n_runs * max_rows / n_fitted))), replace=False)
+    return [(start * segment_rows, min(n, (start + 1) * segment_rows)) for start in np.sort(chosen)]
+
+# Theta^T Theta, Theta^T x_dot and the score totals (see streaming.Statistics) of the library matrix and derivatives in float64, for the
+# reference fit: the data is differentiated in float64 and the fitted library feat evaluated on it a block of rows at a time, so there is
+# never a float64 copy of the whole library matrix. x_dot and theta are the float64 derivatives and library matrix of all the data if
+# already known (e.g. from the memo cache), used instead. With rows, only those rows are added (as for a subsampled fit), and with segments
+# only the rows in those runs (see reference_segments), each differentiated with halo samples either side: exact for local differentiation
+# options such as finite differences, close for the others. The totals are added to stats if given (e.g. those of the other trajectories)
+def float64_statistics(contents, time_series, diff, feat, rows=None, stats=None, x_dot=None, theta=None, segments=None):
+    n = len(time_series)
+    for first, last in segments or [(0, n)]:
+        if x_dot is not None:
+            run_x_dot = x_dot[first:last]
+        else:
+            low, high = (first, last) if segments is None else (max(0, first - halo), min(n, last + halo))
+            run_x_dot = engine.differentiate(np.asarray(contents[low:high], dtype=float), time_series[low:high], diff)[first-low:last-low]
+        run_rows = np.arange(first, last) if rows is None else rows[np.searchsorted(rows, first):np.searchsorted(rows, last)]
+        for start in range(0, len(run_rows), block_rows):
+            part = run_rows[start:start+block_rows]
+            block = theta[part] if theta is not None else feat.transform(np.asarray(contents[part], dtype=float))
+            block = np.asarray(block, dtype=float)
+            if stats is None:
+                stats = streaming.Statistics(block.shape[1], run_x_dot.shape[1])
+            stats.add(block, run_x_dot[part - first])
+    return stats
+
+# The condition number of the library matrix with its columns scaled to unit length, from Theta^T Theta
+def condition(stats):
+    norms = np.sqrt(np.diag(stats.gram))
+    norms[norms == 0] = 1.0
+    return float(np.sqrt(np.linalg.cond(stats.gram / np.outer(norms, norms)))) # The Gram matrix has the square of the library matrix's condition number
+
+# Compare the coefficients coefs fitted in reduced precision (of type dtype) with a float64 fit, returning the coefficients to use and a
+# report of the accuracy lost. stats are the float64 totals of float64_statistics(): the float64 fit is the configured regression on a
+# compressed problem with the same normal equations (see streaming.Statistics.compressed), and both fits are scored on the float64 data.
+# The reduced precision fit is returned, unless the library matrix is too ill-conditioned for it (see max_condition), when the float64
+# fit is returned instead: if stats are of a sample of the rows, full_statistics() gives the totals of all of them for that fit. An ensemble
+# fit has no float64 fit to compare with (that would mean resampling a float64 library matrix), so only its score on the float64 data is reported
+def check(coefs, stats, opt, dtype, ensemble=False, full_statistics=None):
+    coefs = np.asarray(coefs, dtype=float)
+    report = {
+        "precision": np.dtype(dtype).name,
+        "reference_samples": int(stats.n_samples), # Number of samples the float64 fit and the scores are on
+        "sampled": full_statistics is not None, # Are they random runs of the samples fitted?
+        "condition": condition(stats),
+        "score_float32": stats.score(coefs), # Of the reduced precision fit
+        "terms_float32": int(np.count_nonzero(coefs)),
+        "score_float64": None, # Of the float64 fit
+        "terms_float64": None,
+        "max_coef_change": None, # Largest difference between the coefficients of the two fits, relative to the largest coefficient
+    }
+    report["safe"] = report["condition"] < max_condition
+    final = coefs
+    if not ensemble:
+        reference = engine.regress(*stats.compressed(), opt)
+        report["score_float64"] = stats.score(reference)
+        report["terms_float64"] = int(np.count_nonzero(reference))
+        report["max_coef_change"] = float(np.max(np.abs(coefs - reference)) / (np.max(np.abs(reference)) or 1.0))
+        if not report["safe"]:
+            if full_statistics is not None: # The model used has to be fitted on every sample
+                stats = full_statistics()
+                reference = engine.regress(*stats.compressed(), opt)
+            final = reference
+    report["refit"] = "float64 regression" if final is not coefs else None
+    report["score"] = stats.score(final)
+    report["terms"] = int(np.count_nonzero(final))
+    return final, report
+
+# One line of text for a report, e.g. for the output window
+def summary(report):
+    text = report["precision"] + ": "
+    if report["refit"]:
+        text += "the library is too ill-conditioned (condition number " + format(report["condition"], ".3g") + "), the float64 fit is used. "
+    elif not report["safe"]:
+        text += "the library may be too ill-conditioned (condition number " + format(report["condition"], ".3g") + "). "
+    if "score_float64" not in report: # Saved by an older version, which didn't fit in float64
+        return text + "Score " + format(report["score"], ".6f")
+    if report["score_float64"] is None:
+        return text + "Score on the float64 data " + format(report["score_float32"], ".6f") + " (an ensemble fit isn't compared with a float64 fit)"
+    text += "Score change against a float64 fit " + format(report["score_float32"] - report["score_float64"], ".2g")
+    if report.get("sampled"):
+        text += " (on " + str(report["reference_samples"]) + " of the samples)"
+    text += ", largest coefficient difference " + format(report["max_coef_change"], ".2g")
+    if report["terms_float32"] != report["terms_float64"]:
+        text += ", " + str(report["terms_float32"]) + " terms against " + str(report["terms_float64"])
+    return text
@@ -0,0 +1,173 @@
+# SEED 2.0 option registry
+# The optimizers, differentiators and feature libraries in the installed PySINDy, with their class names and parameters.
+# The registry is built once per PySINDy version (parsing and importing the PySINDy source files) and saved as json in the cache folder,
+# so that changing a selection on the GUI or running a fit only looks the option up
+
+import ast # ast is used to find the class name of an option from its PySINDy source file
+import hashlib
+import importlib
+import json
+import os
+import threading
+from importlib.util import find_spec
+
+FORMAT = 1 # Increase when the layout of the saved registry changes, so old files are rebuilt
+
+# PySINDy source folder holding the options for each component
+option_dirs = {"opt": "optimizers", "diff": "differentiation", "feat": "feature_library"}
+
+# Files in the option folders that aren't options, e.g. base classes
+excluded = {
+    "opt": ["base", "sindy_optimizer"],
+    "diff": ["base", "sindy_derivative"], # sindy_derivative came in a PySINDy update at the end of the project, support for this option needs to be added
+    "feat": ["base", "custom_library", "feature_library"],
+}
+
+# The Python types that parameter types are saved as, used to convert entered text back into a value
+param_types = {"bool": bool, "int": int, "float": float, "str": str, "NoneType": type(None), "list": list, "tuple": tuple, "dict": dict}
+
+_registry = None # The loaded registry, shared by every caller in the process
+_lock = threading.Lock() # The registry can be read from several threads, e.g. the GUI loads it on its background loader thread
+
+# File path for the pysindy module within the python files, found without importing it
+def pysindy_path():
+    return find_spec("pysindy").submodule_search_locations[0]
+
+def pysindy_version():
+    from importlib.metadata import version, PackageNotFoundError # Imported here, like inspect below, as they are slow to import and the GUI loads the registry at start up
+    try:
+        return version("pysindy")
+    except PackageNotFoundError: # e.g. running from a source checkout of PySINDy
+        return "unknown"
+
+# Folder the registry is saved in, can be moved with the SEED_CACHE_DIR environment variable
+def cache_dir():
+    return os.path.join(os.environ.get("SEED_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "seed")), "registry")
+
+# The registry file for the installed PySINDy, named after its version and location so that separate installs don't share a file
+def cache_path(folder=None):
+    where = hashlib.sha1(pysindy_path().encode("utf-8")).hexdigest()[:12]
+    return os.path.join(folder or cache_dir(), "pysindy-" + pysindy_version() + "-" + where + ".json")
+
+# The name of the first class in an option's PySINDy source file
+def source_class_name(path):
+    with open(path) as fil:
+        par = ast.parse(fil.read())
+    classes = [node.name for node in ast.walk(par) if isinstance(node, ast.ClassDef)]
+    return classes[0] if classes else None
+
+# Describe one parameter of a class constructor: the text of its default value as shown on the GUI and the type it's converted back to
+def describe_param(param):
+    import inspect
+    if param.default is inspect.Parameter.empty: # Parameters with no default value are entered as text
+        return {"name": param.name, "text": "", "type": "str", "required": True}
+    value = param.default
+    if inspect.isfunction(value) or inspect.isbuiltin(value): # Parameters that are functions are written as "func <name>", e.g. "func savgol_filter"
+        return {"name": param.name, "text": "func " + value.__name__, "type": "str", "required": False}
+    type_name = type(value).__name__
+    return {"name": param.name, "text": str(value), "type": type_name if type_name in param_types else "object", "required": False}
+
+# Describe one option, importing its PySINDy module to read the class constructor
+def describe_option(kind, option, path):
+    import inspect
+    class_name = source_class_name(path)
+    if class_name is None:
+        return None
+    module = "pysindy." + option_dirs[kind] + "." + option
+    try:
+        cls = getattr(importlib.import_module(module), class_name)
+    except Exception as err: # e.g. an option needing an optional dependency that isn't installed
+        return {"class": class_name, "module": module, "params": [], "available": False, "error": str(err) or type(err).__name__}
+
+    params = [describe_param(param) for param in inspect.signature(cls.__init__).parameters.values()
+              if param.name != "self" and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)]
+    return {"class": class_name, "module": module, "params": params, "available": True, "error": None}
+
+# Build the registry from the installed PySINDy
+def build():
+    root = pysindy_path()
+    options = {}
+    for kind, folder in option_dirs.items():
+        options[kind] = {}
+        for file in sorted(os.listdir(os.path.join(root, folder))):
+            option = file[:-3]
+            if file.startswith((".", "_")) or not file.endswith(".py") or option in excluded[kind]:
+                continue
+            entry = describe_option(kind, option, os.path.join(root, folder, file))
+            if entry is not None:
+                options[kind][option] = entry
+    return {"format": FORMAT, "pysindy_version": pysindy_version(), "pysindy_path": root, "options": options}
+
+# Read a saved registry, returning None if there isn't one for the installed PySINDy
+def read(path):
+    try:
+        with open(path) as fil:
+            registry = json.load(fil)
+    except (OSError, ValueError):
+        return None
+    if registry.get("format") != FORMAT or registry.get("pysindy_path") != pysindy_path():
+        return None
+    return registry
+
+def write(registry, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + "." + str(os.getpid()) + ".tmp"
+    with open(tmp, "w") as fil:
+        json.dump(registry, fil, indent=1)
+    os.replace(tmp, path) # Replaced in one step so another process never reads a half written file
+
+# The registry for the installed PySINDy: from memory, else from the cache folder, else built and saved
+# refresh=True rebuilds it, e.g. after installing an optional dependency of an option
+def load(refresh=False, cache=True):
+    global _registry
+    with _lock:
+        if _registry is not None and not refresh:
+            return _registry
+        path = cache_path()
+        registry = None if (refresh or not cache) else read(path)
+        if registry is None:
+            registry = build()
+            if cache:
+                try:
+                    write(registry, path)
+                except OSError: # A read-only cache folder only means the registry is built again next time
+                    pass
+        _registry = registry
+        return registry
+
+# The names of the available options for a component, e.g. options("opt") -> ["constrained_sr3", "frols", ...]
+def options(kind):
+    return sorted(option for option, entry in load()["options"][kind].items() if entry["available"])
+
+# The registry entry of an option
+def entry(kind, option):
+    found = load()["options"][kind].get(option)
+    if found is None:
+        raise ValueError("Unknown " + option_dirs[kind] + " option: " + str(option))
+    if not found["available"]:
+        raise ValueError("The " + str(option) + " option can't be used: " + found["error"])
+    return found
+
+def class_name(kind, option):
+    return entry(kind, option)["class"]
+
+# The class object of an option
+def get_class(kind, option):
+    found = entry(kind, option)
+    return getattr(importlib.import_module(found["module"]), found["class"])
+
+# The constructor parameters of an option, as a list of {"name", "text", "type", "required"}
+def params(kind, option):
+    return entry(kind, option)["params"]
+
+# The Python type a parameter's entered text is converted to, None if it isn't a simple type
+def param_type(param):
+    return param_types.get(param["type"])
+
+# Delete the saved registries
+def clear_cache(folder=None):
+    folder = folder or cache_dir()
+    if os.path.isdir(folder):
+        for file in os.listdir(folder):
+            if file.endswith(".json"):
+                os.remove(os.path.join(folder, file))
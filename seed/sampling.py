@@ -0,0 +1,83 @@
+# SEED 2.0 subsampled fitting
+# For long, densely sampled recordings most rows of the library matrix are redundant for the regression. With the "sample" option set, the
+# data is still differentiated at full resolution, but the feature library is only evaluated, and the model only fitted, on a subset of the
+# samples: every stride-th one, a fixed number chosen at random, or those in a time window. The model is then scored on held-out samples (those
+# not fitted), at most holdout_size of them and a block at a time, so the time and memory of the fit and score don't grow with the length
+# of the recording. Only the derivatives, one value per sample and variable, are of the whole recording
+
+import numpy as np
+
+from . import streaming # Imported as a module, it imports the engine which imports this module
+
+methods = ["stride", "random", "window"] # The "sample" option: how the samples to fit are chosen (None fits every sample)
+
+block_rows = 65536 # Held-out samples scored at a time
+
+seed = 0 # Seed of the random choices, so the same options always fit and score the same samples
+
+# Is the run configured to fit a subset of the samples?
+def active(config):
+    return config["sample"] is not None
+
+# The rows of the data to fit and the held-out rows to score the model on, as sorted index arrays, for the "sample" options of config:
+# "stride" fits every sample_stride-th sample, "random" sample_size samples chosen at random and "window" the samples with times in
+# sample_window (start, end). The held-out rows are the others, or holdout_size of them chosen at random if there are more
+def split(config, time_series):
+    n = len(time_series)
+    rng = np.random.default_rng(seed)
+    method = config["sample"]
+    if method == "stride":
+        stride = int(config["sample_stride"])
+        if stride < 1:
+            raise ValueError("The sample stride needs to be at least 1")
+        rows = np.arange(0, n, stride)
+    elif method == "random":
+        size = int(config["sample_size"])
+        if size < 1:
+            raise ValueError("The sample size needs to be at least 1")
+        rows = np.sort(rng.choice(n, min(size, n), replace=False))
+    elif method == "window":
+        if config["sample_window"] is None:
+            raise ValueError("Give the start and end times of the sample window")
+        start, end = config["sample_window"]
+        rows = np.flatnonzero((time_series >= start) & (time_series <= end))
+    else:
+        raise ValueError("Unknown sample method: " + str(method) + " (choose from " + ", ".join(methods) + ")")
+    if len(rows) < 2:
+        raise ValueError("Fewer than 2 samples to fit with the " + method + " sample options")
+
+    held = np.ones(n, dtype=bool)
+    held[rows] = False
+    held_out = np.flatnonzero(held)
+    if len(held_out) > config["holdout_size"]:
+        held_out = np.sort(rng.choice(held_out, int(config["holdout_size"]), replace=False))
+    return rows, held_out
+
+# Score the coefficients on the held-out rows of the data, evaluating the fitted library feat a block of rows at a time
+def holdout_score(coefs, feat, contents, x_dot, held_out):
+    stats = streaming.Statistics(coefs.shape[1], coefs.shape[0])
+    for start in range(0, len(held_out), block_rows):
+        part = held_out[start:start+block_rows]
+        stats.add(np.asarray(feat.transform(np.asarray(contents[part])), dtype=float), np.asarray(x_dot[part], dtype=float))
+    return stats.score(coefs) if stats.n_samples else None
+
+# The report of a subsampled fit: how the samples were chosen, how many were fitted and held out, and the model's score on each.
+# "score" is the held-out score, or the score on the fitted samples if none were held out (e.g. a window over the whole recording)
+def evaluate(config, coefs, feat, contents, x_dot, rows, held_out, fit_score):
+    held = holdout_score(coefs, feat, contents, x_dot, held_out)
+    return {
+        "sample": config["sample"],
+        "n_fit": int(len(rows)),
+        "n_held_out": int(len(held_out)),
+        "fit_score": float(fit_score),
+        "score": float(fit_score if held is None else held),
+    }
+
+# One line of text for a report, e.g. for the output window
+def summary(report):
+    text = report["sample"] + ": fitted on " + str(report["n_fit"]) + " samples"
+    if report["n_held_out"]:
+        text += ", score on " + str(report["n_held_out"]) + " held-out samples " + format(report["score"], ".6f")
+    else:
+        text += ", no samples held out"
+    return text + " (on the fitted samples " + format(report["fit_score"], ".6f") + ")"
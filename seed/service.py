@@ -0,0 +1,391 @@
+# SEED 2.0 fitting service
+# Runs the read/fit/score/simulate pipeline for everyone using one machine, instead of each user starting their own copy of the GUI.
+# Fits are submitted as JSON over HTTP, on a Unix socket (by default) or a local port, and run on a fixed number of worker threads from a
+# queue ordered by priority (see jobs.py). The heavy modules (numpy, PySINDy) are imported once when the service starts, and every fit shares the memo
+# cache of derivatives and library matrices and the result store. Results are fetched by job id:
+#
+#   POST   /jobs              {"data": "/path/to/data.csv", "config": {...}, "priority": 0, "name": "...", "out": "/path/to/results"}
+#                             "data" can also be a list of files, fitted together as trajectories, or the data can be given as
+#                             "time_series", "contents" and "variable_names". Returns the job's status, with its "id"
+#   GET    /jobs              the status of every job
+#   GET    /jobs/<id>         the status of one job
+#   GET    /jobs/<id>/result  the model and score of a finished job. ?wait=<seconds> waits for it to finish, ?simulation=1 adds the simulation
+#   DELETE /jobs/<id>         cancel a queued or running job, or forget a finished one
+#   GET    /health            the number of workers and of queued and running jobs
+#
+# The service reads and writes files as the user running it, so what other users can make it do is limited: the Unix socket can only be
+# opened by that user (its permissions are 0600), a port needs the token given when the service starts (sent as "Authorization: Bearer
+# <token>"), and data files and result folders have to be inside the allowed root folders (by default, the folder the service was started in)
+# File paths are best given in full (relative paths are from the folder the service was started in)
+
+import hmac
+import http.client
+import json
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from . import engine, trajectories
+from .jobs import JobQueue
+
+default_host = "127.0.0.1" # Only reachable from the machine itself
+default_port = 8765
+
+# Folder the service's socket and token files are kept in, can be moved with the SEED_CACHE_DIR environment variable
+def service_dir():
+    return os.environ.get("SEED_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "seed"))
+
+# The default Unix socket and token file
+def default_socket():
+    return os.path.join(service_dir(), "service.sock")
+
+def default_token_file():
+    return os.path.join(service_dir(), "service.token")
+
+max_body = 256 * 1024 * 1024 # Largest request accepted, in bytes (data sent in the request is held in memory)
+
+# The queue of fits, the limits on how many are kept and what clients are allowed to do
+# Data files and result folders have to be inside one of roots (default: the current folder). With token, every request has to give it
+class Service:
+    def __init__(self, workers=1, max_queued=100, keep=1000, verbose=False, roots=None, token=None):
+        self.queue = JobQueue(workers, events=False) # Nothing reads the event queue, the status is read from the jobs
+        self.roots = [os.path.realpath(root) for root in (roots or [os.getcwd()])]
+        self.token = token
+        self.workers = workers
+        self.max_queued = max_queued # Submissions are refused while this many jobs are waiting
+        self.keep = keep # Finished jobs kept for their results, the oldest are forgotten beyond this
+        self.verbose = verbose # Log every request
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    # Check a submitted request and queue its fit, returning the job. Raises a ValueError for an invalid request and a
+    # QueueFull error when too many jobs are waiting
+    def submit(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("The request must be a JSON object")
+        config = engine.config_from_json(request.get("config") or {}) # An unknown option raises a KeyError, reported like a ValueError
+        priority = int(request.get("priority", 0))
+        if "data" in request:
+            paths = request["data"] if isinstance(request["data"], list) else [request["data"]]
+            for path in paths:
+                if not os.path.exists(str(path)):
+                    raise ValueError("No such data file: " + str(path))
+                self.check_allowed(path)
+            name = request.get("name") or os.path.splitext(os.path.basename(os.path.normpath(paths[0])))[0]
+            data = trajectories.data_files(paths) # Folders replaced by their files, each of which has to be allowed too (e.g. not a link out of the root)
+            for path in data:
+                self.check_allowed(path)
+        elif "contents" in request:
+            time_series = np.asarray(request.get("time_series"), dtype=float)
+            contents = np.asarray(request["contents"], dtype=float)
+            variable_names = [str(name) for name in request.get("variable_names") or []]
+            if contents.ndim != 2 or time_series.shape != (len(contents),) or len(variable_names) != contents.shape[1]:
+                raise ValueError("contents must be one row per time in time_series, with a column for each of variable_names")
+            name = request.get("name") or "data"
+            data = (time_series, contents, variable_names)
+        else:
+            raise ValueError("Give the data to fit, as \"data\" (a .csv file or a list of them) or \"time_series\", \"contents\" and \"variable_names\"")
+        name = str(name)
+        if name in ("", ".", "..") or os.path.basename(name) != name or (os.altsep and os.altsep in name): # The results are written as out/<name>_*
+            raise ValueError("The name has to be a file name without a folder: " + name)
+        out = request.get("out")
+        if out:
+            self.check_allowed(out)
+            self.check_allowed(os.path.join(out, name)) # e.g. not a link out of the root
+
+        with self._lock: # So two submissions can't both take the last place in the queue
+            if len(self.queue.queued()) >= self.max_queued:
+                raise QueueFull(str(self.max_queued) + " jobs are already waiting, try again later")
+            job = self.queue.submit(name, lambda progress, cancel: run_job(data, config, name, out, progress, cancel), priority)
+        self.prune()
+        return job
+
+    # Raise a ValueError unless path (with any links followed) is inside one of the allowed roots
+    def check_allowed(self, path):
+        real = os.path.realpath(str(path))
+        if not any(real == root or real.startswith(root.rstrip(os.sep) + os.sep) for root in self.roots):
+            raise ValueError(str(path) + " isn't inside the folders the service is allowed to use (" + ", ".join(self.roots) + ")")
+
+    # Does a request's Authorization header give the token (if the service has one)?
+    def authorized(self, header):
+        return self.token is None or hmac.compare_digest((header or "").encode("utf-8"), ("Bearer " + self.token).encode("utf-8"))
+
+    # Forget the oldest finished jobs beyond the number kept
+    def prune(self):
+        finished = sorted((job for job in list(self.queue.jobs.values()) if job.finished_running()), key=lambda job: job.finished)
+        for job in finished[:max(0, len(finished) - self.keep)]:
+            self.queue.forget(job.id)
+
+    # The service's state, for /health
+    def health(self):
+        return {"status": "ok", "workers": self.workers, "queued": len(self.queue.queued()), "running": len(self.queue.running()),
+                "jobs": len(self.queue.jobs), "uptime": time.time() - self.started}
+
+# Raised when a job is submitted to a full queue
+class QueueFull(Exception):
+    pass
+
+# Fit one submitted job (runs on a worker thread): data is a list of .csv files or the (time series, contents, variable names) of the data
+# With out, the results are written to that folder as by "python -m seed fit"
+def run_job(data, config, name, out, progress, cancel):
+    if isinstance(data, list) and len(data) == 1:
+        result = engine.run_file(data[0], config, progress, cancel)
+    elif isinstance(data, list): # Several trajectories, read in this worker: the service's workers are the parallelism
+        result = trajectories.run_files(data, config, progress, cancel, max_workers=1)
+    else:
+        engine.stage("read", progress, cancel)
+        result = engine.run(data[1], data[0], data[2], config, progress, cancel)
+    if out:
+        result["files"] = engine.write_results(result, out, name) + "_*"
+    return result
+
+# The status of a job, as sent to the client
+def job_json(job):
+    return {"id": job.id, "name": job.name, "status": job.status, "stage": job.stage, "priority": job.priority, "submitted": job.submitted,
+            "started": job.started, "finished": job.finished, "error": job.error}
+
+# The model and score of a result, as sent to the client. The simulation is only included if asked for, it can be as long as the data
+def result_json(result, simulation=False):
+    sent = {
+        "variable_names": list(result["variable_names"]),
+        "feats": list(result["feats"]),
+        "coefs": np.asarray(result["coefs"], dtype=float).tolist(),
+        "equations": result["model"].equations(),
+        "score": float(result["score"]),
+        "n_samples": int(result["n_samples"]),
+        "inclusion": None if result.get("inclusion") is None else np.asarray(result["inclusion"], dtype=float).tolist(),
+        "precision": result.get("precision"),
+        "sampling": result.get("sampling"),
+        "config": engine.config_json(result["config"]),
+        "fingerprint": result.get("fingerprint"),
+        "stored": bool(result.get("stored")),
+        "data": result.get("data"),
+        "files": result.get("files"),
+    }
+    if result.get("trajectories"):
+        sent["trajectories"] = [{"data": traj["data"], "n_samples": int(traj["n_samples"]), "score": float(traj["score"])} for traj in result["trajectories"]]
+    if simulation and result.get("sim_data") is not None:
+        sent["sim_time"] = np.asarray(result["sim_time"], dtype=float).tolist()
+        sent["sim_data"] = np.asarray(result["sim_data"], dtype=float).tolist()
+    return sent
+
+# Handles the HTTP requests, see the list at the top of the file. The Service is the server's "service" attribute
+class Handler(BaseHTTPRequestHandler):
+    server_version = "SEED/2.0"
+    protocol_version = "HTTP/1.1" # Connections are kept open between requests
+
+    # Check the request's token, sending the error if it's missing or wrong
+    def check_token(self):
+        if self.server.service.authorized(self.headers.get("Authorization")):
+            return True
+        self.close_connection = True # The body (if any) isn't read
+        self.send_json(401, {"error": "Missing or wrong token"})
+        return False
+
+    def do_GET(self):
+        if not self.check_token():
+            return None
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+        service = self.server.service
+        if parts == ["health"]:
+            return self.send_json(200, service.health())
+        if parts == ["jobs"]:
+            return self.send_json(200, [job_json(job) for job in sorted(list(service.queue.jobs.values()), key=lambda job: job.id)])
+        job = self.find_job(parts)
+        if job is None:
+            return None
+        if len(parts) == 2:
+            return self.send_json(200, job_json(job))
+        if len(parts) == 3 and parts[2] == "result":
+            if "wait" in query:
+                try:
+                    job.wait(min(float(query["wait"][0]), 3600.0))
+                except ValueError:
+                    return self.send_json(400, {"error": "wait must be a number of seconds"})
+            if job.status == "done":
+                simulation = query.get("simulation", ["0"])[0] not in ("0", "false", "")
+                return self.send_json(200, dict(job_json(job), result=result_json(job.result, simulation)))
+            return self.send_json(202 if not job.finished_running() else 409, job_json(job)) # Still to come, or never will
+        return self.send_json(404, {"error": "Unknown path: " + url.path})
+
+    def do_POST(self):
+        if not self.check_token():
+            return None
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if parts != ["jobs"]:
+            return self.send_json(404, {"error": "Unknown path: " + self.path})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > max_body:
+            self.close_connection = True # The body isn't read
+            return self.send_json(413, {"error": "The request is larger than " + str(max_body) + " bytes"})
+        try:
+            job = self.server.service.submit(json.loads(self.rfile.read(length) or b"null"))
+        except QueueFull as err:
+            return self.send_json(503, {"error": str(err)})
+        except (ValueError, KeyError, TypeError) as err: # Invalid JSON, data or configuration
+            return self.send_json(400, {"error": str(err.args[0]) if isinstance(err, KeyError) and err.args else str(err)})
+        return self.send_json(202, job_json(job))
+
+    def do_DELETE(self):
+        if not self.check_token():
+            return None
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        job = self.find_job(parts)
+        if job is None:
+            return None
+        queue = self.server.service.queue
+        if len(parts) != 2:
+            return self.send_json(404, {"error": "Unknown path: " + self.path})
+        if job.finished_running():
+            queue.forget(job.id)
+            return self.send_json(200, dict(job_json(job), forgotten=True))
+        queue.cancel(job.id)
+        return self.send_json(200, job_json(job)) # Cancelled now if it was queued, at the next stage if running (see its status)
+
+    # The job of a /jobs/<id>/... path, or None (with the error sent) if there isn't one
+    def find_job(self, parts):
+        if len(parts) < 2 or parts[0] != "jobs" or not parts[1].isdigit():
+            self.send_json(404, {"error": "Unknown path: " + self.path})
+            return None
+        job = self.server.service.queue.jobs.get(int(parts[1]))
+        if job is None:
+            self.send_json(404, {"error": "No job " + parts[1]})
+        return job
+
+    def send_json(self, code, body):
+        data = json.dumps(body, default=repr).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            super().log_message(format, *args)
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix socket" # A Unix socket client has no address
+
+# An HTTP server on a Unix socket, so the service can be limited to the users allowed to open the socket file
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+# Remove the socket file of a service that stopped without removing it. Raises an OSError if a service is still answering on it, or
+# the file isn't a socket
+def remove_stale_socket(socket_path):
+    if not os.path.lexists(socket_path):
+        return
+    if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+        raise OSError(socket_path + " already exists and isn't a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError): # Nothing listening
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise OSError("A service is already running on " + socket_path)
+
+# Create the server for service, on host and port or (with socket_path) a Unix socket that only this user can open. Port 0 picks a free
+# port, see server.server_address
+def make_server(service, host=default_host, port=default_port, socket_path=None):
+    if socket_path:
+        remove_stale_socket(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        mask = os.umask(0o177) # The socket file is created with permissions 0600
+        try:
+            server = UnixHTTPServer(socket_path, Handler)
+        finally:
+            os.umask(mask)
+    else:
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+# SIGTERM handler: stop the service as if interrupted
+def stop(signum, frame):
+    raise KeyboardInterrupt
+
+# Write a new random token to token_file, readable only by this user, and return it
+def make_token(token_file):
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(os.path.abspath(token_file)), exist_ok=True)
+    fd = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as fil:
+        fil.write(token + "\n")
+    os.chmod(token_file, 0o600) # If the file already existed
+    return token
+
+# Read the token from a token file
+def read_token(token_file):
+    with open(token_file) as fil:
+        return fil.read().strip()
+
+# Run the service until interrupted: on the Unix socket socket_path (default: default_socket()) or, if port is given, on host and port.
+# A port always needs a token: if token isn't given, a new one is written to token_file (default: default_token_file()) for the clients
+def serve(host=default_host, port=None, socket_path=None, workers=1, max_queued=100, keep=1000, verbose=False, roots=None, token=None, token_file=None):
+    if port is None:
+        socket_path = socket_path or default_socket()
+    elif token is None:
+        token_file = token_file or default_token_file()
+        token = make_token(token_file)
+    service = Service(workers, max_queued, keep, verbose, roots, token)
+    server = make_server(service, host, port, None if port is not None else socket_path)
+    if threading.current_thread() is threading.main_thread(): # Stopped by a service manager's SIGTERM the same way as by Ctrl+C
+        signal.signal(signal.SIGTERM, stop)
+    if port is not None:
+        socket_path = None
+    print("SEED 2.0 service with " + str(workers) + " workers on " + (socket_path or "http://" + host + ":" + str(server.server_address[1]))
+          + ", reading and writing in " + ", ".join(service.roots) + (", token in " + token_file if token_file else ""), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+# An HTTP connection over a Unix socket
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+# Make one request to a service at url (e.g. "http://127.0.0.1:8765") or on the Unix socket socket_path (default: default_socket()),
+# returning (status code, JSON body). token is the service's token, if it has one
+def call(method, path, body=None, url=None, socket_path=None, timeout=None, token=None):
+    if url:
+        parsed = urlparse(url)
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+    else:
+        conn = UnixConnection(socket_path or default_socket(), timeout)
+    try:
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        if token:
+            headers["Authorization"] = "Bearer " + token
+        conn.request(method, path, body=data, headers=headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        conn.close()
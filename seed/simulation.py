@@ -0,0 +1,139 @@
+# SEED 2.0 forward simulation
+# Compiles a fitted model into a right-hand side that only evaluates the library features with a nonzero coefficient, and integrates it
+# with a choice of solver and tolerances. Polynomial, identity and Fourier libraries are evaluated directly with numpy (with an exact jacobian
+# for the implicit solvers); any other library is evaluated through PySINDy and the inactive columns dropped
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+# The solve_ivp methods that can be selected. The implicit ones are given the jacobian of the compiled right-hand side when it's known
+solvers = ["LSODA", "RK45", "RK23", "DOP853", "Radau", "BDF"]
+implicit_solvers = ["LSODA", "Radau", "BDF"]
+
+# Features of a polynomial library: prod(x_j ** powers[k, j]) for each active feature k
+class PolynomialTerms:
+    def __init__(self, powers):
+        self.powers = np.asarray(powers, dtype=float) # n_active x n_variables
+        # For the jacobian: the powers with one taken off variable j (clipped at 0, those terms are multiplied by a zero power anyway)
+        self.reduced = np.clip(self.powers[:, None, :] - np.eye(self.powers.shape[1])[None], 0, None) # n_active x n_variables x n_variables
+
+    # x is one state (n_variables) or a set of states (n_variables x n_states), the features have the same number of dimensions
+    def values(self, x):
+        if x.ndim == 1:
+            return np.prod(x ** self.powers, axis=1)
+        return np.prod(x.T[:, None, :] ** self.powers[None], axis=2).T
+
+    # d feature_k / d x_j for one state
+    def derivatives(self, x):
+        return self.powers * np.prod(x ** self.reduced, axis=2)
+
+# Features of a Fourier library: sin(freq * x_var) or cos(freq * x_var)
+class FourierTerms:
+    def __init__(self, var, freq, is_sin, n_variables):
+        self.var = np.asarray(var, dtype=int)
+        self.freq = np.asarray(freq, dtype=float)
+        self.is_sin = np.asarray(is_sin, dtype=bool)
+        self.n_variables = n_variables
+
+    def values(self, x):
+        freq = self.freq if x.ndim == 1 else self.freq[:, None]
+        arg = freq * x[self.var]
+        is_sin = self.is_sin if x.ndim == 1 else self.is_sin[:, None]
+        return np.where(is_sin, np.sin(arg), np.cos(arg))
+
+    def derivatives(self, x):
+        arg = self.freq * x[self.var]
+        deriv = np.zeros((len(self.var), self.n_variables))
+        deriv[np.arange(len(self.var)), self.var] = np.where(self.is_sin, self.freq * np.cos(arg), -self.freq * np.sin(arg))
+        return deriv
+
+# Any other library: evaluated through PySINDy, keeping only the active columns. There's no exact jacobian
+class LibraryTerms:
+    def __init__(self, library, active):
+        self.library = library
+        self.active = np.asarray(active)
+
+    def values(self, x):
+        if x.ndim == 1:
+            return np.asarray(self.library.transform(x[None]))[0, self.active]
+        return np.asarray(self.library.transform(x.T))[:, self.active].T
+
+    derivatives = None
+
+# The compiled terms of the active features of a library, or LibraryTerms if the library can't be compiled
+def compile_terms(library, active, n_variables):
+    name = type(library).__name__
+    if getattr(library, "library_ensemble", False): # Ensembled libraries drop features, so the column order isn't known here
+        return LibraryTerms(library, active)
+    if name == "PolynomialLibrary":
+        return PolynomialTerms(np.asarray(library.powers_)[active])
+    if name == "IdentityLibrary":
+        return PolynomialTerms(np.eye(n_variables)[active])
+    if name == "FourierLibrary": # Same feature order as FourierLibrary.transform: frequency, then variable, then sin before cos
+        var, freq, is_sin = [], [], []
+        for i in range(library.n_frequencies):
+            for j in range(n_variables):
+                for sin, included in ((True, library.include_sin), (False, library.include_cos)):
+                    if included:
+                        var.append(j)
+                        freq.append(i + 1)
+                        is_sin.append(sin)
+        return FourierTerms(np.asarray(var)[active], np.asarray(freq)[active], np.asarray(is_sin)[active], n_variables)
+    return LibraryTerms(library, active)
+
+# The model right-hand side dx/dt = coefs[:, active] . features_active(x), as a function of (time, state) for solve_ivp
+class RHS:
+    def __init__(self, coefs, library, n_variables):
+        coefs = np.asarray(coefs, dtype=float)
+        self.active = np.flatnonzero(np.any(coefs != 0, axis=0)) # Features used by at least one equation
+        self.coefs = np.ascontiguousarray(coefs[:, self.active])
+        self.terms = compile_terms(library, self.active, n_variables)
+        self.n_variables = n_variables
+
+    # state is one state (n_variables) or, for vectorized solvers, a set of states (n_variables x n_states)
+    def __call__(self, time, state):
+        if len(self.active) == 0:
+            return np.zeros(np.shape(state))
+        return self.coefs @ self.terms.values(np.asarray(state, dtype=float))
+
+    # Is the exact jacobian available?
+    def has_jacobian(self):
+        return self.terms.derivatives is not None
+
+    def jacobian(self, time, state):
+        if len(self.active) == 0:
+            return np.zeros((self.n_variables, self.n_variables))
+        return self.coefs @ self.terms.derivatives(np.asarray(state, dtype=float))
+
+# The output times for a simulation of the time series t: every time, or about points evenly spaced ones (always including the last)
+def output_times(t, points=None):
+    t = np.asarray(t, dtype=float)
+    if not points or points >= len(t):
+        return t
+    step = int(np.ceil(len(t) / points))
+    index = np.arange(0, len(t), step)
+    if index[-1] != len(t) - 1:
+        index = np.append(index, len(t) - 1)
+    return t[index]
+
+# Integrate dx/dt = rhs(t, x) from x0, returning the state at every time in t (NaN after the point where the integration stopped)
+# callback (optional) is called after every step of the solver, and can stop the simulation by raising an exception
+def integrate(rhs, x0, t, method="LSODA", rtol=1e-12, atol=1e-12, callback=None):
+    if method not in solvers:
+        raise ValueError("Unknown solver: " + str(method) + " (choose from " + ", ".join(solvers) + ")")
+    t = np.asarray(t, dtype=float)
+
+    options = {}
+    if callback is not None: # Called as an event that never happens, between steps rather than inside the right-hand side: an exception
+        options["events"] = lambda time, state: callback() or 1.0 # raised there would pass through LSODA's Fortran code, which prints an error
+    if method in implicit_solvers and rhs.has_jacobian():
+        options["jac"] = rhs.jacobian
+    if method in ("Radau", "BDF") and not rhs.has_jacobian(): # The finite difference jacobian evaluates the right-hand side for all columns at once
+        options["vectorized"] = True
+
+    sol = solve_ivp(rhs, (t[0], t[-1]), np.asarray(x0, dtype=float), t_eval=t, method=method, rtol=rtol, atol=atol, **options)
+
+    # If the integration fails part way (e.g. the model blows up), fill the remaining times with NaN so the output always matches t
+    sim = np.full((len(t), len(x0)), np.nan)
+    sim[:sol.y.shape[1]] = sol.y.T
+    return sim
@@ -0,0 +1,53 @@
+# SEED 2.0 pipeline stages
+# The names of the stages of a run, the cancellation check between them and the cancellable running of calls on a process pool. Kept free of heavy imports so that the GUI can use it at start up
+
+# The stages of a run, in order, with the text shown while each one is in progress
+STAGES = [
+    ("read", "Reading data"),
+    ("differentiate", "Differentiating"),
+    ("library", "Evaluating feature library"),
+    ("fit", "Fitting model"),
+    ("score", "Scoring model"),
+    ("simulate", "Simulating model"),
+]
+
+# Raised inside a run when it has been cancelled
+class Cancelled(Exception):
+    pass
+
+# Report the start of a pipeline stage to the progress callback, stopping the run if the cancel event has been set
+def stage(name, progress=None, cancel=None):
+    check_cancel(cancel)
+    if progress is not None:
+        progress(name)
+
+# Stop the run if the cancel event (a threading.Event or anything with is_set()) has been set
+def check_cancel(cancel):
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+# Run func(*args) for each set of arguments on the pool (or in this process if there is no pool), in order
+# The run stops once cancel is set: the calls that haven't started are dropped
+def run_all(pool, func, arg_lists, cancel=None):
+    from concurrent.futures import TimeoutError # The futures' TimeoutError, only the built in one from Python 3.11. Imported here, the GUI imports this module at start up
+    if pool is None:
+        values = []
+        for args in arg_lists:
+            check_cancel(cancel)
+            values.append(func(*args))
+        return values
+    futures = [pool.submit(func, *args) for args in arg_lists]
+    values = []
+    try:
+        for future in futures:
+            while True: # Wait in short steps so a cancel is noticed while a long trajectory is being processed
+                try:
+                    values.append(future.result(timeout=0.1))
+                    break
+                except TimeoutError:
+                    check_cancel(cancel)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return values
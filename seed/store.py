@@ -0,0 +1,110 @@
+# SEED 2.0 result store
+# Finished runs saved on disk, keyed by the fingerprint of the data and every option that changes the result, so that running the same data
+# with the same options again (in a later session, or by someone sharing the folder) loads the coefficients, score and simulation instead of refitting.
+# Entries are model files (see artifact.py) with the simulation included. The least recently used entries are removed when the store
+# is larger than its budget
+
+import hashlib
+import json
+import os
+import threading
+
+from . import artifact, registry
+
+FORMAT = 2 # Part of every key, increase to invalidate every entry when the way results are computed changes
+
+# Configuration keys that don't change the result of a run
+unkeyed = ["ingest_cache", "memo", "store"]
+
+# Folder the results are kept in, can be moved with the SEED_CACHE_DIR environment variable
+def store_dir():
+    return os.path.join(os.environ.get("SEED_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "seed")), "results")
+
+# Default budget in megabytes, can be changed with the SEED_STORE_MB environment variable (0 turns the store off)
+def default_budget():
+    return int(float(os.environ.get("SEED_STORE_MB", "2048")) * 1024 * 1024)
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+# The key of a run: "<data part>-<options part>", so that every entry for a data set can be found from its fingerprint
+# The variable names are part of the options, as they are part of the feature names
+def result_key(data_fp, config, variable_names):
+    from . import engine # Imported here, engine imports this module
+    options = {key: val for key, val in engine.config_json(config).items() if key not in unkeyed}
+    options["variable_names"] = list(variable_names)
+    options["pysindy"] = registry.pysindy_version() # A new PySINDy version can give different results
+    options["format"] = FORMAT
+    return _digest(data_fp)[:16] + "-" + _digest(json.dumps(options, sort_keys=True, default=repr))[:24]
+
+def entry_path(key, folder=None):
+    return os.path.join(folder or store_dir(), key + ".npz")
+
+# Return the stored result for key, or None. A hit marks the entry as recently used
+def get(key, folder=None):
+    path = entry_path(key, folder)
+    try:
+        result = artifact.load_model(path)
+        os.utime(path) # The modification time is used as the last use time for eviction
+    except (OSError, ValueError, KeyError): # Missing, or from an older format or PySINDy, or removed by another process while loading
+        return None
+    result["model_file"] = None # The store's file is an internal copy
+    return result
+
+# Store a finished result, then remove the least recently used entries until the store is within its budget
+def put(key, result, folder=None, budget=None):
+    budget = default_budget() if budget is None else budget
+    if budget <= 0:
+        return
+    folder = folder or store_dir()
+    os.makedirs(folder, exist_ok=True)
+    path = entry_path(key, folder)
+    tmp = path + "." + str(os.getpid()) + "-" + str(threading.get_ident()) + ".tmp" # Per writer, the service's worker threads can store the same key at once
+    artifact.save_model(tmp, result, simulation=True)
+    os.replace(tmp, path) # Replaced in one step so another process never reads a half written entry
+    evict(budget, folder)
+
+# The stored entries as (path, size in bytes, last use time), least recently used first
+def entries(folder=None):
+    folder = folder or store_dir()
+    if not os.path.isdir(folder):
+        return []
+    found = []
+    for file in os.listdir(folder):
+        if file.endswith(".npz"):
+            path = os.path.join(folder, file)
+            try:
+                stat = os.stat(path)
+            except OSError: # Removed by another process
+                continue
+            found.append((path, stat.st_size, stat.st_mtime))
+    return sorted(found, key=lambda item: item[2])
+
+# Remove the least recently used entries until the total size is within budget (bytes)
+def evict(budget, folder=None):
+    found = entries(folder)
+    total = sum(size for path, size, used in found)
+    for path, size, used in found:
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+# Remove stored results: the entry for one key, every entry for the data with the fingerprint data_fp, or (with neither) everything
+# Returns the number of entries removed
+def invalidate(key=None, data_fp=None, folder=None):
+    prefix = None if data_fp is None else _digest(data_fp)[:16] + "-"
+    removed = 0
+    for path, size, used in entries(folder):
+        name = os.path.basename(path)[:-4]
+        if (key is not None and name != key) or (prefix is not None and not name.startswith(prefix)):
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,194 @@
+# SEED 2.0 out-of-core (streaming) fitting
+# Reads a .csv data file in chunks and accumulates the sufficient statistics Theta^T Theta and Theta^T dX/dt, so that memory scales
+# with the number of library features rather than the length of the time series
+
+import csv
+
+import numpy as np
+import pandas as pd
+
+from . import engine
+from .model import Model
+
+# Read the data rows of a .csv file in chunks of chunk_rows, yielding (time series, data) for each chunk
+def iter_chunks(path, chunk_rows):
+    reader = pd.read_csv(path, skiprows=1, header=None, dtype=np.float64, engine="c", chunksize=chunk_rows)
+    for chunk in reader:
+        data = chunk.to_numpy()
+        yield np.ascontiguousarray(data[:, 0]), np.ascontiguousarray(data[:, 1:])
+
+# Running totals over all samples: Theta^T Theta, Theta^T x_dot and the sums needed for the model score
+class Statistics:
+    def __init__(self, n_features, n_targets):
+        self.gram = np.zeros((n_features, n_features)) # Theta^T Theta
+        self.cross = np.zeros((n_features, n_targets)) # Theta^T x_dot
+        self.sum_y = np.zeros(n_targets) # Sum of x_dot, per variable
+        self.sum_yy = np.zeros(n_targets) # Sum of x_dot^2, per variable
+        self.n_samples = 0
+
+    # Add a block of samples, each counted with its weight in weights if given (n_samples becomes their total weight)
+    def add(self, theta, x_dot, weights=None):
+        if weights is None:
+            x_dot, theta = engine.drop_nan_rows(x_dot, theta)
+            self.gram += theta.T @ theta
+            self.cross += theta.T @ x_dot
+            self.sum_y += x_dot.sum(axis=0)
+            self.sum_yy += np.einsum("ij,ij->j", x_dot, x_dot)
+            self.n_samples += len(x_dot)
+            return
+        keep = ~np.isnan(x_dot).any(axis=1)
+        x_dot, theta, weights = x_dot[keep], theta[keep], np.asarray(weights, dtype=float)[keep]
+        weighted = theta * weights[:, np.newaxis]
+        self.gram += weighted.T @ theta
+        self.cross += weighted.T @ x_dot
+        self.sum_y += weights @ x_dot
+        self.sum_yy += weights @ (x_dot * x_dot)
+        self.n_samples += float(weights.sum())
+
+    # A small least squares problem (at most n_features rows) with the same normal equations as the full data:
+    # if Theta^T Theta = R^T R and R^T y = Theta^T x_dot, then |x_dot - Theta xi|^2 = |y - R xi|^2 + constant for every xi
+    # The decomposition is done with the columns of Theta scaled to unit length, as high order features can differ in size by
+    # many orders of magnitude and would otherwise be lost to rounding
+    def compressed(self):
+        norms = np.sqrt(np.diag(self.gram))
+        norms[norms == 0] = 1.0
+        vals, vecs = np.linalg.eigh(self.gram / np.outer(norms, norms))
+        keep = vals > vals.max() * len(vals) * np.finfo(float).eps # Leave out directions the data doesn't constrain
+        root = np.sqrt(vals[keep])
+        theta_c = root[:, np.newaxis] * vecs[:, keep].T * norms
+        x_dot_c = (vecs[:, keep].T @ (self.cross / norms[:, np.newaxis])) / root[:, np.newaxis]
+        return theta_c, x_dot_c
+
+    # Multiply the totals by factor, e.g. to weight earlier samples less than the ones added after (n_samples becomes their total weight)
+    def scale(self, factor):
+        self.gram *= factor
+        self.cross *= factor
+        self.sum_y *= factor
+        self.sum_yy *= factor
+        self.n_samples *= factor
+
+    # Least squares coefficients on the terms of coefs (the nonzero entries of each row), from the totals alone
+    def refit(self, coefs):
+        refitted = np.zeros(coefs.shape)
+        for num in range(coefs.shape[0]):
+            terms = np.flatnonzero(coefs[num])
+            if len(terms):
+                refitted[num, terms] = np.linalg.lstsq(self.gram[np.ix_(terms, terms)], self.cross[terms, num], rcond=None)[0]
+        return refitted
+
+    # R^2 of the predicted derivatives (averaged over the variables, as in PySINDy's SINDy.score), from the totals alone
+    def score(self, coefs):
+        ss_res = self.sum_yy - 2*np.einsum("ij,ji->i", coefs, self.cross) + np.einsum("ij,jk,ik->i", coefs, self.gram, coefs)
+        ss_tot = self.sum_yy - self.sum_y**2 / self.n_samples
+        r2 = np.where(ss_tot > 0, 1 - ss_res / np.where(ss_tot > 0, ss_tot, 1), np.where(ss_res <= 0, 1.0, 0.0))
+        return float(np.mean(r2))
+
+# Differentiates data that arrives in chunks. Each chunk is differentiated together with halo rows from its neighbours so that, for local
+# differentiation options (finite difference, smoothed finite difference with a window shorter than the halo), the derivatives match
+# differentiating all the data at once. A row is only ready once the halo rows after it have arrived
+class ChunkDifferentiator:
+    def __init__(self, diff, halo=32):
+        self.diff = diff
+        self.halo = halo
+        self.buf_t = self.buf_x = None # Rows waiting to be processed, with up to "halo" already processed rows in front of them
+        self.n_left = 0 # Number of already processed rows at the front of the buffer
+
+    # Add a chunk of data, returning the (data, derivatives) of the rows that are now ready, or None if there aren't any yet
+    def add(self, time_chunk, data_chunk):
+        if self.buf_t is None:
+            self.buf_t, self.buf_x = time_chunk, data_chunk
+        else:
+            self.buf_t = np.concatenate((self.buf_t, time_chunk))
+            self.buf_x = np.concatenate((self.buf_x, data_chunk))
+
+        end = len(self.buf_t) - self.halo # Rows after this point still need their right hand halo
+        if end - self.n_left < 2*self.halo:
+            return None # Wait for more data before differentiating
+        x_dot = engine.differentiate(self.buf_x, self.buf_t, self.diff)
+        ready = self.buf_x[self.n_left:end], x_dot[self.n_left:end]
+
+        start = end - self.halo # Keep a left hand halo of processed rows, plus the unprocessed rows
+        self.buf_t, self.buf_x = self.buf_t[start:], self.buf_x[start:]
+        self.n_left = self.halo
+        return ready
+
+    # The rows still waiting, differentiated without a right hand halo as at the end of all the data, or None if there aren't any
+    def finish(self):
+        if self.buf_t is None or len(self.buf_t) <= self.n_left:
+            return None
+        x_dot = engine.differentiate(self.buf_x, self.buf_t, self.diff)
+        ready = self.buf_x[self.n_left:], x_dot[self.n_left:]
+        self.n_left = len(self.buf_t)
+        return ready
+
+# The run options a fit a chunk at a time applies. The others (ensemble, precision, sample and simulation options) need all the data at once
+streamed_options = ["opt", "opt_params", "diff", "diff_params", "feat", "feat_params"]
+
+# The options of config that a fit a chunk at a time (what, e.g. "stream") applies, for its result. Raises a ValueError if any of the other
+# options is set to something other than its default, rather than fitting without it. The cache options and simulate (there's no simulation
+# anyway) are left out without a check, they don't change the model
+def streamed_config(config, what="stream"):
+    config = engine.make_config(config)
+    ignored = streamed_options + ["simulate", "ingest_cache", "memo", "store"]
+    unsupported = [key for key, val in config.items() if key not in ignored and val != engine.DEFAULT_CONFIG[key]]
+    if unsupported:
+        raise ValueError(what + " only applies the " + ", ".join(streamed_options) + " options, not " + ", ".join(unsupported))
+    return {key: config[key] for key in streamed_options}
+
+# Fit a model to a .csv data file without holding the whole file in memory, differentiating it a chunk at a time (see ChunkDifferentiator)
+# Only the streamed_options of config are applied, the result's "config" holds just those
+def stream_fit(path, config=None, chunk_rows=100000, halo=32):
+    config = streamed_config(config, "stream")
+    opt, diff, feat = engine.build(config)
+
+    with open(path, newline='') as csvfile:
+        variable_names = next(csv.reader(csvfile))[1:] # The system variable names from the first row
+
+    stats = None
+    chunks = ChunkDifferentiator(diff, halo)
+    x0 = None # The first data point
+    t_range = None # The first and last time
+
+    for time_chunk, data_chunk in iter_chunks(path, chunk_rows):
+        if stats is None: # The feature library is fitted on the first chunk, it only needs the number of variables
+            feat.fit(data_chunk)
+            stats = Statistics(feat.n_output_features_, data_chunk.shape[1])
+            x0 = data_chunk[0].copy()
+            t_range = (time_chunk[0], time_chunk[-1])
+        else:
+            t_range = (t_range[0], time_chunk[-1])
+        ready = chunks.add(time_chunk, data_chunk)
+        if ready is not None:
+            stats.add(np.asarray(feat.transform(ready[0])), ready[1])
+
+    if stats is None:
+        raise ValueError(str(path) + " doesn't contain any data")
+    ready = chunks.finish() # The rows at the end of the file
+    if ready is not None:
+        stats.add(np.asarray(feat.transform(ready[0])), ready[1])
+
+    theta_c, x_dot_c = stats.compressed()
+    coefs = engine.regress(theta_c, x_dot_c, opt) # The configured sparse regression, on the compressed problem
+    model = Model(coefs, feat.get_feature_names(list(variable_names)), variable_names, feat)
+
+    return {
+        "model": model,
+        "coefs": model.coefs,
+        "sparse": model.sparse,
+        "inclusion": None, # Ensemble fits need the rows of the data, which aren't kept
+        "precision": None,
+        "sampling": None, # Every sample is fitted
+        "feats": model.feats,
+        "variable_names": list(variable_names),
+        "score": stats.score(coefs),
+        "n_samples": stats.n_samples,
+        "x0": x0,
+        "t_range": t_range,
+        "fingerprint": None, # The data is never all in memory to be hashed
+        "time_series": None,
+        "contents": None,
+        "sim_time": None,
+        "sim_data": None, # The forward simulation of the whole series isn't run in streaming mode
+        "config": config,
+        "data": path,
+    }
@@ -0,0 +1,118 @@
+# SEED 2.0 hyperparameter sweep
+# Fits every combination of a grid of optimizer, differentiation and feature library options on a process pool and ranks the results.
+# The data is loaded once and shared with the workers through a memory-mapped .npy file, so it isn't copied per worker
+
+import csv
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import cache, engine, ingest
+
+# Columns of the ranked results table
+# fit_time is the sparse regression alone. diff_time and library_time are those of differentiating the data and evaluating the library, which
+# are close to 0 for a configuration that reused the matrices of an earlier one from the memo cache
+table_columns = ["rank", "score", "n_terms", "sparsity", "fit_time", "diff_time", "library_time", "opt", "opt_params", "diff", "diff_params", "feat", "feat_params", "error"]
+
+# Values in a grid are either a single value or a list of values to try (to try a list valued parameter, put it in another list)
+def grid_values(value):
+    return list(value) if isinstance(value, list) else [value]
+
+# Every combination of the parameter values in a dictionary of lists
+def param_combinations(params):
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid_values(params[name]) for name in names])]
+
+# Expand a grid, e.g. {"opt": "stlsq", "opt_params": {"threshold": [0.05, 0.1]}, "diff": ["finite_difference", "smoothed_finite_difference"]}
+# into the list of run configurations it describes. The optimizer options vary fastest, so neighbouring configurations share
+# their derivatives and library matrix and a worker can reuse them from the engine's memo cache
+def expand_grid(grid):
+    base = engine.make_config()
+    choices = []
+    for kind in ("feat", "diff", "opt"):
+        names = grid_values(grid.get(kind, base[kind]))
+        params = param_combinations(grid.get(kind + "_params", {}))
+        choices.append([(name, param) for name in names for param in params])
+
+    return [engine.make_config(opt=opt, opt_params=opt_params, diff=diff, diff_params=diff_params, feat=feat, feat_params=feat_params, simulate=False)
+            for (feat, feat_params), (diff, diff_params), (opt, opt_params) in itertools.product(*choices)]
+
+# Data shared with the worker processes, set by init_worker
+_shared = {}
+
+# Worker process start up: memory-map the shared data file, fingerprint it once for the memo cache (so no configuration is timed hashing
+# it) and limit each worker to one BLAS thread, the pool provides the parallelism
+def init_worker(data_path, variable_names):
+    _shared["data"] = np.load(data_path, mmap_mode="r")
+    _shared["data_fp"] = cache.data_key(_shared["data"][:, 0], _shared["data"][:, 1:])
+    _shared["variable_names"] = variable_names
+    try:
+        from threadpoolctl import threadpool_limits # Installed with scikit-learn
+        _shared["limits"] = threadpool_limits(1)
+    except ImportError:
+        pass
+
+# Fit one configuration of the grid on the shared data (runs in a worker process)
+def fit_one(config):
+    data = _shared["data"]
+    row = {"opt": config["opt"], "opt_params": config["opt_params"], "diff": config["diff"], "diff_params": config["diff_params"],
+           "feat": config["feat"], "feat_params": config["feat_params"], "score": None, "n_terms": None, "sparsity": None, "fit_time": None, "diff_time": None, "library_time": None, "error": ""}
+    starts = {} # The time each stage of the fit started
+    try:
+        opt, diff, feat = engine.build(config)
+        model, score = engine.fit(data[:, 1:], data[:, 0], _shared["variable_names"], opt, diff, feat, config=config, data_fp=_shared["data_fp"],
+                                  progress=lambda name: starts.setdefault(name, time.perf_counter()))
+        row["diff_time"] = starts["library"] - starts["differentiate"]
+        row["library_time"] = starts["fit"] - starts["library"]
+        row["fit_time"] = starts["score"] - starts["fit"]
+    except Exception as err: # An invalid combination is reported in the table rather than stopping the sweep
+        row["error"] = type(err).__name__ + ": " + str(err)
+        return row
+
+    row["score"] = float(score)
+    row["n_terms"] = int(np.count_nonzero(model.coefs))
+    row["sparsity"] = 1 - row["n_terms"] / model.coefs.size # Fraction of the coefficients that are zero
+    return row
+
+# Sort the results: highest score first, then the sparsest model, failed configurations last
+def rank(rows):
+    rows = sorted(rows, key=lambda row: (row["score"] is None, -(row["score"] or 0), row["n_terms"] or 0))
+    for num, row in enumerate(rows):
+        row["rank"] = num + 1
+    return rows
+
+# Run the grid on a data file already saved as a (time, data) .npy array
+def sweep_npy(data_path, variable_names, grid, max_workers=None):
+    configs = expand_grid(grid)
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(configs) // (4*workers)) # Runs of neighbouring configurations go to the same worker, to share memoized matrices
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(data_path, list(variable_names))) as pool:
+        rows = list(pool.map(fit_one, configs, chunksize=chunksize))
+    return rank(rows)
+
+# Run the grid on data in memory. The data is written once to a temporary .npy file that all workers memory-map
+def sweep(contents, time_series, variable_names, grid, max_workers=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, "data.npy")
+        np.save(data_path, np.column_stack((time_series, contents)))
+        return sweep_npy(data_path, variable_names, grid, max_workers)
+
+# Run the grid on a .csv data file. The workers memory-map the file's ingest sidecar directly when there is one
+def sweep_file(path, grid, max_workers=None):
+    time_series, contents, variable_names = ingest.load_csv(path)
+    if ingest.read_sidecar(path) is not None:
+        return sweep_npy(ingest.sidecar_base(path) + ".npy", variable_names, grid, max_workers)
+    return sweep(contents, time_series, variable_names, grid, max_workers)
+
+# Write the ranked results table to a .csv file (parameter dictionaries as json)
+def write_table(rows, path):
+    with open(path, "w", newline='') as fil:
+        writer = csv.DictWriter(fil, fieldnames=table_columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: (json.dumps(val, default=repr) if isinstance(val, dict) else val) for key, val in row.items()})
@@ -0,0 +1,159 @@
+# SEED 2.0 synthetic systems
+# Generates data from reference dynamical systems (Lorenz, Rossler, Lorenz-96 of any dimension, Lotka-Volterra and Van der Pol) for
+# testing and benchmarking. The right hand sides work on a whole ensemble of states at once, so a set of
+# trajectories from different initial conditions is integrated together with a fixed step Runge-Kutta scheme, and the results are
+# written to the output files a chunk of samples at a time, so the length of the data isn't limited by memory. The initial conditions
+# come from a seeded random generator, so the same options always give the same data
+
+import json
+import os
+
+import numpy as np
+
+formats = ["csv", "npy"] # One .csv file per trajectory, or one .npy array of every trajectory
+
+# Right hand sides: x is a (dimension, ensemble) array of states, each row one variable of every trajectory, and p the dictionary of
+# system parameters. Each returns dx/dt in the same shape. Working on whole rows keeps the number of numpy calls per step independent of the ensemble size
+def lorenz(x, p):
+    return np.array((p["sigma"] * (x[1] - x[0]), x[0] * (p["rho"] - x[2]) - x[1], x[0] * x[1] - p["beta"] * x[2]))
+
+def rossler(x, p):
+    return np.array((-x[1] - x[2], x[0] + p["a"] * x[1], p["b"] + x[2] * (x[0] - p["c"])))
+
+# dx_i/dt = (x_(i+1) - x_(i-2)) x_(i-1) - x_i + F, with the indices wrapping around
+def lorenz96(x, p):
+    return (np.roll(x, -1, axis=0) - np.roll(x, 2, axis=0)) * np.roll(x, 1, axis=0) - x + p["F"]
+
+def lotka_volterra(x, p):
+    return np.array((p["alpha"] * x[0] - p["beta"] * x[0] * x[1], p["delta"] * x[0] * x[1] - p["gamma"] * x[1]))
+
+def van_der_pol(x, p):
+    return np.array((x[1], p["mu"] * (1 - x[0]**2) * x[1] - x[0]))
+
+# The systems: right hand side, default parameters, default dimension, default initial condition (a function of the dimension) and the
+# standard deviation of the random offsets added to it for the other trajectories of an ensemble. Populations (Lotka-Volterra) stay positive
+systems = {
+    "lorenz": {"rhs": lorenz, "params": {"sigma": 10.0, "rho": 28.0, "beta": 8/3}, "dim": 3, "x0": lambda dim: [-8.0, 8.0, 27.0], "spread": 1.0},
+    "rossler": {"rhs": rossler, "params": {"a": 0.2, "b": 0.2, "c": 5.7}, "dim": 3, "x0": lambda dim: [1.0, 1.0, 0.0], "spread": 1.0},
+    "lorenz96": {"rhs": lorenz96, "params": {"F": 8.0}, "dim": 10, "x0": lambda dim: [8.01] + [8.0] * (dim - 1), "spread": 0.1},
+    "lotka_volterra": {"rhs": lotka_volterra, "params": {"alpha": 1.0, "beta": 0.1, "gamma": 1.5, "delta": 0.075}, "dim": 2,
+                       "x0": lambda dim: [10.0, 5.0], "spread": 1.0, "positive": True},
+    "van_der_pol": {"rhs": van_der_pol, "params": {"mu": 1.0}, "dim": 2, "x0": lambda dim: [2.0, 0.0], "spread": 0.5},
+}
+
+# The system entry for a name, raising a ValueError for an unknown system
+def get_system(name):
+    if name not in systems:
+        raise ValueError("Unknown system: " + str(name) + " (choose from " + ", ".join(systems) + ")")
+    return systems[name]
+
+# The dimension of a system: fixed, except for Lorenz-96 which can have any number of variables (at least 4)
+def system_dim(name, dim=None):
+    if name == "lorenz96":
+        dim = dim or systems[name]["dim"]
+        if dim < 4:
+            raise ValueError("Lorenz-96 needs at least 4 variables")
+        return dim
+    return get_system(name)["dim"]
+
+# The variable names written to the data files
+def variable_names(name, dim=None):
+    dim = system_dim(name, dim)
+    if name == "lorenz96":
+        return ["x" + str(num + 1) for num in range(dim)]
+    return ["x", "y", "z"][:dim]
+
+# The initial conditions of an ensemble of n trajectories: the first is x0 (default: the system's), the others x0 plus normal random
+# offsets with standard deviation spread (default: the system's), drawn from a generator seeded with seed
+def initial_conditions(name, n=1, x0=None, spread=None, seed=0, dim=None):
+    entry = get_system(name)
+    if dim is None and x0 is not None and name == "lorenz96": # The dimension of Lorenz-96 from the initial conditions given
+        dim = len(x0)
+    dim = system_dim(name, dim)
+    x0 = np.array(entry["x0"](dim) if x0 is None else x0, dtype=float)
+    if x0.shape != (dim,):
+        raise ValueError("The " + name + " system has " + str(dim) + " variables, but " + str(len(x0)) + " initial conditions were given")
+    spread = entry["spread"] if spread is None else spread
+    conds = np.tile(x0, (n, 1))
+    conds[1:] += spread * np.random.default_rng(seed).standard_normal((n - 1, dim))
+    if entry.get("positive"):
+        conds = np.abs(conds)
+    return conds
+
+# Integrate an ensemble of initial conditions x0s (one row each) with the classic 4th order Runge-Kutta method, substeps steps per sample
+# Yields (times, states) chunks of at most chunk_rows samples, states shaped (samples, ensemble, dimension). The first sample is x0s at t0
+def integrate(name, x0s, dt, n_samples, params=None, t0=0.0, substeps=1, chunk_rows=10000):
+    entry = get_system(name)
+    rhs = entry["rhs"]
+    p = dict(entry["params"], **(params or {}))
+    h, half, sixth, third = dt / substeps, 0.5 * dt / substeps, dt / (6*substeps), dt / (3*substeps)
+    x = np.array(x0s, dtype=float).T # One row per variable, see the right hand sides
+    for start in range(0, n_samples, chunk_rows):
+        rows = min(chunk_rows, n_samples - start)
+        states = np.empty((rows,) + x.shape[::-1])
+        for row in range(rows):
+            if start + row > 0: # The first sample is the initial condition itself
+                for step in range(substeps):
+                    k1 = rhs(x, p)
+                    k2 = rhs(x + half*k1, p)
+                    k3 = rhs(x + half*k2, p)
+                    k4 = rhs(x + h*k3, p)
+                    x = x + sixth*k1 + third*k2 + third*k3 + sixth*k4
+            states[row] = x.T
+        yield t0 + dt * np.arange(start, start + rows), states # Times from the sample number, so rounding errors don't build up
+
+# Generate the data in memory, returning the time series, the data of every trajectory (ensemble, samples, dimension) and the variable names
+def generate(name, n_samples, dt, ensemble=1, params=None, x0=None, spread=None, seed=0, dim=None, t0=0.0, substeps=1):
+    x0s = initial_conditions(name, ensemble, x0, spread, seed, dim)
+    chunks = list(integrate(name, x0s, dt, n_samples, params, t0, substeps))
+    time_series = np.concatenate([times for times, states in chunks])
+    contents = np.concatenate([states for times, states in chunks]).transpose(1, 0, 2)
+    return time_series, contents, variable_names(name, x0s.shape[1])
+
+# The data file of trajectory num of an ensemble
+def trajectory_path(out_dir, name, num, fmt="csv"):
+    return os.path.join(out_dir, name + "_" + format(num, "03d") + "." + fmt)
+
+# Generate the data and write it to out_dir as it's integrated: for "csv", one SEED 2.0 data file per trajectory (time column first,
+# variable names in the first row), which can be fitted together with "fit --trajectories"; for "npy", one <name>.npy array shaped
+# (ensemble, samples, 1 + dimension) with time as the first column. The options are saved in <name>.json, so the data can be made again
+# Returns the list of files written
+def write(name, out_dir, n_samples, dt, ensemble=1, fmt="csv", params=None, x0=None, spread=None, seed=0, dim=None, t0=0.0, substeps=1,
+          chunk_rows=10000, progress=None):
+    if fmt not in formats:
+        raise ValueError("Unknown format: " + str(fmt) + " (choose from " + ", ".join(formats) + ")")
+    x0s = initial_conditions(name, ensemble, x0, spread, seed, dim)
+    names = variable_names(name, x0s.shape[1])
+    os.makedirs(out_dir, exist_ok=True)
+
+    if fmt == "csv":
+        files = [trajectory_path(out_dir, name, num) for num in range(ensemble)]
+        for path in files: # Start each file with its header, the chunks are appended
+            with open(path, "w") as fil:
+                fil.write(",".join([""] + names) + "\n")
+    else:
+        files = [os.path.join(out_dir, name + ".npy")]
+        array = np.lib.format.open_memmap(files[0], mode="w+", dtype=np.float64, shape=(ensemble, n_samples, 1 + len(names)))
+
+    done = 0
+    for times, states in integrate(name, x0s, dt, n_samples, params, t0, substeps, chunk_rows):
+        if fmt == "csv":
+            for num, path in enumerate(files): # Opened per chunk, so an ensemble of any size never has more than one file open
+                with open(path, "a") as fil:
+                    np.savetxt(fil, np.column_stack((times, states[:, num])), delimiter=",", fmt="%.17g") # Every digit, so the values read back exactly
+        else:
+            array[:, done:done + len(times), 0] = times
+            array[:, done:done + len(times), 1:] = states.transpose(1, 0, 2)
+        done += len(times)
+        if progress is not None:
+            progress(done)
+    if fmt == "npy":
+        array.flush()
+        del array
+
+    meta = {"system": name, "params": dict(get_system(name)["params"], **(params or {})), "variable_names": names, "n_samples": n_samples,
+            "dt": dt, "t0": t0, "substeps": substeps, "ensemble": ensemble, "seed": seed, "initial_conditions": x0s.tolist(), "format": fmt,
+            "files": [os.path.basename(path) for path in files]}
+    with open(os.path.join(out_dir, name + ".json"), "w") as fil:
+        json.dump(meta, fil, indent=1)
+    return files
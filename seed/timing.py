@@ -0,0 +1,175 @@
+# SEED 2.0 timing
+# Records how long the steps of a process take, e.g. the start up of the GUI or the stages of a computation, so that slow downs can be measured
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# A list of named points in time, measured from when the timeline was created
+class Timeline:
+    def __init__(self, name, start=None):
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.marks = [] # (name, seconds since the start)
+
+    # Record that a step has been reached
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    # The marks as a dictionary, e.g. {"name": "startup", "marks": {"window shown": 0.12, ...}}
+    def report(self):
+        return {"name": self.name, "marks": dict(self.marks)}
+
+    # The marks as lines of text, with the time taken by each step
+    def summary(self):
+        lines = [self.name + ":"]
+        previous = 0.0
+        for name, seconds in self.marks:
+            lines.append("  " + format(seconds, "8.3f") + " s  (+" + format(seconds - previous, ".3f") + " s)  " + name)
+            previous = seconds
+        return "\n".join(lines)
+
+    # Save the report as json
+    def write(self, path):
+        with open(path, "w") as fil:
+            json.dump(self.report(), fil, indent=2)
+
+sample_interval = 0.01 # Seconds between readings of the resident memory while a stage runs
+
+# The resident memory of the process now in MB, None if unknown (it's read from /proc, so only on Linux)
+def current_memory():
+    try:
+        with open("/proc/self/statm") as fil:
+            return int(fil.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+# The peak resident memory of the process in MB since it started, None if unknown
+def peak_memory():
+    try:
+        with open("/proc/self/status") as fil:
+            for line in fil:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource # Not on Windows
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024 # Bytes on MacOS, kB elsewhere
+
+# The highest resident memory of the process while the sampler runs, read every sample_interval seconds on a thread. Nothing of the
+# process is reset, so profiles running at the same time (e.g. in the fitting service's workers) don't disturb each other, but the memory is
+# that of the whole process, including anything running alongside. Where the memory can't be read, the peak since the process started is used
+class PeakSampler:
+    def __init__(self):
+        self.peak = current_memory()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(sample_interval):
+            self.peak = max(self.peak, current_memory() or 0.0)
+
+    # Stop sampling and return the peak in MB, None if unknown
+    def stop(self):
+        if self._thread is None:
+            return peak_memory()
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_memory() or 0.0)
+        return self.peak
+
+# The wall time, CPU time and peak memory of each stage of a run, one stage after another
+# The CPU time is that of the whole process (all threads, including any used by numpy), and the peak memory is the highest resident memory
+# of the process during the stage, sampled on a thread (see PeakSampler; on Linux, elsewhere the highest since SEED 2.0 started). The stages can be saved as json or in the Chrome trace
+# format, which can be opened in chrome://tracing or https://ui.perfetto.dev
+class Profile:
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.started = time.time() # Wall clock time the profile started, for the trace
+        self.stages = [] # {"name", "start", "wall", "cpu", "peak_mb", "thread"}, start in seconds since the profile started
+        self._current = None
+
+    # End the current stage (if any) and start the next
+    def begin(self, name):
+        self.end()
+        self._current = {"name": name, "thread": threading.current_thread().name, "tid": threading.get_ident(),
+                         "cpu": time.process_time(), "start": time.perf_counter(), "memory": PeakSampler()}
+
+    # End the current stage
+    def end(self):
+        current, self._current = self._current, None
+        if current is None:
+            return
+        wall = time.perf_counter() - current["start"]
+        cpu = time.process_time() - current["cpu"]
+        peak = current["memory"].stop()
+        self.stages.append({"name": current["name"], "start": current["start"] - self.start, "wall": wall, "cpu": cpu, "peak_mb": peak,
+                            "thread": current["thread"], "tid": current["tid"]})
+
+    # A progress callback for engine.run / engine.run_file that starts a new stage each time one is reported, then passes it on to progress
+    # Call end() once the run has finished, to end the last stage
+    def track(self, progress=None):
+        def callback(name):
+            self.begin(name)
+            if progress is not None:
+                progress(name)
+        return callback
+
+    # Time a block of code as one stage, e.g. with profile.stage("show_plots"): ...
+    @contextmanager
+    def stage(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    # The totals over all stages: wall time, CPU time and the highest peak memory of any stage
+    def totals(self):
+        peaks = [stage["peak_mb"] for stage in self.stages if stage["peak_mb"] is not None]
+        return {"wall": sum(stage["wall"] for stage in self.stages), "cpu": sum(stage["cpu"] for stage in self.stages), "peak_mb": max(peaks) if peaks else None}
+
+    # The totals as one line of text, e.g. "0.412 s (CPU 0.398 s), peak memory 12.3 MB"
+    def summary(self):
+        totals = self.totals()
+        text = format(totals["wall"], ".3f") + " s (CPU " + format(totals["cpu"], ".3f") + " s)"
+        if totals["peak_mb"] is not None:
+            text += ", peak memory " + format(totals["peak_mb"], ".1f") + " MB"
+        return text
+
+    def report(self):
+        return {"name": self.name, "started": self.started, "stages": [{key: val for key, val in stage.items() if key != "tid"} for stage in self.stages],
+                "totals": self.totals()}
+
+    # The stages as Chrome trace events: one complete ("X") event per stage, on the thread it ran on, with times in microseconds
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for tid, thread in sorted({(stage["tid"], stage["thread"]) for stage in self.stages}):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+        for stage in self.stages:
+            events.append({"name": stage["name"], "cat": self.name, "ph": "X", "pid": pid, "tid": stage["tid"],
+                           "ts": (self.started + stage["start"]) * 1e6, "dur": stage["wall"] * 1e6,
+                           "args": {"cpu_ms": stage["cpu"] * 1e3, "peak_mb": stage["peak_mb"]}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    # Save the report as json
+    def write(self, path):
+        with open(path, "w") as fil:
+            json.dump(self.report(), fil, indent=2)
+
+    # Save the Chrome trace
+    def write_trace(self, path):
+        with open(path, "w") as fil:
+            json.dump(self.chrome_trace(), fil)
@@ -0,0 +1,159 @@
+# SEED 2.0 multi-trajectory fitting
+# Fits one model to many .csv data files, each a separate trajectory of the same system (e.g. runs from different initial conditions).
+# Every trajectory is read, differentiated and its feature library evaluated on a separate process, then the library matrices and derivatives
+# of all the trajectories are stacked for one shared regression. Each trajectory is then scored and simulated with the shared model
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import cache, engine, ensemble, precision, simulation
+from .model import Model
+from .stages import stage, run_all
+
+# The .csv data files to fit: files are used as given, folders are replaced by the .csv files inside them (in name order)
+def data_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, file) for file in sorted(os.listdir(path)) if file.endswith(".csv") and not file.startswith(".")]
+        else:
+            files.append(path)
+    if not files:
+        raise ValueError("No .csv data files found in " + ", ".join(str(path) for path in paths))
+    return files
+
+# The name of a trajectory, from its file name
+def trajectory_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+_worker = {} # State of a worker process, set by init_worker
+
+# Worker process start up: limit each worker to one BLAS thread, the pool provides the parallelism
+def init_worker():
+    try:
+        from threadpoolctl import threadpool_limits # Installed with scikit-learn
+        _worker["limits"] = threadpool_limits(1)
+    except ImportError:
+        pass
+
+# Read one trajectory, differentiate it and evaluate the feature library on it (runs in a worker process)
+def prepare(path, config):
+    time_series, contents, variable_names = engine.read_file(path, cache=config["ingest_cache"])
+    contents = np.array(contents) # A copy, so a memory-mapped file isn't sent back to the main process as a reference
+    diff = engine.make_component("diff", config["diff"], config["diff_params"])
+    feat = engine.make_component("feat", config["feat"], config["feat_params"])
+    fit_contents = np.asarray(contents, dtype=precision.data_type(config)) # The library matrix and derivatives in the configured precision
+    x_dot = engine.differentiate(fit_contents, time_series, diff)
+    feat, theta = engine.evaluate_library(fit_contents, feat)
+    return {
+        "data": path,
+        "name": trajectory_name(path),
+        "variable_names": list(variable_names),
+        "feats": list(feat.get_feature_names(list(variable_names))),
+        "time_series": np.array(time_series),
+        "contents": contents,
+        "x_dot": x_dot,
+        "theta": theta,
+        "fingerprint": cache.data_key(time_series, contents),
+    }
+
+# Simulate the model from the first point of one trajectory over its time series (runs in a worker process)
+def simulate_one(model, x0, time_series, config):
+    sim_time = simulation.output_times(time_series, config["sim_points"])
+    return sim_time, model.simulate(x0, sim_time, method=config["sim_method"], rtol=config["sim_rtol"], atol=config["sim_atol"])
+
+# Fit one model to all the trajectories in paths (.csv files, or folders of them), returning a result in the same form as engine.run()
+# with a "trajectories" list of the data, score and simulation of each trajectory. The top level data and simulation are those of
+# the first trajectory, and "score" is the score over every trajectory together. max_workers processes are used (default: one per core),
+# started with mp_context (a multiprocessing context, default: the platform's default way of starting processes)
+def run_files(paths, config=None, progress=None, cancel=None, max_workers=None, mp_context=None):
+    config = engine.make_config(config)
+    files = data_files(paths)
+    workers = min(max_workers or os.cpu_count() or 1, len(files))
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=init_worker) if workers > 1 else None
+
+    try:
+        # Read, differentiate and evaluate the library of every trajectory in parallel
+        stage("read", progress, cancel)
+        prepared = run_all(pool, prepare, [(path, config) for path in files], cancel)
+        first = prepared[0]
+        for traj in prepared[1:]:
+            if traj["variable_names"] != first["variable_names"]:
+                raise ValueError(traj["data"] + " has the variables " + ", ".join(traj["variable_names"]) + ", not " + ", ".join(first["variable_names"])
+                                 + " as in " + first["data"])
+
+        # One regression on the stacked library matrices and derivatives of all the trajectories
+        stage("fit", progress, cancel)
+        opt = engine.make_component("opt", config["opt"], config["opt_params"])
+        theta = np.concatenate([traj["theta"] for traj in prepared])
+        x_dot = np.concatenate([traj["x_dot"] for traj in prepared])
+        inclusion = None
+        if config["ensemble"]: # The trajectories' pool is only used to read and simulate, the ensemble starts its own
+            coefs, inclusion = ensemble.fit(theta, x_dot, config, cancel)[:2]
+        else:
+            coefs = engine.regress(theta, x_dot, opt)
+        feat = engine.make_component("feat", config["feat"], config["feat_params"])
+        feat.fit(first["contents"]) # The library of the model, the same features as the libraries fitted in the workers
+        variable_names = first["variable_names"]
+
+        stage("score", progress, cancel)
+        report = None
+        if precision.reduced(config): # Measure the accuracy lost against a float64 fit, as in engine.fit
+            diff = engine.make_component("diff", config["diff"], config["diff_params"])
+            total = len(theta)
+            def reference_statistics(max_rows): # Over every trajectory, each sampled in proportion to its length
+                stats = None
+                for traj in prepared:
+                    n = len(traj["time_series"])
+                    segments = precision.reference_segments(n, n, None if max_rows is None else max_rows * n / total)
+                    stats = precision.float64_statistics(traj["contents"], traj["time_series"], diff, feat, stats=stats, segments=segments)
+                return stats
+            full = (lambda: reference_statistics(None)) if total > precision.reference_rows else None
+            coefs, report = precision.check(coefs, reference_statistics(precision.reference_rows), opt, theta.dtype, ensemble=bool(config["ensemble"]), full_statistics=full)
+        model = Model(coefs, first["feats"], variable_names, feat, inclusion, report)
+        model_score = report["score"] if report else engine.score(coefs, theta, x_dot)
+        for traj in prepared:
+            traj["score"] = engine.score(coefs, traj["theta"], traj["x_dot"])
+            traj["x0"] = np.array(traj["contents"][0], dtype=float)
+            traj["n_samples"] = len(traj["time_series"])
+            traj["sim_time"] = traj["sim_data"] = None
+            del traj["theta"], traj["x_dot"] # Only needed for the fit and scores
+        del theta, x_dot
+
+        # Simulate every trajectory from its own initial conditions, in parallel
+        if config["simulate"]:
+            stage("simulate", progress, cancel)
+            sims = run_all(pool, simulate_one, [(model, traj["x0"], traj["time_series"], config) for traj in prepared], cancel)
+            for traj, (sim_time, sim_data) in zip(prepared, sims):
+                traj["sim_time"], traj["sim_data"] = sim_time, sim_data
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    trajectories = [{key: traj[key] for key in ("data", "name", "time_series", "contents", "x0", "n_samples", "score", "sim_time", "sim_data", "fingerprint")}
+                    for traj in prepared]
+    return {
+        "model": model,
+        "coefs": model.coefs,
+        "sparse": model.sparse,
+        "inclusion": model.inclusion,
+        "precision": model.precision,
+        "sampling": None, # Every sample of every trajectory is fitted
+        "feats": model.feats,
+        "variable_names": list(variable_names),
+        "score": model_score,
+        "n_samples": sum(traj["n_samples"] for traj in trajectories),
+        "time_series": first["time_series"],
+        "contents": first["contents"],
+        "sim_time": trajectories[0]["sim_time"],
+        "sim_data": trajectories[0]["sim_data"],
+        "config": config,
+        "fingerprint": hashlib.sha1("+".join(traj["fingerprint"] for traj in trajectories).encode("utf-8")).hexdigest(), # Of every trajectory, in order
+        "x0": trajectories[0]["x0"],
+        "stored": False,
+        "data": files,
+        "trajectories": trajectories,
+    }
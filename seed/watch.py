@@ -0,0 +1,153 @@
+# SEED 2.0 hot folder
+# Watches a folder that data files are written into (e.g. by an acquisition rig) and fits the configured model to every new or changed .csv
+# file in the background, a bounded number at a time (see jobs.py). The results are written next to each file as <name>.seed_coefficients.csv,
+# <name>.seed_summary.json (with the score), ... in the same form as "python -m seed fit". The summary also records a fingerprint of the
+# file's contents and of the options, so a file that already has a result for its contents and the options isn't fitted again, even after
+# the watcher is restarted. The folder is polled rather than watched with file system notifications, which also works on network drives
+# and needs no extra dependency
+
+import hashlib
+import json
+import os
+import time
+
+from . import engine, store
+from .jobs import JobQueue
+
+suffix = ".seed" # The results of data.csv are written as data.seed_*
+
+block_bytes = 1024 * 1024 # Read at a time when fingerprinting a file
+
+# Is file (a name) one of the results written by the watcher?
+def is_result(file):
+    return suffix + "_" in file
+
+# The .csv data files in folder, in name order, leaving out hidden files and the watcher's own results
+def data_files(folder):
+    return [os.path.join(folder, file) for file in sorted(os.listdir(folder))
+            if file.endswith(".csv") and not file.startswith(".") and not is_result(file)]
+
+# The size and modification time of a file, which change when it's written to
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+# A hash of the contents of a file, read a block at a time
+def file_fingerprint(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as fil:
+        for block in iter(lambda: fil.read(block_bytes), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# A hash of the options that change the result of a fit (as in the result store's keys)
+def options_key(config):
+    options = {key: val for key, val in engine.config_json(config).items() if key not in store.unkeyed}
+    return hashlib.sha1(json.dumps(options, sort_keys=True, default=repr).encode("utf-8")).hexdigest()[:24]
+
+# The base name of the results of a data file, e.g. folder/data.seed
+def results_base(path):
+    return os.path.splitext(path)[0] + suffix
+
+# Has the file already been fitted with these options, with the contents it has now?
+def has_result(path, fingerprint, options):
+    try:
+        with open(results_base(path) + "_summary.json") as fil:
+            summary = json.load(fil)
+    except (OSError, ValueError):
+        return False
+    return summary.get("file_fingerprint") == fingerprint and summary.get("options_key") == options
+
+# Fit one data file and write its results next to it, unless it already has a result (runs on a worker thread)
+# Returns the result, or None if the file was skipped
+def fit_file(path, config, options, progress=None, cancel=None):
+    fingerprint = file_fingerprint(path)
+    if has_result(path, fingerprint, options):
+        return None
+    result = engine.run_file(path, config, progress, cancel) # An identical file fitted before (e.g. a copy) is loaded from the result store
+    base = engine.write_results(result, os.path.dirname(path), os.path.basename(results_base(path)))
+    with open(base + "_summary.json") as fil:
+        summary = json.load(fil)
+    summary["file_fingerprint"] = fingerprint # Of the contents that were read, a change while fitting is seen on the next poll
+    summary["options_key"] = options
+    with open(base + "_summary.json", "w") as fil:
+        json.dump(summary, fil, indent=2)
+    result["files"] = base + "_*"
+    return result
+
+# Watches one folder: poll() looks for new and changed files and queues their fits, at most workers at a time
+# A file is only fitted once it has stopped changing for settle seconds, so files still being written aren't read half finished
+class Watcher:
+    def __init__(self, folder, config=None, workers=1, settle=2.0, log=print):
+        self.folder = folder
+        self.config = engine.make_config(config)
+        self.options = options_key(self.config)
+        self.settle = settle
+        self.log = log # Called with a line of text for each file fitted, skipped or failed
+        self.queue = JobQueue(workers, events=False)
+        self.seen = {} # The stamp of each file when it was last queued
+        self.changing = {} # Files waiting to settle: their stamp and when it was first seen
+        self.jobs = {} # The fit of each file that is queued or running
+
+    # Look for new and changed files, queueing those that have settled, and report the fits that have finished
+    def poll(self):
+        for path, job in list(self.jobs.items()):
+            if job.finished_running():
+                del self.jobs[path]
+                self.report(path, job)
+
+        now = time.time()
+        found = set()
+        for path in data_files(self.folder):
+            found.add(path)
+            try:
+                stamp = file_stamp(path)
+            except OSError: # Removed since the folder was listed
+                continue
+            if path in self.jobs or self.seen.get(path) == stamp: # Being fitted (a change is picked up once it's finished), or unchanged
+                continue
+            if self.changing.get(path, (None,))[0] != stamp:
+                self.changing[path] = (stamp, now)
+            if now - self.changing[path][1] < self.settle:
+                continue
+            del self.changing[path]
+            self.seen[path] = stamp
+            self.jobs[path] = self.queue.submit(os.path.basename(path), lambda progress, cancel, path=path: fit_file(path, self.config, self.options, progress, cancel))
+
+        for path in list(self.seen):
+            if path not in found: # Removed, fitted again if it comes back
+                del self.seen[path]
+        for path in list(self.changing):
+            if path not in found:
+                del self.changing[path]
+
+    # Is anything waiting to settle or be fitted?
+    def busy(self):
+        return bool(self.changing or self.jobs)
+
+    def report(self, path, job):
+        name = os.path.basename(path)
+        if job.status == "failed":
+            self.log(name + ": failed - " + job.error)
+        elif job.status == "cancelled":
+            self.log(name + ": cancelled")
+        elif job.result is None:
+            self.log(name + ": already fitted, skipped")
+        else:
+            self.log(name + ": score " + str(job.result["score"]) + (" (stored result)" if job.result.get("stored") else "") + " -> " + job.result["files"])
+
+    # Cancel the fits that are queued or running
+    def stop(self):
+        for job in self.jobs.values():
+            self.queue.cancel(job.id)
+
+    # Poll every interval seconds until interrupted or, with once, until every file in the folder has been handled
+    def run(self, interval=2.0, once=False):
+        try:
+            while True:
+                self.poll()
+                if once and not self.busy():
+                    return
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stop()